@@ -6,22 +6,33 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import plotly.graph_objects as go
-from scipy.stats import norm
 from dotenv import load_dotenv
 from streamlit_searchbox import st_searchbox
 
+import chart_helpers
 import config
 import db_manager
 import inventory_math
+import inventory_dynamics
 import ai_brain
 import report_gen
-import forecast
+import forecast_service
+import capacity_trajectory
 import profit_optimizer
 import map_viz
+import metrics_engine
 import monte_carlo
 import network_design
+import network_risk
+import strategy_lab
+import sla_solver
+import surrogate
+import carbon_exposure
+import carbon_hedge
+import carbon_models
 import climate_finance
 import ui_views
+import variance_reduction
 
 load_dotenv()
 
@@ -124,6 +135,21 @@ warehouse_cap = st.sidebar.number_input("Internal Capacity Limit", value=150)
 partner_cost = st.sidebar.number_input("Partner Surcharge ($)", value=5.0)
 sim_sla = st.sidebar.slider("Target Service Level (%)", 50, 99, 95, 1)
 
+scenario_inputs = {
+    "return_rate": return_rate,
+    "lead_time": lead_time_months,
+    "lead_time_volatility": lead_time_volatility,
+    "sla": sim_sla / 100.0,
+    "holding_cost": holding_cost,
+    "stockout_cost": stockout_cost,
+    "warehouse_cap": warehouse_cap,
+    "partner_cost": partner_cost,
+    "co2_mult": co2_mult,
+    "unit_cost": uc,
+    "selling_price": sp,
+    "transport_mode": transport_mode
+}
+
 st.sidebar.divider()
 st.sidebar.caption("LSP Digital Twin | v5.0.0 | System: Frankfurt | Status: Online")
 
@@ -144,6 +170,37 @@ if source_option == "Live WMS Database":
                     status = "🔴 Strain" if last_val > avg_val * 1.5 else "🟡 Idle" if last_val < avg_val * 0.5 else "🟢 Optimized"
                     summary_data.append({"Lane": p, "Vol": int(last_val), "Status": status})
             st.dataframe(pd.DataFrame(summary_data), use_container_width=True, hide_index=True)
+
+            portfolio_df = metrics_engine.compute_portfolio_metrics(full_df, scenario_inputs)
+            portfolio_df = portfolio_df.merge(
+                sla_solver.optimal_lane_slas(portfolio_df, scenario_inputs)[["lane", "optimal_sla", "cost_saving"]],
+                on="lane"
+            )
+            st.markdown("##### Portfolio Metrics (All Lanes)")
+            st.dataframe(
+                portfolio_df[[
+                    "lane", "total_workload", "safety_stock", "required_capacity", "outsourced_vol",
+                    "resilience_score", "reliability_score", "loyalty_score", "co2_emissions",
+                    "optimal_sla", "cost_saving"
+                ]],
+                use_container_width=True, hide_index=True
+            )
+            st.download_button(
+                "Export Portfolio Metrics (CSV)", portfolio_df.to_csv(index=False).encode("utf-8"),
+                "portfolio_metrics.csv", "text/csv"
+            )
+
+            st.markdown("##### Correlated Network Risk")
+            net_paths = st.select_slider("Network Paths", options=[10000, 25000, 50000, 100000], value=25000)
+            if st.button("Run Network VaR"):
+                with st.spinner(f"Simulating {net_paths:,} correlated network scenarios..."):
+                    net = network_risk.simulate_network_risk(full_df, scenario_inputs, num_paths=net_paths)
+                n1, n2, n3 = st.columns(3)
+                n1.metric("Network VaR (95%)", f"${net['var']:,.0f}", f"Expected ${net['avg_profit']:,.0f}")
+                n2.metric("Network CVaR (95%)", f"${net['cvar']:,.0f}",
+                          f"Diversification ${net['diversification_benefit']:,.0f}")
+                n3.metric("Correlation Shrinkage", f"{net['shrinkage']:.2f}", "Towards Independence", delta_color="off")
+                st.dataframe(net["contributions"].round(1), use_container_width=True, hide_index=True)
     st.divider()
 else:
     st.info("Sandbox Mode: Upload a CSV.")
@@ -155,62 +212,34 @@ else:
             df['date'] = pd.to_datetime(df['date'])
 
 if df is not None and not df.empty:
-    raw_avg_demand = df['demand'].mean()
-    reverse_logistics_vol = raw_avg_demand * (return_rate / 100.0)
-    total_workload = raw_avg_demand + reverse_logistics_vol
-    std_dev_demand = df['demand'].std() if len(df) > 1 else 0
+    lane_row = metrics_engine.compute_lane_metrics(df, scenario_inputs, selected_sku if selected_sku else "Aggregate")
+
+    raw_avg_demand = lane_row["raw_avg_demand"]
+    reverse_logistics_vol = lane_row["return_vol"]
+    total_workload = lane_row["total_workload"]
+    std_dev_demand = lane_row["std_dev_demand"]
 
     actual_sla = inventory_math.calculate_newsvendor_target(holding_cost, stockout_cost)
-    sim_safety_stock = inventory_math.calculate_advanced_safety_stock(
-        total_workload, std_dev_demand, lead_time_months, lead_time_volatility, sim_sla / 100.0
-    )
-
-    total_required_capacity = total_workload + sim_safety_stock
-    cooperation_metrics = inventory_math.calculate_horizontal_sharing(
-        total_required_capacity, warehouse_cap, partner_cost, holding_cost
-    )
-    outsourced_vol = cooperation_metrics["overflow_vol"]
-    internal_vol = cooperation_metrics["internal_vol"]
-    dependency_pct = cooperation_metrics["dependency_ratio"]
-
-    combined_volatility_est = (lead_time_months * (std_dev_demand ** 2) + (raw_avg_demand ** 2) * (
-        lead_time_volatility ** 2)) ** 0.5
-    resilience_score = inventory_math.calculate_resilience_score(sim_safety_stock, combined_volatility_est,
-                                                                 dependency_pct)
-
-    try:
-        service_metrics = inventory_math.calculate_service_implications(total_workload, std_dev_demand, sim_sla / 100.0,
-                                                                        stockout_cost)
-    except Exception:
-        service_metrics = {"reliability_score": 100, "penalty_cost": 0}
-
-    loyalty_score = inventory_math.calculate_loyalty_index(sim_sla / 100.0, service_metrics["reliability_score"])
-    green_metrics = inventory_math.calculate_sustainability_impact(internal_vol, outsourced_vol)
-    green_metrics["total_emissions"] = round(green_metrics["total_emissions"] * co2_mult, 2)
-    green_metrics["co2_saved"] = round(green_metrics["co2_saved"] * co2_mult, 2)
-
-    metrics = {
-        "avg_demand": int(total_workload),
-        "std_dev": int(std_dev_demand),
-        "lead_time": lead_time_months,
-        "safety_stock": int(sim_safety_stock),
-        "sla": sim_sla / 100.0,
-        "product_name": selected_sku if selected_sku else "Aggregate",
-        "return_vol": int(reverse_logistics_vol),
-        "outsourced": int(outsourced_vol),
-        "resilience_score": resilience_score,
-        "dependency_ratio": dependency_pct,
-        "lead_time_risk": lead_time_volatility,
-        "unit_cost": uc,
-        "selling_price": sp,
-        "holding_cost": holding_cost,
-        "stockout_cost": stockout_cost,
-        "loyalty_score": loyalty_score,
-        "co2_emissions": green_metrics["total_emissions"],
-        "co2_saved": green_metrics["co2_saved"],
-        "transport_mode": transport_mode
+
+    total_required_capacity = lane_row["required_capacity"]
+    outsourced_vol = lane_row["outsourced_vol"]
+    internal_vol = lane_row["internal_vol"]
+    dependency_pct = lane_row["dependency_ratio"]
+    resilience_score = lane_row["resilience_score"]
+
+    service_metrics = {
+        "expected_shortage": lane_row["expected_shortage"],
+        "penalty_cost": lane_row["penalty_cost"],
+        "reliability_score": lane_row["reliability_score"]
+    }
+    loyalty_score = lane_row["loyalty_score"]
+    green_metrics = {
+        "total_emissions": lane_row["co2_emissions"],
+        "co2_saved": lane_row["co2_saved"],
+        "is_green_optimized": lane_row["is_green_optimized"]
     }
-    metrics.update(service_metrics)
+
+    metrics = metrics_engine.to_metrics_dict(lane_row, scenario_inputs)
 
     if source_option == "Live WMS Database" and not selected_sku:
         st.warning("Please select a Service Lane.")
@@ -228,7 +257,7 @@ if df is not None and not df.empty:
                 else:
                     st.info("📍 Geospatial mapping is currently optimizing for this specific product lane.")
 
-            f_df = forecast.generate_forecast(df) if st.checkbox("Show Demand Forecast", value=True) else None
+            f_df = forecast_service.get_forecast(df) if st.checkbox("Show Demand Forecast", value=True) else None
 
             fig = go.Figure()
             fig.add_trace(go.Scatter(x=df['date'], y=df['demand'], mode='lines+markers', name='Outbound Flow',
@@ -237,13 +266,8 @@ if df is not None and not df.empty:
 
             if f_df is not None:
                 if 'demand_upper' in f_df.columns:
-                    fig.add_trace(go.Scatter(x=f_df['date'], y=f_df['demand_upper'], mode='lines', line=dict(width=0),
-                                             showlegend=False))
-                    fig.add_trace(go.Scatter(
-                        name='95% Confidence Interval', x=f_df['date'], y=f_df['demand_lower'],
-                        mode='lines', line=dict(width=0), fill='tonexty', fillcolor='rgba(0, 0, 255, 0.1)',
-                        showlegend=True
-                    ))
+                    fig.add_trace(chart_helpers.band_trace(f_df['date'], f_df['demand_lower'], f_df['demand_upper'],
+                                                           name='95% Confidence Interval'))
                 last_pt = pd.DataFrame({'date': [df['date'].max()], 'demand': [df.iloc[-1]['demand']]})
                 combined_f = pd.concat([last_pt, f_df])
                 fig.add_trace(
@@ -263,6 +287,25 @@ if df is not None and not df.empty:
                 c3.metric("Capacity", "Optimal", "Internal")
             c4.metric("Safety Stock", f"{metrics['safety_stock']}", "Pallets")
 
+            with st.expander("Forward Capacity Plan (Forecast-Driven)", expanded=False):
+                plan = capacity_trajectory.capacity_trajectories(
+                    df[['date', 'demand']].assign(product_name=metrics['product_name']), scenario_inputs, horizon=6
+                )
+                fig_plan = go.Figure()
+                fig_plan.add_trace(go.Bar(x=plan['date'], y=plan['safety_stock'], name='Safety Stock',
+                                          marker_color='#ff7f0e'))
+                fig_plan.add_trace(go.Scatter(x=plan['date'], y=plan['required_capacity'], mode='lines+markers',
+                                              name='Required Capacity', line=dict(color='#1f77b4', width=3)))
+                fig_plan.add_hline(y=total_required_capacity, line_dash="dash", line_color="gray",
+                                   annotation_text="Static (Whole-History σ)")
+                fig_plan.add_hline(y=warehouse_cap, line_dash="dot", line_color="red", annotation_text="Limit")
+                fig_plan.update_layout(height=350, margin=dict(t=30, b=10), yaxis_title="Units / Day")
+                st.plotly_chart(fig_plan, use_container_width=True)
+                st.dataframe(
+                    plan[['date', 'demand', 'std', 'safety_stock', 'required_capacity', 'outsourced_vol']].round(1),
+                    use_container_width=True, hide_index=True
+                )
+
             st.divider()
             k1, k2, k3, k4 = st.columns(4)
             k1.metric("Sustainability", "Standard", f"{green_metrics['total_emissions']} kg CO₂")
@@ -334,6 +377,62 @@ if df is not None and not df.empty:
                 m3.metric("VaR (95%)", f"${sim_metrics['var_95']}", "Worst Case")
                 st.plotly_chart(sim_fig, use_container_width=True)
 
+                with st.expander("Adaptive Precision (Variance-Reduced Monte Carlo)", expanded=False):
+                    p1, p2, p3 = st.columns(3)
+                    with p1:
+                        precision_target = st.selectbox("Precision Target", ["Expected Profit", "VaR (95%)"])
+                    with p2:
+                        precision_tol = st.number_input("CI Half-Width ($)", min_value=1.0, value=100.0, step=10.0)
+                    with p3:
+                        precision_method = st.selectbox("Sampling", ["control", "sobol", "lhs", "antithetic", "plain"])
+                    if st.button("Run Adaptive Simulation"):
+                        risk_params = (total_workload, std_dev_demand, total_required_capacity, uc, sp,
+                                       holding_cost, stockout_cost)
+                        with st.spinner("Sampling until the target precision is reached..."):
+                            adaptive = variance_reduction.adaptive_profit_risk(
+                                *risk_params,
+                                target="mean" if precision_target == "Expected Profit" else "var",
+                                tolerance=precision_tol,
+                                method=precision_method
+                            )
+                            deep_tail = variance_reduction.importance_sampled_var(*risk_params)
+                        estimate = adaptive.get("avg_profit", adaptive.get("var_95"))
+                        a1, a2, a3, a4 = st.columns(4)
+                        a1.metric(precision_target, f"${estimate:,.0f}",
+                                  f"± ${adaptive['ci_half_width']:,.0f} (95% CI)")
+                        a2.metric("Paths Used", f"{adaptive['num_simulations']:,}", f"{adaptive['batches']} Batches")
+                        a3.metric("Converged", "Yes" if adaptive["converged"] else "No", adaptive["method"])
+                        a4.metric("Deep-Tail VaR (99.9%)", f"${deep_tail['var']:,.0f}",
+                                  f"CVaR ${deep_tail['cvar']:,.0f}", delta_color="off")
+
+                with st.expander("Instant What-If (Precomputed Surfaces)", expanded=False):
+                    what_if_options = {
+                        "SLA Penalty ($)": ("stockout_cost", np.linspace(0.0, 5000.0, 51)),
+                        "Warehousing Cost ($)": ("holding_cost", np.linspace(0.0, 100.0, 51)),
+                        "Target Service Level": ("sla", np.linspace(0.50, 0.99, 50)),
+                        "Supply Variance (σ)": ("lead_time_volatility", np.linspace(0.0, 2.0, 21)),
+                        "Return Rate %": ("return_rate", np.arange(0, 31))
+                    }
+                    what_if_label = st.selectbox("Sweep", list(what_if_options))
+                    what_if_param, what_if_values = what_if_options[what_if_label]
+                    if st.button("Run What-If Sweep"):
+                        sweep = surrogate.what_if(raw_avg_demand, std_dev_demand, scenario_inputs, what_if_param,
+                                                  what_if_values)
+                        what_if_fig = go.Figure()
+                        what_if_fig.add_trace(go.Scatter(
+                            x=sweep[what_if_param], y=sweep["avg_profit"], name="Expected Profit",
+                            line=dict(color="#002D62", width=3)
+                        ))
+                        what_if_fig.add_trace(go.Scatter(x=sweep[what_if_param], y=sweep["var_95"], name="VaR (95%)",
+                                                         line=dict(color="red", dash="dash")))
+                        what_if_fig.add_vline(x=scenario_inputs[what_if_param], line_dash="dot", line_color="gray")
+                        what_if_fig.update_layout(title=f"Profit Risk vs {what_if_label}",
+                                                  xaxis_title=what_if_label, yaxis_title="Daily Profit ($)",
+                                                  height=380, margin={"r": 0, "t": 40, "l": 0, "b": 0})
+                        st.plotly_chart(what_if_fig, use_container_width=True)
+                        st.caption("Answered from precomputed response surfaces; matches the exact risk engine "
+                                   "(run `python surrogate.py` for the error report).")
+
                 ui_views.render_chat_ui(df.tail(30), metrics, ai_brain,
                                         extra_context=f"Fin Context: Avg Profit ${sim_metrics['avg_profit']}",
                                         key="fin_chat")
@@ -354,40 +453,71 @@ if df is not None and not df.empty:
 
             if st.button("Run Risk/Reward Analysis", type="primary"):
                 with st.spinner(f"Simulating {sim_days} operational days..."):
-                    critical_ratio = margin / (margin + holding_cost)
-                    z_score = norm.ppf(critical_ratio)
-                    opt_ss = max(0, z_score * std_dev_demand)
-
-                    np.random.seed(42)
-                    demands = np.random.normal(total_workload, std_dev_demand, sim_days)
-
-                    cap_a = total_workload + current_ss
-                    cap_b = total_workload + opt_ss
-
-                    sales_a = np.minimum(demands, cap_a)
-                    loss_a = np.maximum(0, cap_a - demands) * holding_cost
-                    profit_a = (sales_a * margin) - loss_a
-
-                    sales_b = np.minimum(demands, cap_b)
-                    loss_b = np.maximum(0, cap_b - demands) * holding_cost
-                    profit_b = (sales_b * margin) - loss_b
+                    opt_ss = strategy_lab.optimal_safety_stock(std_dev_demand, margin, holding_cost)
+                    sweep = strategy_lab.run_strategy_sweep(
+                        total_workload, std_dev_demand, strategy_lab.candidate_grid(current_ss, opt_ss), margin, holding_cost,
+                        num_days=sim_days, histogram_safety_stocks=(current_ss, opt_ss)
+                    )
 
+                    # Only the candidate table and binned histograms are kept in session state, never raw paths
                     st.session_state.sim_results = {
-                        "profit_a": profit_a, "profit_b": profit_b,
+                        "candidates": sweep["candidates"], "hist_counts": sweep["hist_counts"],
+                        "hist_edges": sweep["hist_edges"],
                         "optimal_ss": opt_ss, "current_ss": current_ss, "margin": margin
                     }
 
             if st.session_state.get("sim_results"):
                 res = st.session_state.sim_results
-                p_a, p_b = np.array(res["profit_a"]), np.array(res["profit_b"])
+                table = res["candidates"].set_index("safety_stock")
                 opt_ss, curr_ss = res["optimal_ss"], res["current_ss"]
+                cur, opt = table.loc[float(curr_ss)], table.loc[float(opt_ss)]
 
-                avg_a, avg_b = np.mean(p_a), np.mean(p_b)
-                delta = avg_b - avg_a
-                loss_prob_b = np.mean(p_b < 0) * 100
-                var_95_b = np.percentile(p_b, 5)
+                avg_b = opt["avg_profit"]
+                delta = avg_b - cur["avg_profit"]
 
-                ui_views.render_research_lab_ui(opt_ss, curr_ss, avg_b, delta, loss_prob_b, var_95_b, p_a, p_b)
+                ui_views.render_research_lab_ui(
+                    opt_ss, curr_ss, avg_b, delta, opt["loss_prob"], opt["var_95"],
+                    (res["hist_counts"][0], res["hist_edges"]), (res["hist_counts"][1], res["hist_edges"])
+                )
+                st.plotly_chart(
+                    strategy_lab.plot_efficient_frontier(res["candidates"], highlight=(curr_ss, opt_ss)),
+                    use_container_width=True
+                )
+
+            st.divider()
+            st.markdown("#### Multi-Period Inventory Dynamics")
+            st.caption("Day-by-day order-up-to simulation with stochastic lead times, backorders and returns.")
+            dyn1, dyn2 = st.columns(2)
+            with dyn1:
+                dyn_days = st.slider("Operating Horizon (Days)", 30, 730, 365, 5)
+            with dyn2:
+                dyn_paths = st.select_slider("Simulated Paths", options=[1000, 2000, 5000, 10000, 20000], value=10000)
+
+            if st.button("Run Inventory Dynamics"):
+                with st.spinner(f"Simulating {dyn_paths:,} paths x {dyn_days} days..."):
+                    dyn = inventory_dynamics.simulate_inventory_dynamics(
+                        raw_avg_demand, std_dev_demand, metrics['safety_stock'],
+                        lead_time_days=lead_time_months * inventory_dynamics.DAYS_PER_MONTH,
+                        lead_time_volatility_days=lead_time_volatility * inventory_dynamics.DAYS_PER_MONTH,
+                        return_rate=return_rate / 100.0,
+                        holding_cost=holding_cost / inventory_dynamics.DAYS_PER_MONTH,
+                        backorder_cost=stockout_cost / inventory_dynamics.DAYS_PER_MONTH,
+                        days=dyn_days, num_paths=dyn_paths
+                    )
+                    st.session_state.dynamics_results = {
+                        k: v for k, v in dyn.items() if not isinstance(v, np.ndarray)
+                    }
+
+            if st.session_state.get("dynamics_results"):
+                dyn = st.session_state.dynamics_results
+                d1, d2, d3, d4 = st.columns(4)
+                d1.metric("Realized Fill Rate", f"{dyn['fill_rate']:.1%}", f"P5: {dyn['fill_rate_p5']:.1%}")
+                d2.metric("Stockout Days", f"{dyn['stockout_days']:.1f}", f"P95: {dyn['stockout_days_p95']:.0f}",
+                          delta_color="off")
+                d3.metric("Holding Cost", f"${dyn['holding_cost']:,.0f}", f"Avg On-Hand {dyn['avg_on_hand']:,.0f}",
+                          delta_color="off")
+                d4.metric("Backorder Cost", f"${dyn['backorder_cost']:,.0f}", f"S = {dyn['order_up_to']:,.0f}",
+                          delta_color="off")
 
             sim_ctx = ""
             if st.session_state.get("sim_results"):
@@ -497,7 +627,7 @@ if df is not None and not df.empty:
 
             st.divider()
             st.subheader("FinTech Climate Risk Engine")
-            st.markdown("Simulate regulatory transition risk using Geometric Brownian Motion (GBM).")
+            st.markdown("Simulate regulatory transition risk with GBM, mean-reverting, jump or regime-switching price models.")
 
             with st.expander("Configure Financial Markets", expanded=False):
                 fin1, fin2, fin3 = st.columns(3)
@@ -509,12 +639,32 @@ if df is not None and not df.empty:
                     total_emissions = green_metrics.get("total_emissions", 50000)
                     st.metric("Total Supply Chain Emissions", f"{int(total_emissions):,} kg")
 
+                ets_model = st.selectbox("Price Model", list(carbon_models.MODEL_LABELS),
+                                         format_func=carbon_models.MODEL_LABELS.get)
+                ets_params = {}
+                mp1, mp2, mp3 = st.columns(3)
+                if ets_model == "mean_reverting":
+                    ets_params["kappa"] = mp1.slider("Reversion Speed (κ)", 0.1, 5.0, 1.5, 0.1)
+                    ets_params["long_run_price"] = mp2.number_input("Long-Run Price ($)", value=float(current_ets))
+                elif ets_model == "merton":
+                    ets_params["jump_intensity"] = mp1.slider("Regulatory Jumps / Year", 0.0, 10.0, 2.0, 0.5)
+                    ets_params["jump_mean"] = mp2.slider("Mean Jump (log)", -0.30, 0.30, 0.0, 0.01)
+                    ets_params["jump_std"] = mp3.slider("Jump Volatility", 0.01, 0.50, 0.15, 0.01)
+                elif ets_model == "regime_switching":
+                    stress_vol = mp1.slider("Stress Volatility (σ)", 0.10, 1.50, 0.70, 0.05)
+                    stress_drift = mp2.slider("Stress Drift", -0.50, 0.50, -0.10, 0.01)
+                    stress_rate = mp3.slider("Stress Episodes / Year", 0.1, 5.0, 1.0, 0.1)
+                    ets_params.update({"volatilities": (ets_volatility, stress_vol), "drifts": (0.05, stress_drift),
+                                       "switch_rates": (stress_rate, 4.0)})
+
             if st.button("Run Stochastic Carbon Simulation"):
-                with st.spinner("Generating 2,000 market paths via Geometric Brownian Motion..."):
+                with st.spinner(f"Generating 2,000 market paths ({carbon_models.MODEL_LABELS[ets_model]})..."):
                     emissions_tonnes = total_emissions / 1000.0
                     cf_fig, cf_metrics = climate_finance.plot_carbon_risk_simulation(current_price=current_ets,
                                                                                      volatility=ets_volatility,
-                                                                                     total_emissions_tons=emissions_tonnes)
+                                                                                     total_emissions_tons=emissions_tonnes,
+                                                                                     model=ets_model,
+                                                                                     model_params=ets_params)
                     st.plotly_chart(cf_fig, use_container_width=True)
 
                     cf1, cf2, cf3 = st.columns(3)
@@ -526,6 +676,60 @@ if df is not None and not df.empty:
                                f"{cf_metrics['worst_case_exposure'] - cf_metrics['current_exposure']:,.0f} Max Downside",
                                delta_color="inverse")
 
+            if source_option == "Live WMS Database" and st.button("Run Network Carbon Exposure (Demand × Price)"):
+                with st.spinner("Simulating 100,000 joint lane-volume and carbon-price paths..."):
+                    exposure = carbon_exposure.simulate_carbon_exposure(
+                        db_manager.load_data(None), scenario_inputs, current_price=current_ets,
+                        volatility=ets_volatility, model=ets_model, model_params=ets_params
+                    )
+                ce1, ce2, ce3 = st.columns(3)
+                ce1.metric("Expected Network Liability (1Y)", f"${exposure['expected_liability']:,.0f}",
+                           f"{exposure['expected_emissions_tonnes']:,.0f} t CO₂", delta_color="off")
+                ce2.metric("Liability VaR (95%)", f"${exposure['var']:,.0f}",
+                           f"σ ${exposure['std_liability']:,.0f}", delta_color="off")
+                ce3.metric("Liability CVaR (95%)", f"${exposure['cvar']:,.0f}",
+                           f"Diversification ${exposure['diversification_benefit']:,.0f}", delta_color="off")
+                st.dataframe(exposure["contributions"].round(2), use_container_width=True, hide_index=True)
+
+            with st.expander("Carbon Hedge Optimizer (CVaR)", expanded=False):
+                hg1, hg2 = st.columns(2)
+                hedge_budget = hg1.number_input("Upfront Hedge Budget ($)", min_value=0.0,
+                                                value=float(round(current_ets * total_emissions / 2000.0)))
+                carry_rate = hg2.slider("Forward Carry Rate", 0.0, 0.10, 0.03, 0.005)
+                if st.button("Optimize Carbon Hedge"):
+                    with st.spinner("Optimizing forwards and quarterly purchases over 20,000 cached paths..."):
+                        hedge = carbon_hedge.hedge_analysis(
+                            total_emissions / 1000.0, current_price=current_ets, volatility=ets_volatility,
+                            model=ets_model, model_params=ets_params, budget=hedge_budget, carry_rate=carry_rate
+                        )
+                    ratio, schedule = hedge["ratio"], hedge["schedule"]
+                    hm1, hm2, hm3 = st.columns(3)
+                    hm1.metric("Optimal Forward Hedge", f"{ratio['hedge_ratio']:.0%}",
+                               f"{ratio['hedged_tonnes']:,.1f} t @ ${hedge['forward_price']:,.2f}", delta_color="off")
+                    hm2.metric("Cost CVaR (95%)", f"${ratio['cvar_95']:,.0f}",
+                               f"-${ratio['cvar_reduction']:,.0f} vs unhedged", delta_color="off")
+                    hm3.metric("Schedule CVaR (95%)", f"${schedule['cvar_95']:,.0f}",
+                               f"E[cost] ${schedule['expected_cost']:,.0f}", delta_color="off")
+
+                    frontier = ratio["frontier"]
+                    hedge_fig = go.Figure(go.Scatter(
+                        x=frontier["cvar_95"], y=frontier["expected_cost"], mode="lines+markers",
+                        marker=dict(size=4), customdata=frontier["hedge_ratio"],
+                        hovertemplate="Hedge %{customdata:.0%}<br>CVaR $%{x:,.0f}<br>E[cost] $%{y:,.0f}<extra></extra>"
+                    ))
+                    hedge_fig.add_trace(go.Scatter(x=[ratio["cvar_95"]], y=[ratio["expected_cost"]], mode="markers",
+                                                   marker=dict(size=12, color="#e74c3c"), name="Optimal"))
+                    hedge_fig.update_layout(title="Hedge Frontier (within budget)", xaxis_title="Cost CVaR 95% ($)",
+                                            yaxis_title="Expected Cost ($)", showlegend=False)
+                    st.plotly_chart(hedge_fig, use_container_width=True)
+                    st.dataframe(pd.DataFrame({
+                        "Purchase": ["Forward (today)"] + [f"Spot (day {d})" for d in schedule["dates"]] + ["Spot (horizon)"],
+                        "Share": np.append(schedule["tonnes"] / max(total_emissions / 1000.0, 1e-12),
+                                           schedule["terminal_weight"]).round(3),
+                        "Tonnes": np.append(schedule["tonnes"],
+                                            schedule["terminal_weight"] * total_emissions / 1000.0).round(2)
+                    }), use_container_width=True, hide_index=True)
+
             ui_views.render_tactical_execution_ui(key_prefix="tab4_exec")
 
             fta_context = f"Sourcing: {winner} is optimal by ${abs(delta):.2f}. CBAM penalty for offshore: ${cbam_cost:.2f}."
@@ -0,0 +1,35 @@
+"""
+Measures parallel Monte Carlo throughput (paths/s) across worker counts.
+
+Usage (from the repository root):
+    PYTHONPATH=. python benchmarks/bench_parallel_mc.py --paths 100000000 --workers 1 2 4 8
+"""
+import argparse
+import os
+import time
+
+import parallel_mc
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--paths", type=int, default=20_000_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, os.cpu_count() or 1])
+    args = parser.parse_args()
+
+    baseline = None
+    print(f"paths={args.paths:,} cores={os.cpu_count()}")
+    for workers in args.workers:
+        start = time.perf_counter()
+        stats = parallel_mc.run_parallel_profit_risk(
+            15000.0, 3500.0, 18000.0, 50.0, 85.0, 18.5, 150.0,
+            num_simulations=args.paths, seed=42, workers=workers
+        )
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print(f"workers={workers:<3} {elapsed:8.2f} s  {args.paths / elapsed / 1e6:8.1f} M paths/s  "
+              f"speedup={baseline / elapsed:5.2f}x  var_95={stats['var_95']:,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Benchmarks the simulation kernels against the original full-temporary NumPy expressions.
+
+Usage (from the repository root):
+    PYTHONPATH=. python benchmarks/bench_sim_kernels.py --paths 10000000
+"""
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+
+import sim_kernels
+
+AVG, STD, CAPACITY = 15000.0, 3500.0, 18000.0
+PRICE, COST, HOLDING, STOCKOUT = 85.0, 50.0, 18.5, 2000.0
+
+
+def _baseline_profits(raw_demands: np.ndarray) -> np.ndarray:
+    demands = np.maximum(0, np.round(raw_demands)).astype(int)
+    sold_units = np.minimum(demands, CAPACITY)
+    lost_sales = np.maximum(0, demands - CAPACITY)
+    unsold_inventory = np.maximum(0, CAPACITY - demands)
+    return (sold_units * PRICE - sold_units * COST
+            - unsold_inventory * HOLDING - lost_sales * STOCKOUT)
+
+
+def _measure(label: str, fn, *args) -> None:
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn(*args)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    mean = float(np.mean(result)) if isinstance(result, np.ndarray) else float(result[0]) / args[1]
+    print(f"{label:<34} {elapsed * 1000:>10.1f} ms {peak / 2 ** 20:>10.1f} MiB   mean={mean:,.2f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--paths", type=int, default=10_000_000)
+    args = parser.parse_args()
+    n = args.paths
+
+    # JIT warm-up so compilation is excluded from the timings
+    sim_kernels.newsvendor_profits(np.ones(8), CAPACITY, PRICE, COST, HOLDING, STOCKOUT)
+    sim_kernels.newsvendor_profit_moments(np.random.default_rng(0), 8, AVG, STD, CAPACITY, PRICE, COST,
+                                          HOLDING, STOCKOUT)
+
+    raw = np.random.default_rng(42).normal(AVG, STD, n)
+    print(f"backend={sim_kernels.backend()} paths={n:,}  (peak excludes the {raw.nbytes / 2 ** 20:.0f} MiB input)")
+    print(f"{'variant':<34} {'time':>13} {'peak':>14}")
+    _measure("numpy full temporaries", _baseline_profits, raw)
+    _measure("fused kernel (new output)", sim_kernels.newsvendor_profits, raw, CAPACITY, PRICE, COST, HOLDING,
+             STOCKOUT)
+    _measure("fused kernel (in-place)", lambda d: sim_kernels.newsvendor_profits(
+        d, CAPACITY, PRICE, COST, HOLDING, STOCKOUT, out=d), raw.copy())
+    _measure("fused sample + accumulate", sim_kernels.newsvendor_profit_moments, np.random.default_rng(42), n,
+             AVG, STD, CAPACITY, PRICE, COST, HOLDING, STOCKOUT)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Forward-looking safety stock and required-capacity trajectories over the forecast horizon.
+
+The dashboard's static safety stock uses one standard deviation over the whole history, so it
+treats trend and seasonality as noise and ignores how uncertainty grows with the horizon. Here
+each lane's forecast mean and standard deviation per period (forecast_engine: the model's h-step
+error plus the within-period spread of daily demand) go through the same metric formulas as
+metrics_engine. This gives a per-period safety stock, required capacity and outsourcing need.
+The whole (lanes x horizon) grid is evaluated in one vectorized call.
+
+Lanes too short to forecast keep their flat whole-history mean and standard deviation.
+"""
+from typing import Any, Dict
+
+import numpy as np
+import pandas as pd
+
+import forecast_engine
+import metrics_engine
+
+TRAJECTORY_METRICS = (
+    "total_workload", "safety_stock", "required_capacity", "internal_vol", "outsourced_vol",
+    "resilience_score", "reliability_score"
+)
+
+
+def trajectory_arrays(mean: np.ndarray, std: np.ndarray, inputs: Dict[str, Any]) -> Dict[str, np.ndarray]:
+    """Evaluates the capacity metrics on (lanes x horizon) forecast means and standard deviations."""
+    mean = np.maximum(0.0, np.asarray(mean, dtype=np.float64))
+    std = np.asarray(std, dtype=np.float64)
+    columns = metrics_engine.calculate_lane_metrics_vectorized(mean.ravel(), std.ravel(), inputs)
+    return {name: columns[name].reshape(mean.shape) for name in TRAJECTORY_METRICS}
+
+
+def capacity_trajectories(
+    df: pd.DataFrame,
+    inputs: Dict[str, Any],
+    horizon: int = 3,
+    grain: str = "M",
+    model: str = "auto",
+    lane_column: str = "product_name"
+) -> pd.DataFrame:
+    """
+    Returns one row per lane and future period: the forecast demand and std (daily scale), the
+    TRAJECTORY_METRICS at that period, and `source` ("forecast" or "history" for short lanes).
+    """
+    if df is None or df.empty:
+        return pd.DataFrame()
+    data = df if lane_column in df.columns else df.assign(**{lane_column: "Aggregate"})
+    fc = forecast_engine.forecast_lanes(data, horizon, grain, model, lane_column)
+    fc = fc[["lane", "date", "demand", "std"]].assign(source="forecast")
+
+    short = sorted(set(data[lane_column].unique()) - set(fc["lane"]))
+    if short:
+        history = data.loc[data[lane_column].isin(short)]
+        stats = history.groupby(lane_column)["demand"].agg(["mean", "std"]).fillna(0.0)
+        last = pd.to_datetime(history["date"]).groupby(history[lane_column]).max().dt.to_period(grain)
+        steps = np.arange(1, horizon + 1)
+        fc = pd.concat([fc, pd.DataFrame({
+            "lane": np.repeat(stats.index.to_numpy(), horizon),
+            "date": [(last[lane] + int(h)).start_time for lane in stats.index for h in steps],
+            "demand": np.repeat(stats["mean"].to_numpy(), horizon),
+            "std": np.repeat(stats["std"].to_numpy(), horizon),
+            "source": "history"
+        })], ignore_index=True)
+
+    columns = trajectory_arrays(fc["demand"].to_numpy(), fc["std"].to_numpy(), inputs)
+    fc = fc.assign(step=fc.groupby("lane").cumcount() + 1, **columns)
+    return fc.sort_values(["lane", "step"], kind="stable").reset_index(drop=True)
+
+
+def peak_requirements(trajectories: pd.DataFrame) -> pd.DataFrame:
+    """Per lane: the horizon's peak required capacity and safety stock, and the period it peaks in."""
+    peak = trajectories.loc[trajectories.groupby("lane")["required_capacity"].idxmax()]
+    return peak[["lane", "date", "required_capacity", "safety_stock", "outsourced_vol"]].rename(
+        columns={"date": "peak_date", "required_capacity": "peak_required_capacity",
+                 "safety_stock": "peak_safety_stock", "outsourced_vol": "peak_outsourced_vol"}
+    ).reset_index(drop=True)
@@ -0,0 +1,192 @@
+"""
+Joint lane-demand x carbon-price liability simulation for the whole network.
+
+A lane's daily emissions are its stochastic daily workload times its emission factor. The factor
+is kg CO2 per unit of workload: metrics_engine's internal/outsourced mix times the lane's
+transport-mode multiplier. So at mean volume, emissions equal the metrics engine's co2_emissions.
+Carbon is paid at the day's simulated ETS price, so a path's lane liability over the horizon is
+
+    L_l = f_l / 1000 * sum_t V_lt P_t.
+
+Daily lane volumes are correlated across lanes (the shrunk history correlation from network_risk)
+and independent over days and of the price. Given a price path, L is therefore exactly
+multivariate normal with mean f_l mu_l A and covariance f_l f_m Sigma_lm B, where A = sum_t P_t and
+B = sum_t P_t^2. Each path needs only these two running sums of its price path. Prices stream
+through the carbon_models core in time blocks, and lane liabilities are then drawn as one
+(paths x lanes) block. Memory is bounded by the chunk size and the retained tail, never by the
+number of days.
+
+Chunks use SeedSequence-spawned streams (bit-identical for any worker count). Only the running
+highest-k network liabilities (k = ceil(alpha * paths)) are kept with their lane split. CVaR
+contributions are Euler allocations E[L_l | network liability in the tail] and sum to the
+network CVaR.
+"""
+import math
+import os
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+import carbon_models
+import metrics_engine
+import network_risk
+import parallel_mc
+import result_cache
+
+DEFAULT_PATH_CHUNK = 8192
+# kg CO2 multipliers per transport mode, matching the dashboard's mode selector
+TRANSPORT_CO2_MULT = {"Road": 1.0, "Rail": 0.3, "Air": 5.0}
+
+
+def mode_multiplier(mode: str) -> float:
+    """CO2 multiplier for a transport mode label such as "Rail (Green/Slow)"."""
+    for name, mult in TRANSPORT_CO2_MULT.items():
+        if name in mode:
+            return mult
+    raise ValueError(f"Unknown transport mode '{mode}'.")
+
+
+def lane_emission_profile(
+    data: pd.DataFrame,
+    inputs: Dict[str, Any],
+    lane_modes: Optional[Dict[str, str]] = None,
+    lane_column: str = "product_name"
+) -> pd.DataFrame:
+    """Per lane: daily workload mean/std, transport mode and emission factor (kg CO2 per unit of workload)."""
+    portfolio = metrics_engine.compute_portfolio_metrics(data, inputs, lane_column)
+    workload = portfolio["total_workload"].to_numpy(dtype=np.float64)
+    emitted = (portfolio["internal_vol"].to_numpy() * metrics_engine.CO2_PER_UNIT_INTERNAL
+               + portfolio["outsourced_vol"].to_numpy() * metrics_engine.CO2_PER_UNIT_SHARED)
+    modes = [(lane_modes or {}).get(lane, inputs["transport_mode"]) for lane in portfolio["lane"]]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        base_factor = np.where(workload > 0.0, emitted / workload, 0.0)
+    return pd.DataFrame({
+        "lane": portfolio["lane"],
+        "transport_mode": modes,
+        "daily_volume": workload,
+        "volume_std": portfolio["std_dev_demand"].fillna(0.0).to_numpy(dtype=np.float64)
+        * (1.0 + float(inputs["return_rate"]) / 100.0),
+        "emission_factor_kg": base_factor * np.array([mode_multiplier(m) for m in modes])
+    })
+
+
+def _top_rows(values: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k largest entries of a 1-D array (unordered)."""
+    if values.shape[0] <= k:
+        return np.arange(values.shape[0])
+    return np.argpartition(values, values.shape[0] - k)[-k:]
+
+
+def _exposure_chunk(task: tuple) -> Dict[str, np.ndarray]:
+    """Streams one chunk of price paths, draws its lane liabilities and returns sums and the chunk's tail."""
+    seed_seq, n, model, current_price, days, dt, mean_tonnes, scaled_cholesky, k = task
+    rng = np.random.Generator(np.random.PCG64(seed_seq))
+
+    # Running sums A = sum_t P_t and B = sum_t P_t^2 of each price path, streamed in blocks
+    log_price = np.full(n, np.log(current_price))
+    price_sum = np.full(n, current_price)
+    price_sq_sum = np.full(n, current_price ** 2)
+    state = model.init_state(float(log_price[0]), n)
+    for start in range(1, days, carbon_models.BLOCK_DAYS):
+        steps = min(days, start + carbon_models.BLOCK_DAYS) - start
+        block, state = model.block(log_price, state, rng, steps, dt, np.float64)
+        log_price = block[-1].copy()
+        prices = np.exp(block)
+        price_sum += prices.sum(axis=0)
+        price_sq_sum += np.square(prices).sum(axis=0)
+
+    liabilities = rng.standard_normal((n, mean_tonnes.shape[0])) @ scaled_cholesky.T
+    liabilities *= np.sqrt(price_sq_sum)[:, None]
+    liabilities += price_sum[:, None] * mean_tonnes
+    network = liabilities.sum(axis=1)
+
+    idx = _top_rows(network, k)
+    standalone = liabilities if n <= k else -np.partition(-liabilities, k - 1, axis=0)[:k]
+    return {
+        "lane_sums": liabilities.sum(axis=0),
+        "network_sum": float(network.sum()),
+        "network_sq_sum": float(np.square(network).sum()),
+        "tail_network": network[idx],
+        "tail_lanes": liabilities[idx],
+        "standalone_tail": standalone
+    }
+
+
+@result_cache.disk_cache(ignore=("workers",), depends=("carbon_models", "metrics_engine", "network_risk"))
+def simulate_carbon_exposure(
+    data: pd.DataFrame,
+    inputs: Dict[str, Any],
+    current_price: float = 85.0,
+    volatility: float = 0.40,
+    drift: float = 0.05,
+    model: str = "gbm",
+    model_params: Optional[Dict[str, Any]] = None,
+    days: int = 365,
+    horizon_years: float = 1.0,
+    lane_modes: Optional[Dict[str, str]] = None,
+    num_paths: int = 100000,
+    alpha: float = 0.05,
+    seed: Optional[int] = 42,
+    chunk_size: int = DEFAULT_PATH_CHUNK,
+    workers: Optional[int] = 1,
+    lane_column: str = "product_name"
+) -> Dict[str, Any]:
+    """
+    Simulates the network's carbon liability ($) over `days` days of emissions paid at simulated
+    ETS prices. Returns the expected liability, its std, the VaR/CVaR at the (1 - alpha) upper tail,
+    and a per-lane attribution table.
+    """
+    profile = lane_emission_profile(data, inputs, lane_modes, lane_column)
+    estimate = network_risk.estimate_lane_covariance(data, lane_column)
+    order = pd.Index(estimate["lanes"]).get_indexer(profile["lane"].astype(str))
+    correlation = estimate["correlation"][np.ix_(order, order)]
+
+    tonnes_per_unit = profile["emission_factor_kg"].to_numpy() / 1000.0
+    mean_tonnes = tonnes_per_unit * profile["daily_volume"].to_numpy()
+    scaled_cholesky = np.linalg.cholesky(correlation) * (tonnes_per_unit * profile["volume_std"].to_numpy())[:, None]
+    price_model = carbon_models.build_model(model, drift=drift, volatility=volatility, **(model_params or {}))
+    dt = horizon_years / max(days - 1, 1)
+
+    k = max(1, math.ceil(alpha * num_paths))
+    tasks = [
+        (seq, n, price_model, current_price, days, dt, mean_tonnes, scaled_cholesky, k)
+        for seq, n in parallel_mc.spawn_chunks(seed, num_paths, chunk_size)
+    ]
+    p = mean_tonnes.shape[0]
+    lane_sums, network_sum, network_sq_sum = np.zeros(p), 0.0, 0.0
+    tail_network, tail_lanes, standalone_tail = np.empty(0), np.empty((0, p)), np.empty((0, p))
+    group = carbon_models.MERGE_GROUP * (workers or os.cpu_count() or 1)
+    for i in range(0, len(tasks), group):
+        for part in parallel_mc.map_chunks(_exposure_chunk, tasks[i:i + group], workers):
+            lane_sums += part["lane_sums"]
+            network_sum += part["network_sum"]
+            network_sq_sum += part["network_sq_sum"]
+            tail_network = np.concatenate([tail_network, part["tail_network"]])
+            tail_lanes = np.vstack([tail_lanes, part["tail_lanes"]])
+            keep = _top_rows(tail_network, k)
+            tail_network, tail_lanes = tail_network[keep], tail_lanes[keep]
+            standalone_tail = np.vstack([standalone_tail, part["standalone_tail"]])
+            if standalone_tail.shape[0] > k:
+                standalone_tail = -np.partition(-standalone_tail, k - 1, axis=0)[:k]
+
+    expected = network_sum / num_paths
+    contributions = tail_lanes.mean(axis=0)
+    cvar = float(tail_network.mean())
+    table = profile.assign(
+        expected_liability=lane_sums / num_paths,
+        cvar_contribution=contributions,
+        contribution_pct=contributions / cvar * 100.0 if cvar != 0.0 else np.nan,
+        standalone_cvar=standalone_tail.mean(axis=0)
+    )
+    return {
+        "expected_liability": expected,
+        "std_liability": math.sqrt(max(0.0, network_sq_sum / num_paths - expected ** 2)),
+        "var": float(tail_network.min()),
+        "cvar": cvar,
+        "alpha": alpha,
+        "diversification_benefit": float(table["standalone_cvar"].sum()) - cvar,
+        "expected_emissions_tonnes": float(mean_tonnes.sum() * days),
+        "num_paths": num_paths,
+        "contributions": table
+    }
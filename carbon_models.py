@@ -0,0 +1,330 @@
+"""
+Stochastic carbon price models on one block-streaming Monte Carlo core.
+
+Every model evolves the log price on a uniform grid with dt = horizon_years / (days - 1). A model
+only describes how to advance a block of time steps for a set of paths; the shared core handles
+the rest:
+
+* SeedSequence-spawned chunks of paths (parallel_mc.spawn_chunks), so results are bit-identical
+  for any worker count;
+* streaming in blocks of BLOCK_DAYS steps;
+* exact per-step means and terminal prices;
+* per-step band histograms with merge-per-round memory bounds.
+
+Models:
+* gbm: geometric Brownian motion.
+* mean_reverting: Schwartz one-factor. The log price follows an Ornstein-Uhlenbeck process
+  towards log(long_run_price), stepped exactly.
+* merton: jump-diffusion with compound-Poisson normal log-jumps, drift-compensated so that
+  E[S_t] = S_0 exp(drift * t).
+* regime_switching: a two-state Markov chain switching the drift and volatility (e.g. calm
+  market vs regulatory stress).
+
+Band histograms bin each step's log price in units of the model's approximate log-price spread
+at that step (`log_moments`), clipped at +/- BAND_Z_MAX. Bands are within one bin of the exact
+percentile whenever they fall inside that range.
+"""
+import os
+from dataclasses import dataclass, fields
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from scipy.signal import lfilter
+
+import parallel_mc
+import result_cache
+
+CHUNK_SIZE = 5000
+# Time steps simulated at once per chunk (block memory: BLOCK_DAYS x CHUNK_SIZE values)
+BLOCK_DAYS = 64
+# Chunk results merged per pool round (per worker), bounding the parent's memory for any number of paths
+MERGE_GROUP = 2
+BAND_Z_MAX = 8.0
+BAND_BINS = 1024
+
+
+@dataclass(frozen=True)
+class GBM:
+    """Geometric Brownian motion: d log S = (drift - volatility^2 / 2) dt + volatility dW."""
+    drift: float = 0.05
+    volatility: float = 0.40
+
+    def init_state(self, log_price0: float, n: int):
+        return None
+
+    def block(self, log_price: np.ndarray, state, rng: np.random.Generator, steps: int, dt: float, dtype):
+        shocks = rng.standard_normal((steps, log_price.shape[0]), dtype=dtype)
+        shocks *= dtype(self.volatility * np.sqrt(dt))
+        shocks += dtype((self.drift - 0.5 * self.volatility ** 2) * dt)
+        shocks[0] += log_price
+        return np.cumsum(shocks, axis=0, out=shocks), state
+
+    def log_moments(self, log_price0: float, times: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        return log_price0 + (self.drift - 0.5 * self.volatility ** 2) * times, self.volatility * np.sqrt(times)
+
+    def terminal(self, log_price0: float, rng: np.random.Generator, n: int, horizon: float, dtype):
+        center, scale = self.log_moments(log_price0, np.array([horizon]))
+        return center[0] + scale[0] * rng.standard_normal(n, dtype=dtype)
+
+
+@dataclass(frozen=True)
+class MeanReverting:
+    """
+    Schwartz one-factor model: d log S = kappa (log(long_run_price) - log S) dt + volatility dW.
+    `long_run_price` defaults to the current price.
+    """
+    kappa: float = 1.5
+    long_run_price: Optional[float] = None
+    volatility: float = 0.40
+
+    def _anchor(self, log_price0: float) -> float:
+        return log_price0 if self.long_run_price is None else float(np.log(self.long_run_price))
+
+    def _step_std(self, dt: np.ndarray) -> np.ndarray:
+        return self.volatility * np.sqrt(-np.expm1(-2.0 * self.kappa * dt) / (2.0 * self.kappa))
+
+    def init_state(self, log_price0: float, n: int):
+        return self._anchor(log_price0)
+
+    def block(self, log_price: np.ndarray, state, rng: np.random.Generator, steps: int, dt: float, dtype):
+        # Exact AR(1) recursion of the deviation from the anchor, run along time by one linear filter
+        anchor = state
+        decay = np.exp(-self.kappa * dt)
+        shocks = rng.standard_normal((steps, log_price.shape[0]), dtype=dtype) * dtype(self._step_std(dt))
+        deviation = lfilter([1.0], [1.0, -decay], shocks, axis=0, zi=(decay * (log_price - anchor))[None, :])[0]
+        return (deviation + anchor).astype(dtype, copy=False), anchor
+
+    def log_moments(self, log_price0: float, times: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        anchor = self._anchor(log_price0)
+        return anchor + np.exp(-self.kappa * times) * (log_price0 - anchor), self._step_std(times)
+
+    def terminal(self, log_price0: float, rng: np.random.Generator, n: int, horizon: float, dtype):
+        center, scale = self.log_moments(log_price0, np.array([horizon]))
+        return center[0] + scale[0] * rng.standard_normal(n, dtype=dtype)
+
+
+@dataclass(frozen=True)
+class Merton:
+    """Merton jump-diffusion: GBM plus Poisson(jump_intensity) log-jumps ~ N(jump_mean, jump_std^2)."""
+    drift: float = 0.05
+    volatility: float = 0.30
+    jump_intensity: float = 2.0
+    jump_mean: float = 0.0
+    jump_std: float = 0.15
+
+    def _log_drift(self) -> float:
+        compensator = self.jump_intensity * np.expm1(self.jump_mean + 0.5 * self.jump_std ** 2)
+        return self.drift - 0.5 * self.volatility ** 2 - compensator
+
+    def init_state(self, log_price0: float, n: int):
+        return None
+
+    def block(self, log_price: np.ndarray, state, rng: np.random.Generator, steps: int, dt: float, dtype):
+        shape = (steps, log_price.shape[0])
+        shocks = rng.standard_normal(shape, dtype=dtype)
+        jumps = rng.poisson(self.jump_intensity * dt, shape)
+        jump_shocks = rng.standard_normal(shape, dtype=dtype)
+        increments = (dtype(self._log_drift() * dt) + dtype(self.volatility * np.sqrt(dt)) * shocks
+                      + dtype(self.jump_mean) * jumps + dtype(self.jump_std) * np.sqrt(jumps, dtype=dtype) * jump_shocks)
+        increments[0] += log_price
+        return np.cumsum(increments, axis=0, out=increments), state
+
+    def log_moments(self, log_price0: float, times: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        variance = self.volatility ** 2 + self.jump_intensity * (self.jump_mean ** 2 + self.jump_std ** 2)
+        return log_price0 + (self._log_drift() + self.jump_intensity * self.jump_mean) * times, np.sqrt(variance * times)
+
+    def terminal(self, log_price0: float, rng: np.random.Generator, n: int, horizon: float, dtype):
+        jumps = rng.poisson(self.jump_intensity * horizon, n)
+        diffusion = rng.standard_normal(n, dtype=dtype)
+        jump_shocks = rng.standard_normal(n, dtype=dtype)
+        return (log_price0 + self._log_drift() * horizon + self.volatility * np.sqrt(horizon) * diffusion
+                + self.jump_mean * jumps + self.jump_std * np.sqrt(jumps) * jump_shocks).astype(dtype)
+
+
+@dataclass(frozen=True)
+class RegimeSwitching:
+    """
+    Two-state Markov regime switching GBM. Regime i has its own drift and volatility and is left
+    at rate switch_rates[i] per year. Every path starts in `start_regime`.
+    """
+    drifts: Tuple[float, float] = (0.05, -0.10)
+    volatilities: Tuple[float, float] = (0.25, 0.70)
+    switch_rates: Tuple[float, float] = (1.0, 4.0)
+    start_regime: int = 0
+
+    def init_state(self, log_price0: float, n: int):
+        return np.full(n, self.start_regime, dtype=np.int8)
+
+    def block(self, log_price: np.ndarray, state, rng: np.random.Generator, steps: int, dt: float, dtype):
+        shape = (steps, log_price.shape[0])
+        shocks = rng.standard_normal(shape, dtype=dtype)
+        uniforms = rng.random(shape, dtype=dtype)
+        leave = (-np.expm1(-np.asarray(self.switch_rates) * dt)).astype(dtype)
+        drifts = np.asarray(self.drifts)
+        volatilities = np.asarray(self.volatilities)
+        log_drift = ((drifts - 0.5 * volatilities ** 2) * dt).astype(dtype)
+        step_std = (volatilities * np.sqrt(dt)).astype(dtype)
+        regimes = np.empty(shape, dtype=np.int8)
+        regime = state
+        for t in range(steps):
+            regime = regime ^ (uniforms[t] < leave[regime])
+            regimes[t] = regime
+        increments = log_drift[regimes] + step_std[regimes] * shocks
+        increments[0] += log_price
+        return np.cumsum(increments, axis=0, out=increments), regime
+
+    def log_moments(self, log_price0: float, times: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        drifts = np.asarray(self.drifts) - 0.5 * np.asarray(self.volatilities) ** 2
+        return log_price0 + drifts.mean() * times, max(self.volatilities) * np.sqrt(times) + np.ptp(drifts) * times
+
+
+MODELS = {"gbm": GBM, "mean_reverting": MeanReverting, "merton": Merton, "regime_switching": RegimeSwitching}
+MODEL_LABELS = {
+    "gbm": "Geometric Brownian Motion",
+    "mean_reverting": "Mean Reversion (Schwartz / OU)",
+    "merton": "Merton Jump-Diffusion",
+    "regime_switching": "Regime Switching"
+}
+
+
+def build_model(name: str, **params):
+    """Instantiates model `name`, ignoring parameters the model does not take."""
+    if name not in MODELS:
+        raise ValueError(f"Unknown carbon price model '{name}'.")
+    cls = MODELS[name]
+    accepted = {f.name for f in fields(cls)}
+    return cls(**{k: v for k, v in params.items() if k in accepted})
+
+
+def _path_chunk(task: tuple) -> Dict[str, np.ndarray]:
+    """
+    Streams one chunk of paths through time from its SeedSequence child. Returns per-step price
+    sums and band histograms, the terminal prices and at most `keep` leading paths.
+    """
+    seed_seq, n, model, current_price, days, dt, keep, dtype_name, record_steps = task
+    dtype = np.dtype(dtype_name).type
+    rng = np.random.Generator(np.random.PCG64(seed_seq))
+    log_price0 = float(np.log(current_price))
+    record_steps = np.asarray(record_steps, dtype=np.int64)
+    recorded = np.full((record_steps.shape[0], n), current_price, dtype=dtype)
+    center, scale = model.log_moments(log_price0, np.arange(days) * dt)
+    inverse_scale = np.divide(1.0, scale, out=np.zeros(days), where=scale > 0.0)
+    bin_width = 2.0 * BAND_Z_MAX / BAND_BINS
+
+    sums = np.empty(days)
+    counts = np.zeros((days, BAND_BINS), dtype=np.int32)
+    kept = np.empty((days, keep), dtype=dtype)
+    sums[0], kept[0] = n * current_price, current_price
+    counts[0, BAND_BINS // 2] = n
+    log_price = np.full(n, log_price0, dtype=dtype)
+    state = model.init_state(log_price0, n)
+    for start in range(1, days, BLOCK_DAYS):
+        stop = min(days, start + BLOCK_DAYS)
+        block, state = model.block(log_price, state, rng, stop - start, dt, dtype)
+        log_price = block[-1].copy()
+
+        z = (block - center[start:stop, None]) * inverse_scale[start:stop, None]
+        bins = np.clip(((z + BAND_Z_MAX) / bin_width).astype(np.int64), 0, BAND_BINS - 1)
+        bins += np.arange(stop - start)[:, None] * BAND_BINS
+        counts[start:stop] += np.bincount(bins.ravel(), minlength=(stop - start) * BAND_BINS).reshape(
+            stop - start, BAND_BINS).astype(np.int32)
+
+        prices = np.exp(block)
+        sums[start:stop] = prices.sum(axis=1, dtype=np.float64)
+        kept[start:stop] = prices[:, :keep]
+        inside = (record_steps >= start) & (record_steps < stop)
+        recorded[inside] = prices[record_steps[inside] - start]
+    return {"sums": sums, "counts": counts, "terminal": np.exp(log_price), "kept": kept, "recorded": recorded}
+
+
+def _terminal_chunk(task: tuple) -> Dict[str, np.ndarray]:
+    """Samples terminal prices exactly from the model's horizon distribution (one SeedSequence child)."""
+    seed_seq, n, model, current_price, days, dt, _, dtype_name, _ = task
+    rng = np.random.Generator(np.random.PCG64(seed_seq))
+    log_price = model.terminal(float(np.log(current_price)), rng, n, (days - 1) * dt, np.dtype(dtype_name).type)
+    return {"terminal": np.exp(log_price)}
+
+
+def _band_quantiles(counts: np.ndarray, quantiles, center: np.ndarray, scale: np.ndarray) -> np.ndarray:
+    """Per-step price quantiles from merged histograms, linearly interpolated inside the bin."""
+    total = counts[0].sum()
+    cumulative = np.cumsum(counts, axis=1, dtype=np.int64)
+    bin_width = 2.0 * BAND_Z_MAX / BAND_BINS
+    rows = np.arange(counts.shape[0])
+    bands = np.empty((len(quantiles), counts.shape[0]))
+    for i, q in enumerate(quantiles):
+        target = q * total
+        idx = np.argmax(cumulative >= target, axis=1)
+        below = np.where(idx > 0, cumulative[rows, np.maximum(idx - 1, 0)], 0)
+        fraction = (target - below) / np.maximum(counts[rows, idx], 1)
+        bands[i] = np.exp(center + scale * (-BAND_Z_MAX + (idx + fraction) * bin_width))
+    return bands
+
+
+@result_cache.disk_cache(ignore=("workers",))
+def simulate(
+    model,
+    current_price: float = 85.0,
+    days: int = 365,
+    horizon_years: float = 1.0,
+    simulations: int = 2000,
+    seed: Optional[int] = 42,
+    workers: Optional[int] = 1,
+    quantiles: Tuple[float, ...] = (0.05, 0.5, 0.95),
+    sample_paths: int = 100,
+    dtype: str = "float64",
+    terminal_only: bool = False,
+    record_steps: Tuple[int, ...] = ()
+) -> dict:
+    """
+    Simulates `simulations` price paths of `model` over `days` grid points spanning `horizon_years`.
+
+    Returns the per-step `mean`, the per-step `bands` at `quantiles` (shape len(quantiles) x days),
+    the first `sample_paths` paths, the `terminal_prices` and terminal statistics (`cvar_95` is the
+    95th percentile of the terminal price, `tail_mean_95` the mean above it). With `terminal_only`,
+    models with a closed-form horizon law (a `terminal` method) sample it directly, and the path
+    outputs are omitted. `record_steps` keeps every path's price at those grid steps as
+    `recorded_prices` (len(record_steps) x simulations), e.g. for purchase-date hedging.
+    """
+    dt = horizon_years / max(days - 1, 1)
+    exact_terminal = terminal_only and hasattr(model, "terminal") and not record_steps
+    tasks, offset = [], 0
+    for seq, n in parallel_mc.spawn_chunks(seed, simulations, CHUNK_SIZE):
+        keep = 0 if terminal_only else min(n, max(0, sample_paths - offset))
+        tasks.append((seq, n, model, current_price, days, dt, keep, dtype, tuple(record_steps)))
+        offset += n
+    worker = _terminal_chunk if exact_terminal else _path_chunk
+
+    sums = np.zeros(days)
+    counts = np.zeros((days, BAND_BINS), dtype=np.int64)
+    terminal, kept, recorded = [], [], []
+    group = MERGE_GROUP * (workers or os.cpu_count() or 1)
+    for i in range(0, len(tasks), group):
+        for part in parallel_mc.map_chunks(worker, tasks[i:i + group], workers):
+            terminal.append(part["terminal"])
+            if not exact_terminal:
+                sums += part["sums"]
+                counts += part["counts"]
+                kept.append(part["kept"])
+                recorded.append(part["recorded"])
+    final_prices = np.concatenate(terminal)
+    tail = np.percentile(final_prices, 95)
+
+    result = {
+        "terminal_prices": final_prices,
+        "expected_price": float(np.mean(final_prices)),
+        "cvar_95": float(tail),
+        "tail_mean_95": float(final_prices[final_prices >= tail].mean()),
+        "terminal_std": float(np.std(final_prices))
+    }
+    if record_steps:
+        result["recorded_prices"] = np.concatenate(recorded, axis=1)
+    if not terminal_only:
+        center, scale = model.log_moments(float(np.log(current_price)), np.arange(days) * dt)
+        result.update({
+            "mean": sums / simulations,
+            "quantiles": tuple(quantiles),
+            "bands": _band_quantiles(counts, quantiles, center, scale),
+            "sample_paths": np.concatenate(kept, axis=1)
+        })
+    return result
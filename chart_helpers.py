@@ -0,0 +1,128 @@
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+import plotly.graph_objects as go
+
+DISPLAY_BINS = 50
+
+
+def bin_values(
+    values: np.ndarray,
+    bins: int = DISPLAY_BINS,
+    value_range: Optional[Tuple[float, float]] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Bins raw samples once on the server; returns (counts, edges) for a fixed-size chart payload."""
+    return np.histogram(values, bins=bins, range=value_range)
+
+
+def rebin(
+    counts: np.ndarray,
+    edges: np.ndarray,
+    bins: int = DISPLAY_BINS,
+    value_range: Optional[Tuple[float, float]] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Coarsens a fine equal-width histogram (e.g. a streaming accumulator's) to about `bins` bars,
+    cropped to the populated part of `value_range`. Adjacent fine bins are summed, so no samples are needed.
+    """
+    if value_range is not None:
+        counts = np.where((edges[1:] > value_range[0]) & (edges[:-1] < value_range[1]), counts, 0)
+    populated = np.flatnonzero(counts)
+    if populated.shape[0] == 0:
+        return counts, edges
+    counts = counts[populated[0]:populated[-1] + 1]
+    edges = edges[populated[0]:populated[-1] + 2]
+    factor = max(1, int(np.ceil(counts.shape[0] / bins)))
+    pad = (-counts.shape[0]) % factor
+    if pad:
+        counts = np.concatenate([counts, np.zeros(pad, dtype=counts.dtype)])
+        width = edges[1] - edges[0]
+        edges = np.concatenate([edges, edges[-1] + width * np.arange(1, pad + 1)])
+    return counts.reshape(-1, factor).sum(axis=1), edges[::factor]
+
+
+def histogram_bar(
+    counts: np.ndarray,
+    edges: np.ndarray,
+    name: Optional[str] = None,
+    color: Optional[str] = None,
+    opacity: Optional[float] = None
+) -> go.Bar:
+    """Emits a pre-binned histogram as a gap-free go.Bar trace (one point per bin)."""
+    return go.Bar(
+        x=0.5 * (edges[:-1] + edges[1:]),
+        y=counts,
+        width=np.diff(edges),
+        name=name,
+        marker_color=color,
+        opacity=opacity,
+        hovertemplate="%{x:,.0f}: %{y:,}<extra></extra>"
+    )
+
+
+def _with_gaps(x: np.ndarray, count: int) -> np.ndarray:
+    """Repeats `x` `count` times with a gap value after each copy (NaN for numbers, None otherwise)."""
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.number):
+        return np.tile(np.append(x.astype(np.float32), np.float32(np.nan)), count)
+    return np.tile(np.append(x.astype(object), None), count)
+
+
+def path_trace(
+    x: np.ndarray,
+    paths: np.ndarray,
+    name: Optional[str] = None,
+    color: str = "rgba(93, 109, 126, 0.1)"
+) -> go.Scatter:
+    """
+    Packs sample paths (steps x paths) into one gap-separated line trace with hover disabled,
+    instead of one trace per path. Coordinates are sent as float32, plenty for display.
+    """
+    paths = np.asarray(paths, dtype=np.float32)
+    y = np.vstack([paths, np.full((1, paths.shape[1]), np.nan, dtype=np.float32)]).T.ravel()
+    return go.Scatter(
+        x=_with_gaps(x, paths.shape[1]), y=y, mode="lines", line=dict(color=color, width=1),
+        name=name, showlegend=name is not None, hoverinfo="skip", connectgaps=False
+    )
+
+
+def band_trace(
+    x: np.ndarray,
+    lower: np.ndarray,
+    upper: np.ndarray,
+    name: Optional[str] = None,
+    fillcolor: str = "rgba(0, 0, 255, 0.1)"
+) -> go.Scatter:
+    """Draws an interval band as one closed polygon trace (upper edge out, lower edge back)."""
+    x = np.asarray(x)
+    return go.Scatter(
+        x=np.concatenate([x, x[::-1]]),
+        y=np.concatenate([np.asarray(upper, dtype=np.float64), np.asarray(lower, dtype=np.float64)[::-1]]),
+        fill="toself", fillcolor=fillcolor, line=dict(width=0), mode="lines",
+        name=name, showlegend=name is not None, hoverinfo="skip"
+    )
+
+
+def fan_chart(
+    x: np.ndarray,
+    center: Optional[np.ndarray] = None,
+    bands: Sequence[Tuple[np.ndarray, np.ndarray, str, str]] = (),
+    paths: Optional[np.ndarray] = None,
+    center_name: str = "Mean",
+    center_color: str = "#28B463",
+    fig: Optional[go.Figure] = None
+) -> go.Figure:
+    """
+    Adds a fan chart to `fig` (a new figure by default): packed sample paths, then the
+    (lower, upper, name, fillcolor) bands widest first, then the center line.
+    Every layer is a single trace, whatever the number of paths.
+    """
+    fig = fig if fig is not None else go.Figure()
+    if paths is not None and np.asarray(paths).shape[1] > 0:
+        fig.add_trace(path_trace(x, paths))
+    for lower, upper, name, fillcolor in bands:
+        fig.add_trace(band_trace(x, lower, upper, name, fillcolor))
+    if center is not None:
+        fig.add_trace(go.Scatter(x=x, y=center, mode="lines", line=dict(color=center_color, width=3),
+                                 name=center_name))
+    return fig
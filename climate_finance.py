@@ -1,74 +1,78 @@
+from typing import Any, Dict, Optional, Tuple
+
 import numpy as np
 import plotly.graph_objects as go
 
+import carbon_models
+import chart_helpers
+
+BAND_QUANTILES = (0.05, 0.5, 0.95)
+SAMPLE_PATHS = 100
+
 
 def simulate_ets_carbon_pricing(
     current_price: float = 85.0,
     volatility: float = 0.40,
     drift: float = 0.05,
     days: int = 365,
-    simulations: int = 2000
+    simulations: int = 2000,
+    seed: Optional[int] = 42,
+    workers: Optional[int] = 1,
+    quantiles: Tuple[float, ...] = BAND_QUANTILES,
+    sample_paths: int = SAMPLE_PATHS,
+    dtype: str = "float64",
+    terminal_only: bool = False,
+    model: str = "gbm",
+    model_params: Optional[Dict[str, Any]] = None,
+    horizon_years: float = 1.0,
+    record_steps: Tuple[int, ...] = ()
 ) -> dict:
-    """Simulates EU ETS carbon prices using fully vectorized Geometric Brownian Motion."""
-    np.random.seed(42)
-    dt = 1 / 365
-
-    # Generate standard normal shocks for the entire matrix simultaneously
-    Z = np.random.standard_normal((days, simulations))
-    Z[0] = 0.0
-
-    # Calculate Brownian paths (W_t) via cumulative sum
-    W = np.cumsum(Z, axis=0) * np.sqrt(dt)
-
-    # Generate time array and broadcast it to the matrix shape
-    time_steps = np.linspace(0, 1, days)[:, np.newaxis]
-
-    # Execute full GBM matrix calculation in O(1) Python time
-    price_paths = current_price * np.exp((drift - 0.5 * volatility ** 2) * time_steps + volatility * W)
-
-    final_prices = price_paths[-1]
-
-    return {
-        "paths": price_paths,
-        "expected_price": float(np.mean(final_prices)),
-        "cvar_95": float(np.percentile(final_prices, 95))
-    }
+    """
+    Simulates EU ETS carbon prices with a carbon_models model (GBM by default), streamed in time blocks.
+
+    `drift` and `volatility` feed every model that takes them; `model_params` sets the rest (e.g.
+    kappa and long_run_price for mean reversion). Returns the per-step `mean` and `bands` at
+    `quantiles`, the first `sample_paths` paths, the `terminal_prices` and terminal statistics,
+    plus `recorded_prices` at `record_steps` when requested.
+    The full path matrix is never held. Chunks use SeedSequence-spawned streams, so any `workers`
+    count (None = all cores) returns bit-identical results for the same seed. Results are cached by
+    carbon_models.simulate.
+    """
+    params = {"drift": drift, "volatility": volatility, **(model_params or {})}
+    return carbon_models.simulate(
+        carbon_models.build_model(model, **params), current_price, days, horizon_years, simulations, seed,
+        workers, quantiles, sample_paths, dtype, terminal_only, tuple(record_steps)
+    )
 
 
-def plot_carbon_risk_simulation(current_price: float, volatility: float, total_emissions_tons: float):
+def plot_carbon_risk_simulation(
+    current_price: float,
+    volatility: float,
+    total_emissions_tons: float,
+    model: str = "gbm",
+    model_params: Optional[Dict[str, Any]] = None
+):
     """Generates an interactive Plotly visualization of stochastic carbon market risk."""
-    sim_data = simulate_ets_carbon_pricing(current_price=current_price, volatility=volatility)
-    paths = sim_data["paths"]
+    sim_data = simulate_ets_carbon_pricing(current_price=current_price, volatility=volatility, model=model,
+                                           model_params=model_params)
 
     current_exposure = current_price * total_emissions_tons
     expected_exposure = sim_data["expected_price"] * total_emissions_tons
     worst_case_exposure = sim_data["cvar_95"] * total_emissions_tons
 
-    fig = go.Figure()
-    time_steps = np.arange(365)
-    sample_paths = paths[:, :100]
-
-    for i in range(sample_paths.shape[1]):
-        fig.add_trace(go.Scatter(
-            x=time_steps, y=sample_paths[:, i],
-            mode='lines', line=dict(color='rgba(93, 109, 126, 0.1)'),
-            showlegend=False
-        ))
-
-    fig.add_trace(go.Scatter(
-        x=time_steps, y=np.mean(paths, axis=1),
-        mode='lines', line=dict(color='#28B463', width=3),
-        name=f"Expected Mean (${sim_data['expected_price']:.2f})"
-    ))
-
+    time_steps = np.arange(sim_data["mean"].shape[0])
+    fig = chart_helpers.fan_chart(
+        time_steps, sim_data["mean"], paths=sim_data["sample_paths"],
+        center_name=f"Expected Mean (${sim_data['expected_price']:.2f})"
+    )
     fig.add_trace(go.Scatter(
-        x=time_steps, y=np.percentile(paths, 95, axis=1),
+        x=time_steps, y=sim_data["bands"][sim_data["quantiles"].index(0.95)],
         mode='lines', line=dict(color='#E74C3C', width=3, dash='dash'),
         name=f"95% Risk Bound (${sim_data['cvar_95']:.2f})"
     ))
 
     fig.update_layout(
-        title="EU ETS Carbon Price Stochastic Simulation (GBM)",
+        title=f"EU ETS Carbon Price Stochastic Simulation ({carbon_models.MODEL_LABELS[model]})",
         xaxis_title="Days (1 Year Horizon)",
         yaxis_title="Carbon Price ($ / tonne)",
         height=450,
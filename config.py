@@ -5,3 +5,13 @@ HOLDING_COST = float(os.getenv("HOLDING_COST", 18.50))
 STOCKOUT_COST = float(os.getenv("STOCKOUT_COST", 2000.00))
 
 DEFAULT_LEAD_TIME = int(os.getenv("DEFAULT_LEAD_TIME", 14))
+
+# Memoization of seeded engine calls (result_cache.disk_cache) is opt-in. The explicit-key store
+# behind stored forecasts and online forecast states shares the same directory and is on by default.
+RESULT_CACHE_ENABLED = os.getenv("RESULT_CACHE_ENABLED", "0") == "1"
+RESULT_STORE_ENABLED = os.getenv("RESULT_STORE_ENABLED", "1") == "1"
+RESULT_CACHE_DIR = os.getenv("RESULT_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "lsp-results"))
+RESULT_CACHE_MAX_BYTES = int(os.getenv("RESULT_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+RESULT_CACHE_TTL = float(os.getenv("RESULT_CACHE_TTL", 7 * 24 * 3600))
+SURROGATE_TABLE_PATH = os.getenv("SURROGATE_TABLE_PATH", os.path.join(RESULT_CACHE_DIR, "surrogate_tables.npz"))
+FORECAST_WORKERS = int(os.getenv("FORECAST_WORKERS", os.cpu_count() or 1))
@@ -4,6 +4,8 @@ import psycopg2
 import pandas as pd
 import streamlit as st
 
+import online_forecast
+
 logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
 logger = logging.getLogger(__name__)
 
@@ -87,6 +89,14 @@ def load_data(product_name=None):
         conn.close()
 
 
+def _update_online_forecasts(records):
+    """Streams committed records into the per-lane online forecast states (best effort)."""
+    try:
+        online_forecast.observe_records(records)
+    except Exception as e:
+        logger.warning("Online forecast update skipped: %s", e)
+
+
 def add_record(date_val, product, demand):
     """Inserts a single transaction into the database."""
     conn = get_db_connection()
@@ -101,6 +111,7 @@ def add_record(date_val, product, demand):
             )
             conn.commit()
         load_data.clear()  # Clear cache so UI updates immediately
+        _update_online_forecasts(pd.DataFrame({'date': [date_val], 'product_name': [product], 'demand': [demand]}))
         return True
     except Exception as e:
         logger.error("Add record error: %s", e)
@@ -124,6 +135,7 @@ def bulk_import_csv(df):
             cur.executemany(query, data_tuples)
             conn.commit()
         load_data.clear()
+        _update_online_forecasts(df[cols])
         return True, f"Successfully imported {len(df)} records."
     except Exception as e:
         logger.error("Bulk import error: %s", e)
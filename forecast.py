@@ -2,12 +2,27 @@ from typing import Optional
 import numpy as np
 import pandas as pd
 
+import forecast_engine
 
-def generate_forecast(df: pd.DataFrame, months: int = 3) -> Optional[pd.DataFrame]:
-    """Projects future demand using linear trend regression and 95% confidence intervals."""
+FORECAST_COLUMNS = ['date', 'demand', 'demand_upper', 'demand_lower', 'type']
+
+
+def generate_forecast(df: pd.DataFrame, months: int = 3, model: str = "auto") -> Optional[pd.DataFrame]:
+    """
+    Projects monthly demand (mean units/day) with the seasonal batch engine and 95% prediction intervals.
+    Histories spanning fewer than forecast_engine.MIN_PERIODS months use the daily linear trend.
+    """
     if len(df) < 3:
         return None
 
+    result = forecast_engine.forecast_lanes(df.assign(product_name="Aggregate"), horizon=months, model=model)
+    if result.empty:
+        return _linear_trend_forecast(df, months)
+    return result[FORECAST_COLUMNS].reset_index(drop=True)
+
+
+def _linear_trend_forecast(df: pd.DataFrame, months: int) -> pd.DataFrame:
+    """Linear trend regression on daily points with RMSE-based 95% confidence intervals."""
     df_clean = df.copy().sort_values('date')
     x = df_clean['date'].map(pd.Timestamp.toordinal).values
     y = df_clean['demand'].values
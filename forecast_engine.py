@@ -0,0 +1,321 @@
+"""
+Batch seasonal demand forecasting for every lane at once.
+
+Daily history is resampled to the forecast grain. By default that is the monthly mean of daily
+demand, so forecasts stay on the daily scale the dashboard plots. The result is packed into one
+(lanes x periods) array; each row starts at its lane's first period and is NaN-padded on the right.
+Every model is then one vectorized pass over that array:
+
+* Holt-Winters with additive level, trend and season. Smoothing constants are chosen per lane
+  from a small grid by one-step-ahead SSE, and the recursion steps all lanes and grid points together.
+* Seasonal decomposition plus trend: a centred moving-average trend, phase-averaged seasonal
+  indices, and a least-squares line through the deseasonalised series.
+* A linear trend, for lanes with less than two full seasons of history.
+
+With `model="auto"`, each lane uses whichever seasonal model has the lower error over the last
+half-season, refitted without it. Prediction intervals combine the model's h-step variance with
+the within-period spread of daily demand, so the band covers individual days.
+"""
+import warnings
+from itertools import product
+from typing import Dict, Sequence
+
+import numpy as np
+import pandas as pd
+
+SEASON_LENGTHS = {"M": 12, "W": 52, "Q": 4}
+MIN_PERIODS = 3
+Z_95 = 1.96
+
+ALPHAS = (0.1, 0.3, 0.5, 0.8)
+BETAS = (0.01, 0.05, 0.2)
+GAMMAS = (0.05, 0.2, 0.5)
+
+MODELS = ("holt_winters", "decomposition", "linear")
+
+
+def pack_lanes(df: pd.DataFrame, grain: str = "M", lane_column: str = "product_name") -> Dict[str, np.ndarray]:
+    """
+    Resamples daily records to `grain` and packs every lane into a left-aligned (lanes x periods)
+    array of mean daily demand. Missing interior periods are linearly interpolated.
+    Also returns each lane's first period, length and pooled within-period std of daily demand,
+    plus the per-period squared deviations (`within_ss`) and day counts (`days`) it pools, aligned
+    with `values`, so that a prefix of each lane can be pooled on its own.
+    """
+    lane_values = df[lane_column].to_numpy() if lane_column in df.columns else np.full(len(df), "Aggregate")
+    codes, lanes = pd.factorize(lane_values, sort=True)
+    lanes = np.asarray(lanes)
+    days = pd.to_datetime(df["date"]).to_numpy().astype("datetime64[D]").astype(np.int64)
+
+    # Daily totals per lane (several records on one day are one day's demand)
+    day_span = int(days.max() - days.min()) + 1
+    keys, slot = np.unique(codes * day_span + (days - days.min()), return_inverse=True)
+    daily = np.bincount(slot, df["demand"].to_numpy(dtype=np.float64))
+    lane_of, day_of = keys // day_span, keys % day_span + days.min()
+    ordinal = pd.DatetimeIndex(day_of.astype("datetime64[D]")).to_period(grain).asi8
+
+    # Dense (lanes x calendar periods) means, then shift every row to start at its first period
+    period_span = int(ordinal.max() - ordinal.min()) + 1
+    cell = lane_of * period_span + (ordinal - ordinal.min())
+    size = lanes.shape[0] * period_span
+    counts = np.bincount(cell, minlength=size)
+    sums = np.bincount(cell, daily, minlength=size)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = sums / counts
+    deviation_sq = (daily - means[cell]) ** 2
+    within_std = np.sqrt(np.bincount(lane_of, deviation_sq, minlength=lanes.shape[0])
+                         / np.bincount(lane_of, minlength=lanes.shape[0]))
+
+    observed = counts.reshape(lanes.shape[0], period_span) > 0
+    first = observed.argmax(axis=1)
+    lengths = period_span - observed[:, ::-1].argmax(axis=1) - first
+    columns = first[:, None] + np.arange(int(lengths.max()))[None, :]
+    columns = np.minimum(columns, period_span - 1)
+    inside = columns - first[:, None] < lengths[:, None]
+    values = np.take_along_axis(means.reshape(lanes.shape[0], period_span), columns, axis=1)
+    values = np.where(inside, values, np.nan)
+    values = pd.DataFrame(values).interpolate(axis=1, limit_area="inside").to_numpy()
+    within_ss = np.bincount(cell, deviation_sq, minlength=size).reshape(lanes.shape[0], period_span)
+    day_counts = counts.reshape(lanes.shape[0], period_span)
+
+    return {
+        "lanes": lanes,
+        "values": values,
+        "lengths": lengths.astype(np.int64),
+        "first_period": np.array([pd.Period(ordinal=int(o), freq=grain) for o in first + ordinal.min()], dtype=object),
+        "within_std": within_std,
+        "within_ss": np.where(inside, np.take_along_axis(within_ss, columns, axis=1), 0.0),
+        "days": np.where(inside, np.take_along_axis(day_counts, columns, axis=1), 0)
+    }
+
+
+def _masked_line(values: np.ndarray, valid: np.ndarray) -> Dict[str, np.ndarray]:
+    """Per-row least-squares line through the valid entries of a 2-D array."""
+    x = np.broadcast_to(np.arange(values.shape[1], dtype=np.float64), values.shape)
+    w = valid.astype(np.float64)
+    y = np.where(valid, values, 0.0)
+    count = w.sum(axis=1)
+    x_mean = (w * x).sum(axis=1) / count
+    y_mean = y.sum(axis=1) / count
+    dx = np.where(valid, x - x_mean[:, None], 0.0)
+    sxx = (dx * dx).sum(axis=1)
+    slope = np.where(sxx > 0.0, (dx * (y - y_mean[:, None])).sum(axis=1) / np.where(sxx > 0.0, sxx, 1.0), 0.0)
+    intercept = y_mean - slope * x_mean
+    residual = np.where(valid, values - (intercept[:, None] + slope[:, None] * x), 0.0)
+    dof = np.maximum(count - 2.0, 1.0)
+    return {
+        "intercept": intercept,
+        "slope": slope,
+        "sigma": np.sqrt((residual ** 2).sum(axis=1) / dof),
+        "count": count,
+        "x_mean": x_mean,
+        "sxx": sxx
+    }
+
+
+def _line_forecast(line: Dict[str, np.ndarray], lengths: np.ndarray, horizon: int) -> Dict[str, np.ndarray]:
+    """Extrapolates a fitted line with the usual regression prediction variance."""
+    x = (lengths - 1)[:, None] + np.arange(1, horizon + 1)[None, :]
+    leverage = 1.0 / line["count"][:, None] \
+        + (x - line["x_mean"][:, None]) ** 2 / np.where(line["sxx"] > 0.0, line["sxx"], np.inf)[:, None]
+    return {
+        "mean": line["intercept"][:, None] + line["slope"][:, None] * x,
+        "std": line["sigma"][:, None] * np.sqrt(1.0 + leverage)
+    }
+
+
+def linear_batch(values: np.ndarray, lengths: np.ndarray, horizon: int) -> Dict[str, np.ndarray]:
+    """Straight-line trend per lane."""
+    valid = np.arange(values.shape[1])[None, :] < lengths[:, None]
+    return _line_forecast(_masked_line(values, valid), lengths, horizon)
+
+
+def decomposition_batch(values: np.ndarray, lengths: np.ndarray, horizon: int, season: int) -> Dict[str, np.ndarray]:
+    """Classical seasonal decomposition (centred moving average) plus a linear trend on the adjusted series."""
+    num_lanes, num_periods = values.shape
+    valid = np.arange(num_periods)[None, :] < lengths[:, None]
+    filled = np.where(valid, values, 0.0)
+
+    # Centred moving average: 2 x m for even seasons, plain m otherwise
+    if season % 2 == 0:
+        weights = np.r_[0.5, np.ones(season - 1), 0.5] / season
+    else:
+        weights = np.ones(season) / season
+    half = weights.shape[0] // 2
+    windows = np.lib.stride_tricks.sliding_window_view(filled, weights.shape[0], axis=1)
+    trend = np.full_like(values, np.nan)
+    trend[:, half:num_periods - half] = windows @ weights
+    centres = np.arange(num_periods)[None, :]
+    trend = np.where((centres >= half) & (centres + half < lengths[:, None]), trend, np.nan)
+
+    detrended = values - trend
+    pad = (-num_periods) % season
+    by_phase = np.pad(detrended, ((0, 0), (0, pad)), constant_values=np.nan).reshape(num_lanes, -1, season)
+    with warnings.catch_warnings():
+        # Phases a short lane never observed yield empty means; they are zeroed below
+        warnings.simplefilter("ignore", RuntimeWarning)
+        seasonal = np.nanmean(by_phase, axis=1)
+    seasonal = np.nan_to_num(seasonal - np.nanmean(seasonal, axis=1, keepdims=True))
+
+    phases = np.arange(num_periods) % season
+    adjusted = values - seasonal[:, phases]
+    forecast = _line_forecast(_masked_line(adjusted, valid), lengths, horizon)
+    future_phase = ((lengths - 1)[:, None] + np.arange(1, horizon + 1)[None, :]) % season
+    forecast["mean"] = forecast["mean"] + np.take_along_axis(seasonal, future_phase, axis=1)
+    forecast["seasonal"] = seasonal
+    return forecast
+
+
+def holt_winters_batch(
+    values: np.ndarray,
+    lengths: np.ndarray,
+    horizon: int,
+    season: int,
+    alphas: Sequence[float] = ALPHAS,
+    betas: Sequence[float] = BETAS,
+    gammas: Sequence[float] = GAMMAS
+) -> Dict[str, np.ndarray]:
+    """
+    Additive Holt-Winters for all lanes and all (alpha, beta, gamma) grid points in one recursion.
+    Rows need at least two seasons; the first season initialises the state and is excluded from SSE.
+    """
+    grid = np.array(list(product(alphas, betas, gammas)), dtype=np.float64)
+    alpha, beta, gamma = (grid[:, i][None, :] for i in range(3))
+    num_lanes, num_periods = values.shape
+
+    level0, slope0, seasonal0 = holt_winters_init(values, season)
+    level = np.repeat(level0[:, None], grid.shape[0], axis=1)
+    slope = np.repeat(slope0[:, None], grid.shape[0], axis=1)
+    seasonal = np.repeat(seasonal0[:, None, :], grid.shape[0], axis=1)
+    sse = np.zeros_like(level)
+
+    for t in range(num_periods):
+        active = (t < lengths)[:, None]
+        y = values[:, t][:, None]
+        s = seasonal[:, :, t % season]
+        error = y - (level + slope + s)
+        if t >= season:
+            sse += np.where(active, error * error, 0.0)
+        new_level = alpha * (y - s) + (1.0 - alpha) * (level + slope)
+        new_slope = beta * (new_level - level) + (1.0 - beta) * slope
+        seasonal[:, :, t % season] = np.where(active, gamma * (y - new_level) + (1.0 - gamma) * s, s)
+        level = np.where(active, new_level, level)
+        slope = np.where(active, new_slope, slope)
+
+    best = sse.argmin(axis=1)
+    rows = np.arange(num_lanes)
+    steps = np.arange(1, horizon + 1)
+    future_phase = ((lengths - 1)[:, None] + steps[None, :]) % season
+    mean = level[rows, best][:, None] + steps[None, :] * slope[rows, best][:, None] \
+        + np.take_along_axis(seasonal[rows, best], future_phase, axis=1)
+
+    sigma = np.sqrt(sse[rows, best] / np.maximum(lengths - season, 1))
+    return {
+        "mean": mean,
+        "std": sigma[:, None] * np.sqrt(holt_winters_variance_factor(grid[best], horizon, season)),
+        "params": grid[best]
+    }
+
+
+def holt_winters_init(values: np.ndarray, season: int):
+    """Initial (level, slope, seasonal) per row from its first two seasons, positioned just before period 0."""
+    first, second = values[:, :season].mean(axis=1), values[:, season:2 * season].mean(axis=1)
+    slope = (second - first) / season
+    offsets = np.arange(season) - (season - 1) / 2.0
+    seasonal = values[:, :season] - (first[:, None] + offsets[None, :] * slope[:, None])
+    return first - ((season - 1) / 2.0 + 1.0) * slope, slope, seasonal
+
+
+def holt_winters_variance_factor(params: np.ndarray, horizon: int, season: int) -> np.ndarray:
+    """h-step forecast variance in units of the one-step variance, per (alpha, beta, gamma) row."""
+    a, b, g = params[:, 0][:, None], params[:, 1][:, None], params[:, 2][:, None]
+    lags = np.arange(1, horizon)[None, :]
+    coefficients = a * (1.0 + lags * b) + g * (lags % season == 0)
+    return 1.0 + np.concatenate([np.zeros((params.shape[0], 1)), np.cumsum(coefficients ** 2, axis=1)], axis=1)
+
+
+def _batch_by_model(values: np.ndarray, lengths: np.ndarray, horizon: int, season: int, model: str):
+    if model == "holt_winters":
+        return holt_winters_batch(values, lengths, horizon, season)
+    if model == "decomposition":
+        return decomposition_batch(values, lengths, horizon, season)
+    return linear_batch(values, lengths, horizon)
+
+
+def _holdout_choice(values: np.ndarray, lengths: np.ndarray, season: int) -> np.ndarray:
+    """Per-lane pick between the two seasonal models by MAE on the last half-season."""
+    holdout = max(1, season // 2)
+    trimmed = lengths - holdout
+    rows = np.arange(values.shape[0])
+    actual = values[rows[:, None], trimmed[:, None] + np.arange(holdout)[None, :]]
+    errors = [
+        np.abs(_batch_by_model(values, trimmed, holdout, season, name)["mean"] - actual).mean(axis=1)
+        for name in ("holt_winters", "decomposition")
+    ]
+    return np.where(errors[0] <= errors[1], "holt_winters", "decomposition")
+
+
+def forecast_arrays(values: np.ndarray, lengths: np.ndarray, horizon: int, season: int,
+                    model: str = "auto") -> Dict[str, np.ndarray]:
+    """
+    Forecasts packed lanes (each with at least MIN_PERIODS periods). Returns the mean and model
+    standard deviation of the next `horizon` periods, and the model used per lane.
+    """
+    seasonal_ok = lengths >= 2 * season
+    if model == "auto":
+        chosen = np.full(lengths.shape[0], "linear", dtype=object)
+        can_test = lengths >= 2 * season + max(1, season // 2)
+        if can_test.any():
+            chosen[can_test] = _holdout_choice(values[can_test], lengths[can_test], season)
+        chosen[seasonal_ok & ~can_test] = "decomposition"
+    else:
+        chosen = np.where(seasonal_ok | (model == "linear"), model, "linear").astype(object)
+
+    mean = np.empty((lengths.shape[0], horizon))
+    std = np.empty_like(mean)
+    for name in MODELS:
+        rows = chosen == name
+        if rows.any():
+            width = int(lengths[rows].max())
+            result = _batch_by_model(values[rows, :width], lengths[rows], horizon, season, name)
+            mean[rows], std[rows] = result["mean"], result["std"]
+    return {"mean": mean, "std": std, "model": chosen}
+
+
+def forecast_lanes(
+    df: pd.DataFrame,
+    horizon: int = 3,
+    grain: str = "M",
+    model: str = "auto",
+    lane_column: str = "product_name"
+) -> pd.DataFrame:
+    """
+    Forecasts every lane in `df` and returns one row per lane and future period with the
+    generate_forecast columns plus `lane`, `model` and `std` (the forecast standard deviation of daily demand).
+    Lanes with fewer than MIN_PERIODS periods are left out.
+    """
+    if model not in ("auto",) + MODELS:
+        raise ValueError(f"Unknown forecast model '{model}'.")
+    season = SEASON_LENGTHS[grain]
+    packed = pack_lanes(df, grain, lane_column)
+    keep = packed["lengths"] >= MIN_PERIODS
+    if not keep.any():
+        return pd.DataFrame(columns=["lane", "date", "demand", "demand_upper", "demand_lower", "type", "model", "std"])
+    values, lengths = packed["values"][keep], packed["lengths"][keep]
+
+    result = forecast_arrays(values, lengths, horizon, season, model)
+    mean, std, chosen = result["mean"], result["std"], result["model"]
+
+    std = np.sqrt(std ** 2 + np.nan_to_num(packed["within_std"][keep])[:, None] ** 2)
+    last = np.array([first + (n - 1) for first, n in zip(packed["first_period"][keep], lengths)], dtype=object)
+    steps = np.arange(1, horizon + 1)
+    return pd.DataFrame({
+        "lane": np.repeat(packed["lanes"][keep], horizon),
+        "date": [(p + int(h)).start_time for p in last for h in steps],
+        "demand": np.maximum(0.0, mean).ravel(),
+        "demand_upper": np.maximum(0.0, mean + Z_95 * std).ravel(),
+        "demand_lower": np.maximum(0.0, mean - Z_95 * std).ravel(),
+        "type": "Forecast",
+        "model": np.repeat(chosen, horizon),
+        "std": std.ravel()
+    })
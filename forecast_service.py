@@ -0,0 +1,148 @@
+"""
+Batch forecasting service with fingerprint-keyed storage.
+
+Each lane's forecast is stored in the shared result store. The key is a hash of the lane's
+(date, demand) history together with the forecast configuration. The dashboard's per-rerun call
+is then a hash plus a file read, and it only recomputes when the lane's data has changed. The
+refresh splits the lanes needing new forecasts into chunks and runs one packed, vectorized
+forecast_engine pass per chunk across a process pool.
+
+Nightly refresh (e.g. from cron):  python forecast_service.py --workers 8
+"""
+import argparse
+import time
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+import config
+import forecast
+import forecast_engine
+import online_forecast
+import parallel_mc
+import result_cache
+
+# Bump when forecast_engine or forecast changes its numbers, so stored forecasts are recomputed
+ENGINE_VERSION = 1
+LANES_PER_TASK = 250
+
+
+def lane_fingerprint(lane_df: pd.DataFrame, months: int = 3, model: str = "auto") -> str:
+    """Stable key for a lane's history (order-independent) and the forecast configuration."""
+    dates = pd.to_datetime(lane_df["date"], cache=False).to_numpy(dtype="datetime64[ns]").view(np.int64)
+    demand = lane_df["demand"].to_numpy(dtype=np.float64)
+    order = np.lexsort((demand, dates))
+    return result_cache.stable_hash("forecast", ENGINE_VERSION, months, model, dates[order], demand[order])
+
+
+def _forecast_task(task: tuple) -> Dict[str, Optional[pd.DataFrame]]:
+    """Forecasts one chunk of lanes in a single packed pass; short histories get the daily linear fallback."""
+    chunk, months, model, lane_column = task
+    batch = forecast_engine.forecast_lanes(chunk, horizon=months, model=model, lane_column=lane_column)
+    results = {lane: rows[forecast.FORECAST_COLUMNS].reset_index(drop=True) for lane, rows in batch.groupby("lane")}
+    for lane, lane_df in chunk.groupby(lane_column):
+        if lane not in results:
+            results[lane] = forecast.generate_forecast(lane_df.drop(columns=lane_column), months, model)
+    return results
+
+
+def refresh_forecasts(
+    df: pd.DataFrame,
+    months: int = 3,
+    model: str = "auto",
+    workers: Optional[int] = None,
+    lane_column: str = "product_name",
+    force: bool = False
+) -> Dict[str, object]:
+    """
+    Forecasts every lane whose fingerprint is not stored yet (all lanes when `force`) across a
+    process pool and stores the results. Returns the forecasts per lane plus run statistics.
+    """
+    started = time.perf_counter()
+    lanes = {lane: lane_df for lane, lane_df in df.groupby(lane_column, sort=True)}
+    keys = {lane: lane_fingerprint(lane_df, months, model) for lane, lane_df in lanes.items()}
+
+    results, stale = {}, []
+    for lane, key in keys.items():
+        found, value = (False, None) if force else result_cache.load_entry(key)
+        if found:
+            results[lane] = value
+        else:
+            stale.append(lane)
+
+    tasks = [
+        (pd.concat([lanes[lane] for lane in stale[i:i + LANES_PER_TASK]]), months, model, lane_column)
+        for i in range(0, len(stale), LANES_PER_TASK)
+    ]
+    for part in parallel_mc.map_chunks(_forecast_task, tasks, workers or config.FORECAST_WORKERS):
+        for lane, value in part.items():
+            try:
+                result_cache.store_entry(keys[lane], value, trim=False)
+            except OSError:
+                pass
+            results[lane] = value
+    if stale and result_cache.STORE_ENABLED:
+        result_cache.trim_cache()
+
+    return {
+        "forecasts": results,
+        "lanes": len(lanes),
+        "recomputed": len(stale),
+        "seconds": time.perf_counter() - started
+    }
+
+
+def get_forecast(
+    df: pd.DataFrame,
+    months: int = 3,
+    model: str = "auto",
+    lane: Optional[str] = None
+) -> Optional[pd.DataFrame]:
+    """
+    Returns the stored forecast for one lane's history, computing and storing it on a miss.
+    A miss on a named lane (`lane`, or a single product_name in `df`) is answered from the lane's
+    online state when it is in sync. Same contract as forecast.generate_forecast.
+    """
+    if len(df) < 3:
+        return None
+    key = lane_fingerprint(df, months, model)
+    found, value = result_cache.load_entry(key)
+    if found:
+        return value
+    if lane is None and "product_name" in df and df["product_name"].nunique() == 1:
+        lane = df["product_name"].iloc[0]
+    if lane is None:
+        value = forecast.generate_forecast(df, months, model)
+    else:
+        value = online_forecast.forecast_lane(lane, df, months, model)
+    try:
+        result_cache.store_entry(key, value)
+    except OSError:
+        pass
+    return value
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--csv", help="Read history from a CSV (date, product_name, demand) instead of the database.")
+    parser.add_argument("--months", type=int, default=3, help="Forecast horizon in months.")
+    parser.add_argument("--model", default="auto", choices=("auto",) + forecast_engine.MODELS)
+    parser.add_argument("--workers", type=int, default=config.FORECAST_WORKERS)
+    parser.add_argument("--force", action="store_true", help="Recompute lanes whose data has not changed.")
+    args = parser.parse_args()
+
+    if args.csv:
+        history = pd.read_csv(args.csv, parse_dates=["date"])
+    else:
+        import db_manager
+        history = db_manager.load_data(None)
+    if history is None or history.empty:
+        raise SystemExit("No demand history found.")
+
+    run = refresh_forecasts(history, args.months, args.model, args.workers, force=args.force)
+    print(f"Forecast {run['lanes']} lanes ({run['recomputed']} recomputed) in {run['seconds']:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+from typing import Dict, Optional, Union
+
+import numpy as np
+
+import sim_kernels
+
+DAYS_PER_MONTH = 30.0
+
+
+def sample_lead_times(
+    rng: np.random.Generator,
+    shape: tuple,
+    lead_time_days: float,
+    lead_time_volatility_days: float
+) -> np.ndarray:
+    """Draws integer replenishment lead times (>= 1 day) from a rounded Normal distribution."""
+    draws = rng.standard_normal(shape, dtype=np.float32)
+    draws *= lead_time_volatility_days
+    draws += lead_time_days
+    return np.maximum(np.rint(draws), 1.0).astype(np.int32)
+
+
+def simulate_inventory_dynamics(
+    avg_demand: float,
+    std_dev: float,
+    safety_stock: float,
+    lead_time_days: float,
+    lead_time_volatility_days: float = 0.0,
+    return_rate: float = 0.0,
+    holding_cost: float = 0.0,
+    backorder_cost: float = 0.0,
+    days: int = 365,
+    num_paths: int = 10000,
+    seed: Optional[int] = 42
+) -> Dict[str, Union[float, np.ndarray]]:
+    """
+    Simulates day-by-day stock, pipeline orders and backorders for many paths under an order-up-to policy.
+    The order-up-to level covers expected demand over lead time plus review day, plus safety stock.
+    `return_rate` is the fraction of shipped units restocked the next day; `holding_cost` and
+    `backorder_cost` are charged per unit per day.
+    """
+    rng = np.random.Generator(np.random.PCG64(seed))
+
+    demands = rng.standard_normal((num_paths, days))
+    demands *= std_dev
+    demands += avg_demand
+    np.rint(demands, out=demands)
+    np.maximum(demands, 0.0, out=demands)
+
+    lead_times = sample_lead_times(rng, (num_paths, days), lead_time_days, lead_time_volatility_days)
+    order_up_to = avg_demand * (lead_time_days + 1.0) + safety_stock
+
+    res = sim_kernels.simulate_base_stock(demands, lead_times, order_up_to, return_rate=return_rate)
+
+    demand_totals = demands.sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fill_rates = np.where(demand_totals > 0.0, res["filled_units"] / demand_totals, 1.0)
+    holding = res["on_hand_units"] * holding_cost
+    backorder = res["backorder_units"] * backorder_cost
+
+    return {
+        "fill_rate": float(res["filled_units"].sum() / max(demand_totals.sum(), 1e-12)),
+        "fill_rate_p5": float(np.percentile(fill_rates, 5)),
+        "stockout_days": float(res["stockout_days"].mean()),
+        "stockout_days_p95": float(np.percentile(res["stockout_days"], 95)),
+        "cycle_service_level": float(1.0 - res["stockout_days"].mean() / days),
+        "avg_on_hand": float(res["on_hand_units"].mean() / days),
+        "holding_cost": float(holding.mean()),
+        "backorder_cost": float(backorder.mean()),
+        "order_up_to": float(order_up_to),
+        "num_paths": num_paths,
+        "days": days,
+        "path_fill_rates": fill_rates,
+        "path_stockout_days": res["stockout_days"]
+    }
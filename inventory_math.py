@@ -1,5 +1,6 @@
 import math
 from typing import Dict, Union
+from scipy.special import ndtr
 from scipy.stats import norm
 
 
@@ -105,6 +106,32 @@ def calculate_service_implications(
     }
 
 
+def calculate_expected_newsvendor_profit(
+    demand_mean: float,
+    demand_std: float,
+    capacity: float,
+    unit_cost: float,
+    selling_price: float,
+    holding_cost: float,
+    stockout_cost: float
+) -> float:
+    """Calculates the exact expected single-period profit under continuous Normal demand via the Unit Normal Loss Function."""
+    margin = selling_price - unit_cost
+    if demand_std <= 0.0:
+        sold = min(demand_mean, capacity)
+        return margin * sold - holding_cost * max(0.0, capacity - demand_mean) - stockout_cost * max(0.0, demand_mean - capacity)
+
+    # scipy.special.ndtr avoids the frozen-distribution overhead of norm.cdf on this interactive hot path
+    z_score = (capacity - demand_mean) / demand_std
+    standard_loss = math.exp(-0.5 * z_score * z_score) / math.sqrt(2.0 * math.pi) - z_score * float(ndtr(-z_score))
+
+    expected_shortage = demand_std * standard_loss
+    expected_leftover = demand_std * (z_score + standard_loss)
+    expected_sales = demand_mean - expected_shortage
+
+    return float(margin * expected_sales - holding_cost * expected_leftover - stockout_cost * expected_shortage)
+
+
 def calculate_sustainability_impact(
     internal_vol: float,
     outsourced_vol: float
@@ -0,0 +1,272 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy.stats import norm
+
+CO2_PER_UNIT_INTERNAL = 12.5
+CO2_PER_UNIT_SHARED = 10.0
+
+_MAX_CACHE_ENTRIES = 4096
+_CACHE_LOCK = threading.Lock()
+_STATS_CACHE: "OrderedDict[Tuple[str, str], Tuple[float, float, int]]" = OrderedDict()
+_METRICS_CACHE: "OrderedDict[Tuple[str, str, str], Dict[str, Any]]" = OrderedDict()
+_CACHE_COUNTERS = {"hits": 0, "misses": 0}
+
+REQUIRED_INPUTS = (
+    "return_rate", "lead_time", "lead_time_volatility", "sla", "holding_cost", "stockout_cost",
+    "warehouse_cap", "partner_cost", "co2_mult", "unit_cost", "selling_price", "transport_mode"
+)
+
+
+def _fingerprint_inputs(inputs: Dict[str, Any]) -> str:
+    """Builds a stable digest of the scenario inputs shared by every lane."""
+    missing = [k for k in REQUIRED_INPUTS if k not in inputs]
+    if missing:
+        raise ValueError(f"Missing scenario inputs: {', '.join(missing)}")
+    payload = repr(sorted((k, inputs[k]) for k in REQUIRED_INPUTS)).encode("utf-8")
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+
+def _fingerprint_lane(lane_df: pd.DataFrame) -> str:
+    """Builds a stable digest of a lane's demand history (dates and volumes)."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(np.ascontiguousarray(lane_df["demand"].to_numpy(dtype=np.float64)).tobytes())
+    if "date" in lane_df.columns:
+        dates = pd.to_datetime(lane_df["date"]).to_numpy(dtype="datetime64[ns]")
+        digest.update(np.ascontiguousarray(dates.view(np.int64)).tobytes())
+    return digest.hexdigest()
+
+
+def _cache_put(cache: OrderedDict, key: tuple, value: Any) -> None:
+    cache[key] = value
+    cache.move_to_end(key)
+    while len(cache) > _MAX_CACHE_ENTRIES:
+        cache.popitem(last=False)
+
+
+def calculate_lane_metrics_vectorized(
+    raw_avg: np.ndarray,
+    std_dev: np.ndarray,
+    inputs: Dict[str, Any]
+) -> Dict[str, np.ndarray]:
+    """
+    Evaluates the full capacity, service and sustainability metric set for many lanes at once.
+    Numeric inputs may also be arrays that broadcast against the lanes, e.g. a sweep of one setting.
+    """
+    raw_avg = np.asarray(raw_avg, dtype=np.float64)
+    std_dev = np.asarray(std_dev, dtype=np.float64)
+
+    lt, lt_sigma, sla, holding_cost, stockout_cost, warehouse_cap, partner_cost, co2_mult, return_rate = (
+        np.asarray(inputs[name], dtype=np.float64)
+        for name in ("lead_time", "lead_time_volatility", "sla", "holding_cost", "stockout_cost",
+                     "warehouse_cap", "partner_cost", "co2_mult", "return_rate")
+    )
+
+    return_vol = raw_avg * (return_rate / 100.0)
+    workload = raw_avg + return_vol
+
+    # Risk-adjusted safety stock (RSS), mirroring inventory_math.calculate_advanced_safety_stock
+    sla_valid = (sla > 0.0) & (sla < 1.0)
+    z = np.where(sla_valid, norm.ppf(np.where(sla_valid, sla, 0.5)), 0.0)
+    raw_ss = z * np.sqrt(lt * std_dev ** 2 + workload ** 2 * lt_sigma ** 2)
+    safety_stock = np.where(sla_valid & (workload > 0.0), np.maximum(0.0, np.round(raw_ss)), 0.0)
+
+    required_capacity = workload + safety_stock
+
+    # Horizontal cooperation
+    outsourced = np.maximum(0.0, required_capacity - warehouse_cap)
+    internal = np.maximum(0.0, required_capacity - outsourced)
+    cooperation_cost = np.round(internal * holding_cost + outsourced * (holding_cost + partner_cost), 2)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        dependency = np.where(required_capacity > 0.0, outsourced / required_capacity, 0.0)
+    dependency_ratio = np.round(dependency * 100.0, 1)
+
+    # Resilience index
+    combined_volatility = np.sqrt(lt * std_dev ** 2 + raw_avg ** 2 * lt_sigma ** 2)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        coverage = np.where(
+            combined_volatility > 0.0,
+            np.minimum(50.0, (safety_stock / combined_volatility / 2.0) * 50.0),
+            50.0
+        )
+    resilience_score = np.round(coverage + (50.0 - dependency_ratio / 2.0), 1)
+
+    # Service implications via the unit normal loss function
+    service_valid = (std_dev > 0.0) & sla_valid
+    standard_loss = norm.pdf(z) - z * (1.0 - norm.cdf(z))
+    expected_shortage = np.where(service_valid, std_dev * standard_loss, 0.0)
+    penalty_cost = np.round(expected_shortage * stockout_cost, 2)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        reliability = np.where(
+            service_valid & (workload > 0.0),
+            100.0 * (1.0 - expected_shortage / workload),
+            100.0
+        )
+    expected_shortage = np.round(expected_shortage, 2)
+    reliability_score = np.round(reliability, 2)
+
+    # Customer loyalty
+    gap = reliability_score - sla * 100.0
+    loyalty = 75.0 + np.where(gap >= 0.0, gap * 1.5, gap * 2.5)
+    loyalty_score = np.clip(np.round(loyalty, 1), 0.0, 100.0)
+
+    # Scope 3 emissions, scaled by the transport mode multiplier
+    total_emissions = internal * CO2_PER_UNIT_INTERNAL + outsourced * CO2_PER_UNIT_SHARED
+    baseline_emissions = (internal + outsourced) * CO2_PER_UNIT_INTERNAL
+    co2_saved = np.maximum(0.0, baseline_emissions - total_emissions)
+
+    return {
+        "raw_avg_demand": raw_avg,
+        "std_dev_demand": std_dev,
+        "return_vol": return_vol,
+        "total_workload": workload,
+        "safety_stock": safety_stock,
+        "required_capacity": required_capacity,
+        "internal_vol": internal,
+        "outsourced_vol": outsourced,
+        "cooperation_cost": cooperation_cost,
+        "dependency_ratio": dependency_ratio,
+        "combined_volatility": combined_volatility,
+        "resilience_score": resilience_score,
+        "expected_shortage": expected_shortage,
+        "penalty_cost": penalty_cost,
+        "reliability_score": reliability_score,
+        "loyalty_score": loyalty_score,
+        "co2_emissions": np.round(np.round(total_emissions, 2) * co2_mult, 2),
+        "co2_saved": np.round(np.round(co2_saved, 2) * co2_mult, 2),
+        "is_green_optimized": co2_saved > 0.0
+    }
+
+
+def _lane_statistics(
+    data: pd.DataFrame,
+    lane_column: str,
+    lanes: List[Any],
+    fingerprints: List[str]
+) -> List[Tuple[float, float, int]]:
+    """Returns (mean, std, count) per lane, aggregating only lanes whose history changed."""
+    stats: List[Optional[Tuple[float, float, int]]] = []
+    with _CACHE_LOCK:
+        for lane, fp in zip(lanes, fingerprints):
+            stats.append(_STATS_CACHE.get((str(lane), fp)))
+
+    stale = [lane for lane, cached in zip(lanes, stats) if cached is None]
+    if stale:
+        subset = data.loc[data[lane_column].isin(stale)]
+        agg = subset.groupby(lane_column)["demand"].agg(["mean", "std", "count"])
+        with _CACHE_LOCK:
+            for i, (lane, fp) in enumerate(zip(lanes, fingerprints)):
+                if stats[i] is None:
+                    row = agg.loc[lane]
+                    count = int(row["count"])
+                    std = float(row["std"]) if count > 1 else 0.0
+                    stats[i] = (float(row["mean"]), std, count)
+                    _cache_put(_STATS_CACHE, (str(lane), fp), stats[i])
+    return stats
+
+
+def compute_portfolio_metrics(
+    data: pd.DataFrame,
+    inputs: Dict[str, Any],
+    lane_column: str = "product_name"
+) -> pd.DataFrame:
+    """
+    Computes the full Dashboard metric set for every lane into one columnar table.
+    Results are memoised per (lane history, scenario inputs) fingerprint at process level,
+    so reruns and concurrent sessions only recompute lanes whose data or inputs changed.
+    """
+    if data is None or data.empty:
+        return pd.DataFrame()
+
+    inputs_fp = _fingerprint_inputs(inputs)
+    lane_keys, fingerprints = [], []
+    for lane, lane_df in data.groupby(lane_column, sort=True):
+        lane_keys.append(lane)
+        fingerprints.append(_fingerprint_lane(lane_df))
+    lanes = [str(lane) for lane in lane_keys]
+
+    rows: List[Optional[Dict[str, Any]]] = []
+    with _CACHE_LOCK:
+        for lane, fp in zip(lanes, fingerprints):
+            row = _METRICS_CACHE.get((inputs_fp, lane, fp))
+            if row is not None:
+                _METRICS_CACHE.move_to_end((inputs_fp, lane, fp))
+                _CACHE_COUNTERS["hits"] += 1
+            rows.append(row)
+
+    stale_idx = [i for i, row in enumerate(rows) if row is None]
+    if stale_idx:
+        stats = _lane_statistics(data, lane_column, [lane_keys[i] for i in stale_idx],
+                                 [fingerprints[i] for i in stale_idx])
+        columns = calculate_lane_metrics_vectorized(
+            np.array([s[0] for s in stats]),
+            np.array([s[1] for s in stats]),
+            inputs
+        )
+        with _CACHE_LOCK:
+            for j, i in enumerate(stale_idx):
+                row = {"lane": lanes[i], "observations": stats[j][2]}
+                row.update({name: values[j].item() for name, values in columns.items()})
+                rows[i] = row
+                _cache_put(_METRICS_CACHE, (inputs_fp, lanes[i], fingerprints[i]), row)
+                _CACHE_COUNTERS["misses"] += 1
+
+    return pd.DataFrame(rows)
+
+
+def compute_lane_metrics(lane_df: pd.DataFrame, inputs: Dict[str, Any], lane_name: str = "Aggregate") -> Dict[str, Any]:
+    """Computes the metric row for a single lane through the shared portfolio engine."""
+    frame = lane_df[["demand"] + (["date"] if "date" in lane_df.columns else [])].assign(product_name=lane_name)
+    return compute_portfolio_metrics(frame, inputs).iloc[0].to_dict()
+
+
+def to_metrics_dict(row: Dict[str, Any], inputs: Dict[str, Any]) -> Dict[str, Any]:
+    """Formats an engine row into the metrics payload consumed by the UI, AI and PDF layers."""
+    return {
+        "avg_demand": int(row["total_workload"]),
+        "std_dev": int(row["std_dev_demand"]),
+        "lead_time": inputs["lead_time"],
+        "safety_stock": int(row["safety_stock"]),
+        "sla": inputs["sla"],
+        "product_name": row["lane"],
+        "return_vol": int(row["return_vol"]),
+        "outsourced": int(row["outsourced_vol"]),
+        "resilience_score": row["resilience_score"],
+        "dependency_ratio": row["dependency_ratio"],
+        "lead_time_risk": inputs["lead_time_volatility"],
+        "unit_cost": inputs["unit_cost"],
+        "selling_price": inputs["selling_price"],
+        "holding_cost": inputs["holding_cost"],
+        "stockout_cost": inputs["stockout_cost"],
+        "loyalty_score": row["loyalty_score"],
+        "co2_emissions": row["co2_emissions"],
+        "co2_saved": row["co2_saved"],
+        "transport_mode": inputs["transport_mode"],
+        "expected_shortage": row["expected_shortage"],
+        "penalty_cost": row["penalty_cost"],
+        "reliability_score": row["reliability_score"]
+    }
+
+
+def cache_info() -> Dict[str, int]:
+    """Reports engine cache occupancy and hit/miss counters."""
+    with _CACHE_LOCK:
+        return {
+            "lane_stats": len(_STATS_CACHE),
+            "lane_metrics": len(_METRICS_CACHE),
+            "hits": _CACHE_COUNTERS["hits"],
+            "misses": _CACHE_COUNTERS["misses"]
+        }
+
+
+def clear_cache() -> None:
+    """Drops all memoised lane statistics and metric rows."""
+    with _CACHE_LOCK:
+        _STATS_CACHE.clear()
+        _METRICS_CACHE.clear()
+        _CACHE_COUNTERS["hits"] = 0
+        _CACHE_COUNTERS["misses"] = 0
@@ -1,52 +1,143 @@
-from typing import Dict, Tuple, Union
+from typing import Dict, Optional, Tuple, Union
 import numpy as np
-import pandas as pd
-import plotly.express as px
 from plotly.graph_objs import Figure
 
+import analytic_risk
+import chart_helpers
+import parallel_mc
+import result_cache
+import sim_kernels
+import streaming_stats
 
-def run_simulation(
+DEFAULT_SEED = 42
+TRIM_QUANTILES = (0.01, 0.99)
+VAR_QUANTILE = 0.05
+STREAM_CHUNK_SIZE = 1_000_000
+STREAM_TAIL_SIGMAS = 8.0
+
+
+def sample_profits(
     avg_demand: float,
     std_dev: float,
-    capacity_limit: int,
+    capacity_limit: float,
     unit_cost: float,
     selling_price: float,
     holding_cost: float,
     stockout_cost: float,
-    num_simulations: int = 10000
-) -> Tuple[Figure, Dict[str, Union[int, float]]]:
-    """Executes a vectorized Monte Carlo simulation to evaluate financial risk profiles."""
-    np.random.seed(42)
-
-    raw_demands = np.random.normal(loc=avg_demand, scale=std_dev, size=num_simulations)
-    demands = np.maximum(0, np.round(raw_demands)).astype(int)
-
-    sold_units = np.minimum(demands, capacity_limit)
-    lost_sales = np.maximum(0, demands - capacity_limit)
-    unsold_inventory = np.maximum(0, capacity_limit - demands)
-
-    revenue = sold_units * selling_price
-    handling_cost_total = sold_units * unit_cost
-    holding_cost_total = unsold_inventory * holding_cost
-    penalty_cost_total = lost_sales * stockout_cost
-
-    profits = revenue - handling_cost_total - holding_cost_total - penalty_cost_total
-    sim_df = pd.DataFrame({"profit": profits})
-
-    avg_profit = float(sim_df["profit"].mean())
-    loss_probability = float((sim_df[sim_df["profit"] < 0].shape[0] / num_simulations) * 100)
-    var_95 = float(sim_df["profit"].quantile(0.05))
-
-    q_low = float(sim_df["profit"].quantile(0.01))
-    q_high = float(sim_df["profit"].quantile(0.99))
-    plot_df = sim_df[(sim_df["profit"] > q_low) & (sim_df["profit"] < q_high)]
-
-    fig = px.histogram(
-        plot_df,
-        x="profit",
-        nbins=50,
-        title=f"Monte Carlo Risk Distribution ({num_simulations:,} Iterations)",
-        color_discrete_sequence=['#1f77b4']
+    num_simulations: int = 10000,
+    seed: Optional[int] = DEFAULT_SEED,
+    dtype: type = np.float64,
+    rng: Optional[np.random.Generator] = None
+) -> np.ndarray:
+    """Draws single-period profits from a PCG64 Generator, reusing one buffer for demand and profit."""
+    if rng is None:
+        rng = np.random.Generator(np.random.PCG64(seed))
+
+    draws = rng.standard_normal(num_simulations, dtype=dtype)
+    draws *= std_dev
+    draws += avg_demand
+    return sim_kernels.newsvendor_profits(
+        draws, capacity_limit, selling_price, unit_cost, holding_cost, stockout_cost, out=draws
+    )
+
+
+def profit_bounds(
+    avg_demand: float,
+    std_dev: float,
+    capacity_limit: float,
+    unit_cost: float,
+    selling_price: float,
+    holding_cost: float,
+    stockout_cost: float
+) -> Tuple[float, float]:
+    """Profit range covering zero demand up to demand STREAM_TAIL_SIGMAS above the mean."""
+    margin = selling_price - unit_cost
+    peak_demand = max(avg_demand + STREAM_TAIL_SIGMAS * std_dev, capacity_limit)
+    high = margin * capacity_limit
+    low = min(-holding_cost * capacity_limit, high - stockout_cost * (peak_demand - capacity_limit))
+    return low, high if high > low else low + 1.0
+
+
+def stream_profit_risk(
+    avg_demand: float,
+    std_dev: float,
+    capacity_limit: float,
+    unit_cost: float,
+    selling_price: float,
+    holding_cost: float,
+    stockout_cost: float,
+    num_simulations: int = 10000,
+    seed: Optional[int] = DEFAULT_SEED,
+    dtype: type = np.float64,
+    chunk_size: int = STREAM_CHUNK_SIZE,
+    bins: int = 2000
+) -> Dict[str, Union[float, int, np.ndarray]]:
+    """
+    Memory-bounded Monte Carlo: profits are generated in fixed-size chunks from one Generator and fed
+    to online accumulators, so peak memory is set by `chunk_size` rather than `num_simulations`.
+    Mean/variance are exact; VaR/CVaR and trim bounds come from a t-digest (see streaming_stats for
+    error bounds). Also returns the histogram as `hist_counts`/`hist_edges` for plotting.
+    """
+    rng = np.random.Generator(np.random.PCG64(seed))
+    params = (avg_demand, std_dev, capacity_limit, unit_cost, selling_price, holding_cost, stockout_cost)
+    acc = streaming_stats.StreamingProfitRisk(*profit_bounds(*params), bins=bins)
+
+    remaining = num_simulations
+    while remaining > 0:
+        n = min(chunk_size, remaining)
+        acc.update(sample_profits(*params, num_simulations=n, dtype=dtype, rng=rng))
+        remaining -= n
+
+    result = acc.result(VAR_QUANTILE)
+    result["hist_counts"], result["hist_edges"] = acc.histogram.payload()
+    return result
+
+
+def simulate_profit_risk(
+    avg_demand: float,
+    std_dev: float,
+    capacity_limit: float,
+    unit_cost: float,
+    selling_price: float,
+    holding_cost: float,
+    stockout_cost: float,
+    num_simulations: int = 10000,
+    seed: Optional[int] = DEFAULT_SEED,
+    dtype: type = np.float64,
+    keep_samples: bool = False,
+    workers: Optional[int] = 1,
+    streaming: bool = False
+) -> Dict[str, Union[float, int, np.ndarray]]:
+    """
+    Figure-free Monte Carlo engine returning the risk statistics (and optionally the raw profits).
+    Paths are drawn in SeedSequence-spawned chunks (parallel_mc), run in-process for `workers`=1
+    and across a process pool otherwise (None uses every core), so every worker count returns
+    identical results. `streaming` switches to constant-memory chunked accumulation.
+    """
+    if streaming:
+        if keep_samples:
+            raise ValueError("keep_samples is not supported in streaming mode.")
+        return stream_profit_risk(
+            avg_demand, std_dev, capacity_limit, unit_cost, selling_price, holding_cost, stockout_cost,
+            num_simulations=num_simulations, seed=seed, dtype=dtype
+        )
+    return parallel_mc.run_parallel_profit_risk(
+        avg_demand, std_dev, capacity_limit, unit_cost, selling_price, holding_cost, stockout_cost,
+        num_simulations=num_simulations, seed=seed, workers=workers, dtype=dtype, keep_samples=keep_samples
+    )
+
+
+def plot_profit_distribution(counts: np.ndarray, edges: np.ndarray, stats: Dict[str, float]) -> Figure:
+    """Renders a pre-binned profit histogram with the expected profit, VaR and loss-zone overlays."""
+    q_low = stats["q_low"]
+    avg_profit, var_95 = stats["avg_profit"], stats["var_95"]
+
+    fig = Figure(chart_helpers.histogram_bar(counts, edges, color='#1f77b4'))
+    fig.update_layout(
+        title=(f"Analytic Risk Distribution (expected counts, N={stats['num_simulations']:,})"
+               if stats.get("method") == "analytic"
+               else f"Monte Carlo Risk Distribution ({stats['num_simulations']:,} Iterations)"),
+        bargap=0
     )
 
     fig.add_vrect(
@@ -76,8 +167,54 @@ def run_simulation(
         height=350
     )
 
+    return fig
+
+
+@result_cache.disk_cache()
+def run_simulation(
+    avg_demand: float,
+    std_dev: float,
+    capacity_limit: int,
+    unit_cost: float,
+    selling_price: float,
+    holding_cost: float,
+    stockout_cost: float,
+    num_simulations: int = 10000,
+    seed: Optional[int] = DEFAULT_SEED,
+    dtype: type = np.float64,
+    method: str = "auto"
+) -> Tuple[Figure, Dict[str, Union[int, float]]]:
+    """
+    Executes a vectorized Monte Carlo simulation to evaluate financial risk profiles.
+    `method` 'auto' uses the closed-form evaluator (analytic_risk) whenever it applies, 'analytic' forces it
+    and 'monte_carlo' always samples. Runs above STREAM_CHUNK_SIZE paths use the constant-memory streaming
+    engine; either way the chart is binned on the server to DISPLAY_BINS bars over the 1%-99% range.
+    """
+    if method not in ("auto", "analytic", "monte_carlo"):
+        raise ValueError("method must be 'auto', 'analytic' or 'monte_carlo'.")
+    params = (avg_demand, std_dev, capacity_limit, unit_cost, selling_price, holding_cost, stockout_cost)
+    use_analytic = method == "analytic" or (
+        method == "auto" and analytic_risk.analytic_applicable(avg_demand, std_dev, *params[3:])
+    )
+    if use_analytic:
+        result = analytic_risk.analytic_profit_risk(
+            *params, var_quantile=VAR_QUANTILE, trim_quantiles=TRIM_QUANTILES, num_simulations=num_simulations
+        )
+        edges = np.linspace(result["q_low"], result["q_high"], chart_helpers.DISPLAY_BINS + 1)
+        counts = analytic_risk.profit_histogram(edges, *params, total=num_simulations)
+    elif num_simulations > STREAM_CHUNK_SIZE:
+        result = stream_profit_risk(*params, num_simulations=num_simulations, seed=seed, dtype=dtype)
+        trim = (result["q_low"], result["q_high"])
+        counts, edges = chart_helpers.rebin(result["hist_counts"], result["hist_edges"], value_range=trim)
+    else:
+        result = simulate_profit_risk(*params, num_simulations=num_simulations, seed=seed, dtype=dtype,
+                                      keep_samples=True)
+        trim = (result["q_low"], result["q_high"])
+        counts, edges = chart_helpers.bin_values(result["profits"], value_range=trim)
+    fig = plot_profit_distribution(counts, edges, result)
+
     return fig, {
-        "avg_profit": int(avg_profit),
-        "loss_prob": round(loss_probability, 1),
-        "var_95": int(var_95)
+        "avg_profit": int(result["avg_profit"]),
+        "loss_prob": round(result["loss_prob"], 1),
+        "var_95": int(result["var_95"])
     }
@@ -0,0 +1,184 @@
+import math
+from typing import Any, Dict, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+import metrics_engine
+import result_cache
+
+DEFAULT_PATH_CHUNK = 8192
+_MIN_SHRINKAGE = 1e-6
+
+
+def lane_demand_matrix(data: pd.DataFrame, lane_column: str = "product_name") -> pd.DataFrame:
+    """Pivots the inventory history into a (date x lane) demand matrix; gaps are filled with the lane mean."""
+    matrix = data.pivot_table(index="date", columns=lane_column, values="demand", aggfunc="sum").sort_index()
+    return matrix.fillna(matrix.mean())
+
+
+def shrink_correlation(history: np.ndarray) -> Tuple[np.ndarray, float]:
+    """
+    Shrinks the sample correlation matrix of an (observations x lanes) history towards the identity
+    with the analytic Schafer-Strimmer intensity. The result is positive definite for any intensity > 0,
+    even with more lanes than observations. Constant lanes get zero correlation.
+    """
+    n, p = history.shape
+    centered = history - history.mean(axis=0)
+    std = centered.std(axis=0, ddof=1) if n > 1 else np.zeros(p)
+    scale = np.where(std > 0.0, std, 1.0)
+    x = centered / scale
+    x[:, std == 0.0] = 0.0
+
+    # Sums over observations of w_kij = x_ki * x_kj and w_kij^2 via two (lanes x lanes) products
+    w_sum = x.T @ x
+    w_sq_sum = np.square(x).T @ np.square(x)
+    corr = w_sum / max(n - 1, 1)
+    w_var = n / max(n - 1, 1) ** 3 * (w_sq_sum - np.square(w_sum) / n)
+
+    off = ~np.eye(p, dtype=bool)
+    denom = float(np.square(corr[off]).sum())
+    shrinkage = float(w_var[off].sum() / denom) if denom > 0.0 else 1.0
+    shrinkage = min(1.0, max(_MIN_SHRINKAGE, shrinkage))
+
+    shrunk = (1.0 - shrinkage) * corr
+    np.fill_diagonal(shrunk, 1.0)
+    return shrunk, shrinkage
+
+
+def estimate_lane_covariance(data: pd.DataFrame, lane_column: str = "product_name") -> Dict[str, Any]:
+    """Estimates per-lane mean/std and the shrunk covariance matrix from the inventory history."""
+    matrix = lane_demand_matrix(data, lane_column)
+    history = matrix.to_numpy(dtype=np.float64)
+    corr, shrinkage = shrink_correlation(history)
+    std = history.std(axis=0, ddof=1) if history.shape[0] > 1 else np.zeros(history.shape[1])
+    return {
+        "lanes": [str(c) for c in matrix.columns],
+        "mean": history.mean(axis=0),
+        "std": std,
+        "correlation": corr,
+        "covariance": corr * np.outer(std, std),
+        "shrinkage": shrinkage,
+        "observations": history.shape[0]
+    }
+
+
+def correlated_demands(
+    rng: np.random.Generator,
+    num_paths: int,
+    mean: np.ndarray,
+    scaled_cholesky: np.ndarray
+) -> np.ndarray:
+    """Draws a (paths x lanes) block of correlated Normal demand as mean + Z @ L.T in one matrix product."""
+    draws = rng.standard_normal((num_paths, mean.shape[0])) @ scaled_cholesky.T
+    draws += mean
+    return draws
+
+
+def lane_profits(
+    demands: np.ndarray,
+    capacities: np.ndarray,
+    unit_margin: float,
+    holding_cost: float,
+    stockout_cost: float
+) -> np.ndarray:
+    """In-place per-lane newsvendor profit for a (paths x lanes) demand block with per-lane capacity."""
+    np.rint(demands, out=demands)
+    np.maximum(demands, 0.0, out=demands)
+    shortfall = demands - capacities
+    np.maximum(shortfall, 0.0, out=shortfall)
+    shortfall *= stockout_cost
+    np.minimum(demands, capacities, out=demands)
+    demands *= unit_margin + holding_cost
+    demands -= holding_cost * capacities
+    demands -= shortfall
+    return demands
+
+
+def _lowest_rows(values: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k smallest entries of a 1-D array (unordered)."""
+    if values.shape[0] <= k:
+        return np.arange(values.shape[0])
+    return np.argpartition(values, k - 1)[:k]
+
+
+@result_cache.disk_cache()
+def simulate_network_risk(
+    data: pd.DataFrame,
+    inputs: Dict[str, Any],
+    num_paths: int = 100000,
+    alpha: float = 0.05,
+    seed: Optional[int] = 42,
+    chunk_size: int = DEFAULT_PATH_CHUNK,
+    lane_column: str = "product_name"
+) -> Dict[str, Union[float, int, pd.DataFrame]]:
+    """
+    Simulates correlated single-period demand across every lane and aggregates lane profits into
+    network profit. Lane means, capacities and unit economics follow metrics_engine; correlation comes
+    from the shrunk history estimate. Paths are generated in chunks and only the running global
+    lowest-k network outcomes (k = ceil(alpha * paths)) are retained, so memory is O(k x lanes).
+    CVaR contributions are Euler allocations E[lane profit | network profit in the tail] and sum to CVaR.
+    """
+    estimate = estimate_lane_covariance(data, lane_column)
+    portfolio = metrics_engine.compute_portfolio_metrics(data, inputs, lane_column).set_index("lane")
+    lanes = estimate["lanes"]
+    portfolio = portfolio.loc[lanes]
+
+    mean = portfolio["total_workload"].to_numpy(dtype=np.float64)
+    capacities = portfolio["required_capacity"].to_numpy(dtype=np.float64)
+    std = portfolio["std_dev_demand"].fillna(0.0).to_numpy(dtype=np.float64)
+    scaled_cholesky = np.linalg.cholesky(estimate["correlation"]) * std[:, None]
+    unit_margin = float(inputs["selling_price"]) - float(inputs["unit_cost"])
+    holding_cost, stockout_cost = float(inputs["holding_cost"]), float(inputs["stockout_cost"])
+
+    rng = np.random.Generator(np.random.PCG64(seed))
+    k = max(1, math.ceil(alpha * num_paths))
+    p = len(lanes)
+    tail_network = np.empty(0)
+    tail_lanes = np.empty((0, p))
+    standalone_tail = np.empty((0, p))
+    lane_sums = np.zeros(p)
+    network_sum, losses = 0.0, 0
+
+    remaining = num_paths
+    while remaining > 0:
+        n = min(chunk_size, remaining)
+        profits = lane_profits(correlated_demands(rng, n, mean, scaled_cholesky),
+                               capacities, unit_margin, holding_cost, stockout_cost)
+        network = profits.sum(axis=1)
+        lane_sums += profits.sum(axis=0)
+        network_sum += float(network.sum())
+        losses += int(np.count_nonzero(network < 0.0))
+
+        idx = _lowest_rows(network, k)
+        tail_network = np.concatenate([tail_network, network[idx]])
+        tail_lanes = np.vstack([tail_lanes, profits[idx]])
+        keep = _lowest_rows(tail_network, k)
+        tail_network, tail_lanes = tail_network[keep], tail_lanes[keep]
+
+        standalone_tail = np.vstack([standalone_tail, profits])
+        if standalone_tail.shape[0] > k:
+            standalone_tail = np.partition(standalone_tail, k - 1, axis=0)[:k]
+        remaining -= n
+
+    contributions = tail_lanes.mean(axis=0)
+    cvar = float(tail_network.mean())
+    standalone_cvar = standalone_tail.mean(axis=0)
+    table = pd.DataFrame({
+        "lane": lanes,
+        "avg_profit": lane_sums / num_paths,
+        "cvar_contribution": contributions,
+        "contribution_pct": contributions / cvar * 100.0 if cvar != 0.0 else np.nan,
+        "standalone_cvar": standalone_cvar
+    })
+    return {
+        "avg_profit": network_sum / num_paths,
+        "loss_prob": losses / num_paths * 100,
+        "var": float(tail_network.max()),
+        "cvar": cvar,
+        "alpha": alpha,
+        "diversification_benefit": cvar - float(standalone_cvar.sum()),
+        "shrinkage": estimate["shrinkage"],
+        "num_paths": num_paths,
+        "contributions": table
+    }
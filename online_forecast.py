@@ -0,0 +1,288 @@
+"""
+Online forecast state per lane, advanced in O(1) per new daily record.
+
+A lane's state is seeded once from a batch fit: forecast_engine picks the model, the Holt-Winters
+smoothing constants and the seasonal indices, and the closed periods are replayed through the
+state. After that:
+
+* A new record only touches the open period's running day totals (Welford over daily totals).
+* When a record opens a new period, the closed period's mean advances the model by one step. For
+  Holt-Winters that is one recursion step with the fitted constants. For the trend models it is a
+  recursive-least-squares update of the line on the seasonally adjusted value: exact OLS, with SSE
+  updated as e^2 / (1 + x'Px).
+* A forecast applies one provisional step for the open, partial period to a copy of the state, just
+  as the batch engine treats the latest partial period as an observation.
+
+With the model and constants held fixed, this reproduces the batch engine's numbers exactly.
+States are stored per lane in the shared result store. A state is reseeded after RESEED_PERIODS new
+periods, or when records arrive out of order or no longer match the lane's history (e.g. after
+deletes or back-filled imports).
+"""
+import copy
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+import forecast
+import forecast_engine
+import result_cache
+
+STATE_VERSION = 1
+RESEED_PERIODS = 3
+# Re-reads of a lane's state tolerated when concurrent writers keep advancing it
+SAVE_RETRIES = 3
+
+
+class OnlineLaneForecaster:
+    """Streaming forecast state for one lane; build it with `seed`."""
+
+    def __init__(self, lane: str, model: str, grain: str = "M"):
+        self.lane = lane
+        self.model = model
+        self.grain = grain
+        self.season = forecast_engine.SEASON_LENGTHS[grain]
+        self.t = 0
+        self.stale = False
+        self.periods_since_seed = 0
+        # Holt-Winters state, or the fixed seasonal indices of the trend models
+        self.params = np.zeros(3)
+        self.level = 0.0
+        self.slope = 0.0
+        self.seasonal = np.zeros(self.season)
+        self.hw_sse = 0.0
+        # Recursive least squares for the trend line
+        self.theta = np.zeros(2)
+        self.gram_inv = np.eye(2)
+        self.line_sse = 0.0
+        self.line_count = 0
+        # Open period: Welford over closed days, plus the running total of the current day
+        self.period: Optional[pd.Period] = None
+        self.day: Optional[pd.Timestamp] = None
+        self.day_total = 0.0
+        self.days = 0
+        self.day_mean = 0.0
+        self.day_m2 = 0.0
+        self.within_m2 = 0.0
+        self.within_days = 0
+        # Cheap identity of the history absorbed so far
+        self.records = 0
+        self.demand_total = 0.0
+
+    @classmethod
+    def seed(cls, lane_df: pd.DataFrame, lane: str = "Aggregate", model: str = "auto",
+             grain: str = "M") -> Optional["OnlineLaneForecaster"]:
+        """Fits the lane in batch and replays its closed periods; None when the history is too short."""
+        packed = forecast_engine.pack_lanes(lane_df.assign(product_name=lane), grain)
+        n = int(packed["lengths"][0])
+        if n < forecast_engine.MIN_PERIODS:
+            return None
+        values = packed["values"][:, :n]
+        state = cls(lane, model, grain)
+        season = state.season
+        chosen = forecast_engine.forecast_lanes(lane_df.assign(product_name=lane), 1, grain, model)["model"].iloc[0]
+        state.model = "decomposition" if chosen == "holt_winters" and n - 1 < 2 * season else chosen
+
+        if state.model == "holt_winters":
+            state.params = forecast_engine.holt_winters_batch(values, packed["lengths"], 1, season)["params"][0]
+            level, slope, seasonal = forecast_engine.holt_winters_init(values, season)
+            state.level, state.slope, state.seasonal = float(level[0]), float(slope[0]), seasonal[0].copy()
+            for y in values[0, :n - 1]:
+                state._advance(float(y))
+        else:
+            if state.model == "decomposition":
+                state.seasonal = forecast_engine.decomposition_batch(values, packed["lengths"], 1, season)["seasonal"][0]
+            x = np.arange(n - 1, dtype=np.float64)
+            design = np.column_stack([np.ones_like(x), x])
+            adjusted = values[0, :n - 1] - state.seasonal[np.arange(n - 1) % season]
+            state.gram_inv = np.linalg.inv(design.T @ design)
+            state.theta = state.gram_inv @ design.T @ adjusted
+            state.line_sse = float(((adjusted - design @ state.theta) ** 2).sum())
+            state.line_count = n - 1
+            state.t = n - 1
+
+        # Day-level bookkeeping for the closed periods and the open one
+        daily = lane_df.groupby(pd.to_datetime(lane_df["date"]).dt.normalize())["demand"].sum()
+        periods = daily.index.to_period(grain)
+        last = periods.max()
+        closed = daily[periods != last]
+        state.within_m2 = float(((closed - closed.groupby(periods[periods != last]).transform("mean")) ** 2).sum())
+        state.within_days = int(closed.shape[0])
+        open_days = daily[periods == last]
+        state.period, state.day = last, open_days.index[-1]
+        state.day_total = float(open_days.iloc[-1])
+        previous = open_days.iloc[:-1].to_numpy(dtype=np.float64)
+        state.days = int(previous.shape[0])
+        state.day_mean = float(previous.mean()) if state.days else 0.0
+        state.day_m2 = float(((previous - state.day_mean) ** 2).sum()) if state.days else 0.0
+        state.records = int(len(lane_df))
+        state.demand_total = float(lane_df["demand"].sum())
+        return state
+
+    def _advance(self, y: float) -> None:
+        """Absorbs one period mean."""
+        phase = self.t % self.season
+        if self.model == "holt_winters":
+            alpha, beta, gamma = self.params
+            s = self.seasonal[phase]
+            error = y - (self.level + self.slope + s)
+            if self.t >= self.season:
+                self.hw_sse += error * error
+            level = alpha * (y - s) + (1.0 - alpha) * (self.level + self.slope)
+            self.slope = beta * (level - self.level) + (1.0 - beta) * self.slope
+            self.seasonal[phase] = gamma * (y - level) + (1.0 - gamma) * s
+            self.level = level
+        else:
+            x = np.array([1.0, float(self.t)])
+            px = self.gram_inv @ x
+            denominator = 1.0 + x @ px
+            error = y - self.seasonal[phase] - self.theta @ x
+            self.theta = self.theta + px * (error / denominator)
+            self.gram_inv = self.gram_inv - np.outer(px, px) / denominator
+            self.line_sse += error * error / denominator
+            self.line_count += 1
+        self.t += 1
+
+    def _close_day(self) -> None:
+        self.days += 1
+        delta = self.day_total - self.day_mean
+        self.day_mean += delta / self.days
+        self.day_m2 += delta * (self.day_total - self.day_mean)
+
+    def observe(self, date, demand: float) -> bool:
+        """Absorbs one record in O(1); returns False (and marks the state stale) if it cannot."""
+        day = pd.Timestamp(date).normalize()
+        if self.stale or day < self.day:
+            self.stale = True
+            return False
+        if day > self.day:
+            self._close_day()
+            period = day.to_period(self.grain)
+            if period != self.period:
+                if period.ordinal - self.period.ordinal > 1:
+                    # Skipped periods need the batch engine's interpolation
+                    self.stale = True
+                    return False
+                self._advance(self.day_mean)
+                self.within_m2 += self.day_m2
+                self.within_days += self.days
+                self.days, self.day_mean, self.day_m2 = 0, 0.0, 0.0
+                self.period = period
+                self.periods_since_seed += 1
+            self.day, self.day_total = day, 0.0
+        self.day_total += float(demand)
+        self.records += 1
+        self.demand_total += float(demand)
+        return True
+
+    def matches(self, lane_df: pd.DataFrame) -> bool:
+        """True when the state has absorbed exactly this history (record count, volume and last day)."""
+        return (
+            not self.stale
+            and len(lane_df) == self.records
+            and np.isclose(float(lane_df["demand"].sum()), self.demand_total)
+            and pd.Timestamp(pd.to_datetime(lane_df["date"]).max()).normalize() == self.day
+        )
+
+    def forecast(self, months: int = 3) -> pd.DataFrame:
+        """Forecast with the generate_forecast contract, treating the open period as observed."""
+        state = copy.deepcopy(self)
+        state._close_day()
+        state._advance(state.day_mean)
+        within = np.sqrt((state.within_m2 + state.day_m2) / max(state.within_days + state.days, 1))
+
+        steps = np.arange(1, months + 1)
+        if state.model == "holt_winters":
+            phases = (state.t - 1 + steps) % state.season
+            mean = state.level + steps * state.slope + state.seasonal[phases]
+            sigma = np.sqrt(state.hw_sse / max(state.t - state.season, 1))
+            factor = forecast_engine.holt_winters_variance_factor(state.params[None, :], months, state.season)
+            std = sigma * np.sqrt(factor[0])
+        else:
+            x = (state.t - 1 + steps).astype(np.float64)
+            design = np.column_stack([np.ones_like(x), x])
+            mean = design @ state.theta + state.seasonal[(state.t - 1 + steps) % state.season]
+            sigma = np.sqrt(state.line_sse / max(state.line_count - 2, 1))
+            std = sigma * np.sqrt(1.0 + np.einsum("ij,jk,ik->i", design, state.gram_inv, design))
+
+        std = np.sqrt(std ** 2 + within ** 2)
+        return pd.DataFrame({
+            "date": [(state.period + int(h)).start_time for h in steps],
+            "demand": np.maximum(0.0, mean),
+            "demand_upper": np.maximum(0.0, mean + forecast_engine.Z_95 * std),
+            "demand_lower": np.maximum(0.0, mean - forecast_engine.Z_95 * std),
+            "type": "Forecast"
+        })
+
+
+def _state_key(lane: str, model: str) -> str:
+    return result_cache.stable_hash("online-forecast", STATE_VERSION, lane, model)
+
+
+def load_state(lane: str, model: str = "auto") -> Optional[OnlineLaneForecaster]:
+    found, state = result_cache.load_entry(_state_key(lane, model))
+    return state if found else None
+
+
+def save_state(state: OnlineLaneForecaster, model: str = "auto") -> None:
+    result_cache.store_entry(_state_key(state.lane, model), state)
+
+
+def _absorb(state: OnlineLaneForecaster, rows: pd.DataFrame) -> int:
+    return sum(state.observe(date, demand) for date, demand in zip(rows["date"], rows["demand"]))
+
+
+def observe_records(records: pd.DataFrame, model: str = "auto", lane_column: str = "product_name") -> int:
+    """
+    Streams new records into each lane's stored state (date order within a lane); returns records absorbed
+    and saved (saving is best effort).
+    Writers race through the shared store, so before saving the stored state is re-read: when another
+    process advanced it meanwhile (its record count moved), the rows are re-applied to that newer state,
+    and after SAVE_RETRIES conflicts the lane is marked stale so the next forecast reseeds it.
+    """
+    absorbed = 0
+    for lane, rows in records.sort_values("date", kind="stable").groupby(lane_column, sort=False):
+        state = load_state(lane, model)
+        for _ in range(SAVE_RETRIES):
+            if state is None:
+                break
+            seen = state.records
+            count = _absorb(state, rows)
+            current = load_state(lane, model)
+            if current is None or current.records == seen:
+                try:
+                    save_state(state, model)
+                    absorbed += count
+                except OSError:
+                    pass
+                break
+            state = current
+        else:
+            state.stale = True
+            try:
+                save_state(state, model)
+            except OSError:
+                pass
+    return absorbed
+
+
+def observe_record(lane: str, date, demand: float, model: str = "auto") -> bool:
+    """O(1) update of a lane's stored state with one new record; False when the lane needs a reseed."""
+    return bool(observe_records(pd.DataFrame({"product_name": [lane], "date": [date], "demand": [demand]}), model))
+
+
+def forecast_lane(lane: str, lane_df: pd.DataFrame, months: int = 3, model: str = "auto") -> Optional[pd.DataFrame]:
+    """
+    Forecasts from the lane's online state when it matches `lane_df`, reseeding (one batch fit) when
+    it is missing, stale, out of sync or RESEED_PERIODS periods old. Short histories use generate_forecast.
+    """
+    state = load_state(lane, model)
+    if state is None or not state.matches(lane_df) or state.periods_since_seed >= RESEED_PERIODS:
+        state = OnlineLaneForecaster.seed(lane_df, lane, model)
+        if state is None:
+            return forecast.generate_forecast(lane_df, months, model)
+        try:
+            save_state(state, model)
+        except OSError:
+            pass
+    return state.forecast(months)
@@ -0,0 +1,68 @@
+"""
+Precomputed profit response surface over service level x lead-time volatility, for any holding cost
+and stockout penalty.
+
+Profit = A*m - h*z*s_eff(sigma_LT) - (pi + m)*sigma*L(z) is linear in both h and pi, so they are not
+stored as axes. Each cube keeps the per-axis coefficients instead: the (service level x sigma_LT)
+safety stock z*s_eff that h multiplies, and the per-service-level expected shortage sigma*L(z) that
+(pi + m) multiplies. Every (h, pi) slice, including cost curves, is then exact and costs one
+multiply-add over the grid. Only the service-level and sigma_LT axes are sampled. Cubes are keyed on
+demand and price, never on the cost sliders, so moving holding or stockout cost only re-slices an
+existing cube.
+"""
+import threading
+from collections import OrderedDict
+from typing import Dict, Tuple
+
+import numpy as np
+from scipy.stats import norm
+
+import sla_solver
+
+SERVICE_LEVELS = np.linspace(0.50, 0.99, 100)
+LEAD_TIME_VARS = np.linspace(0.0, 2.0, 41)
+
+_MAX_CUBES = 16
+_CUBE_LOCK = threading.Lock()
+_CUBES: "OrderedDict[Tuple[float, float, float], Dict[str, np.ndarray]]" = OrderedDict()
+
+
+def _build_cube(avg_demand: float, std_dev: float, margin: float) -> Dict[str, np.ndarray]:
+    z = norm.ppf(SERVICE_LEVELS)
+    s_eff = np.sqrt(std_dev ** 2 + avg_demand ** 2 * LEAD_TIME_VARS ** 2)
+    return {
+        "base_profit": np.float64(avg_demand * margin),
+        "margin": np.float64(margin),
+        "safety_stock": z[:, None] * s_eff[None, :],
+        "expected_shortage": std_dev * sla_solver.standard_loss(z),
+        "service_levels": SERVICE_LEVELS,
+        "lead_time_vars": LEAD_TIME_VARS
+    }
+
+
+def get_profit_cube(avg_demand: float, std_dev: float, margin: float) -> Dict[str, np.ndarray]:
+    """Returns the profit cube coefficients for a demand/price setting from memory or a single broadcast build."""
+    key = (float(avg_demand), float(std_dev), float(margin))
+    with _CUBE_LOCK:
+        cube = _CUBES.get(key)
+        if cube is not None:
+            _CUBES.move_to_end(key)
+            return cube
+    cube = _build_cube(*key)
+    with _CUBE_LOCK:
+        _CUBES[key] = cube
+        while len(_CUBES) > _MAX_CUBES:
+            _CUBES.popitem(last=False)
+    return cube
+
+
+def cost_slice(cube: Dict[str, np.ndarray], holding_cost: float, stockout_cost: float) -> Dict[str, np.ndarray]:
+    """Holding, stockout and total cost over (service level x sigma_LT) at the given costs; exact at any costs."""
+    holding = holding_cost * cube["safety_stock"]
+    stockout = np.broadcast_to(((stockout_cost + cube["margin"]) * cube["expected_shortage"])[:, None], holding.shape)
+    return {"holding": holding, "stockout": stockout, "total": holding + stockout}
+
+
+def slice_profit(cube: Dict[str, np.ndarray], holding_cost: float, stockout_cost: float) -> np.ndarray:
+    """(service level x sigma_LT) profit surface at the given costs."""
+    return cube["base_profit"] - cost_slice(cube, holding_cost, stockout_cost)["total"]
@@ -1,7 +1,11 @@
 import numpy as np
-import scipy.stats as stats
 import plotly.graph_objects as go
 
+import profit_cube
+import result_cache
+import sla_solver
+
+
 def calculate_profit_scenarios(
     avg_demand: float,
     std_dev: float,
@@ -10,45 +14,47 @@ def calculate_profit_scenarios(
     unit_cost: float,
     selling_price: float
 ) -> go.Figure:
-    """Generates a Profit Heatmap using vectorized meshgrid optimization."""
+    """Renders the profit heatmap as a slice of the cached profit cube, overlaid with the exact optimal SLA per volatility."""
     margin = selling_price - unit_cost
 
-    service_levels = np.linspace(0.50, 0.99, 20)
-    lead_time_vars = np.linspace(0.0, 2.0, 20)
-    z_scores = stats.norm.ppf(service_levels)
-
-    z_grid, lt_grid = np.meshgrid(z_scores, lead_time_vars)
-
-    ss_grid = z_grid * np.sqrt((1.0 * std_dev ** 2) + (avg_demand ** 2 * lt_grid ** 2))
-    hc_grid = ss_grid * holding_cost
+    cube = profit_cube.get_profit_cube(avg_demand, std_dev, margin)
+    service_levels, lead_time_vars = cube["service_levels"], cube["lead_time_vars"]
+    profit_matrix = profit_cube.slice_profit(cube, holding_cost, stockout_cost).T
 
-    loss_grid = stats.norm.pdf(z_grid) - z_grid * (1.0 - stats.norm.cdf(z_grid))
-    es_grid = std_dev * loss_grid
-
-    penalty_grid = es_grid * (stockout_cost + margin)
-    gross_profit = avg_demand * margin
-
-    profit_matrix = gross_profit - (hc_grid + penalty_grid)
+    # Exact optimum along a fine volatility axis (closed-form first-order condition, no grid search)
+    fine_lt = np.linspace(0.0, 2.0, 200)
+    best = sla_solver.optimal_service_level(
+        holding_cost, stockout_cost, margin, std_dev, np.sqrt(std_dev ** 2 + avg_demand ** 2 * fine_lt ** 2)
+    )
 
     fig = go.Figure(data=go.Heatmap(
         z=profit_matrix,
-        x=[f"{sl:.0%}" for sl in service_levels],
-        y=[f"{lt:.1f}" for lt in lead_time_vars],
+        x=service_levels,
+        y=lead_time_vars,
         colorscale='Viridis',
         hoverongaps=False,
-        hovertemplate="Service Level: %{x}<br>Volatility: %{y}<br>Profit: $%{z:,.0f}<extra></extra>"
+        hovertemplate="Service Level: %{x:.1%}<br>Volatility: %{y:.2f}<br>Profit: $%{z:,.0f}<extra></extra>"
+    ))
+    fig.add_trace(go.Scatter(
+        x=best["service_level"], y=fine_lt, mode="lines", name="Optimal SLA",
+        line=dict(color="white", width=3, dash="dash"),
+        hovertemplate="Optimal SLA: %{x:.2%}<br>Volatility: %{y:.2f}<extra></extra>"
     ))
 
     fig.update_layout(
         title="Net Profit Landscape ($)",
         xaxis_title="Target Service Level (%)",
         yaxis_title="Supply Chain Volatility (σ_LT)",
+        xaxis=dict(tickformat=".0%"),
+        showlegend=False,
         height=400,
         margin={"r": 0, "t": 40, "l": 0, "b": 0}
     )
 
     return fig
 
+
+@result_cache.disk_cache()
 def plot_cost_tradeoff(
     avg_demand: float,
     std_dev: float,
@@ -57,24 +63,24 @@ def plot_cost_tradeoff(
     unit_cost: float,
     selling_price: float
 ) -> go.Figure:
-    """Visualizes the convexity of supply chain costs to find the optimal service level."""
+    """Visualizes the convexity of supply chain costs around the exact cost-minimizing service level."""
     margin = selling_price - unit_cost
 
-    service_levels = np.linspace(0.50, 0.99, 100)
-    z_scores = stats.norm.ppf(service_levels)
-
-    safety_stock = z_scores * std_dev
-    holding_costs = safety_stock * holding_cost
+    best = sla_solver.optimal_service_level(holding_cost, stockout_cost, margin, std_dev)
+    optimal_sla = float(best["service_level"])
 
-    loss_func = stats.norm.pdf(z_scores) - z_scores * (1.0 - stats.norm.cdf(z_scores))
-    expected_shortage = std_dev * loss_func
-    stockout_costs = expected_shortage * (stockout_cost + margin)
+    # The sigma_LT = 0 column of the cached cube's cost slice (safety stock on demand volatility alone)
+    cube = profit_cube.get_profit_cube(avg_demand, std_dev, margin)
+    curve = profit_cube.cost_slice(cube, holding_cost, stockout_cost)
+    exact = sla_solver.cost_components(best["z"], holding_cost, stockout_cost, margin, std_dev)
 
+    # Splice the exact optimum into the grid, so the curve's minimum is the true one
+    at = int(np.searchsorted(cube["service_levels"], optimal_sla))
+    service_levels = np.insert(cube["service_levels"], at, optimal_sla)
+    holding_costs = np.insert(curve["holding"][:, 0], at, exact["holding"])
+    stockout_costs = np.insert(curve["stockout"][:, 0], at, exact["stockout"])
     total_costs = holding_costs + stockout_costs
-
-    min_idx = int(np.argmin(total_costs))
-    min_cost = float(total_costs[min_idx])
-    optimal_sla = float(service_levels[min_idx])
+    min_cost = float(exact["total"])
 
     fig = go.Figure()
 
@@ -99,7 +105,7 @@ def plot_cost_tradeoff(
     ))
 
     fig.update_layout(
-        title=f"Optimization Curve (Optimal SLA: {optimal_sla:.1%})",
+        title=f"Optimization Curve (Optimal SLA: {optimal_sla:.2%})",
         xaxis_title="Target Service Level",
         yaxis_title="Financial Impact ($)",
         xaxis=dict(tickformat=".0%"),
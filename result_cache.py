@@ -0,0 +1,333 @@
+"""
+Content-addressed disk cache shared by every process on the machine.
+
+Keys hash the function identity (module, qualified name, version) and the source of its module plus
+every repo module that module imports, transitively, together with the bound arguments, including
+array and DataFrame contents. Editing a callee therefore invalidates its callers' entries. Entries
+are pickles written atomically via rename; file mtime doubles as the LRU clock (refreshed on every
+hit) while the creation time stored in the entry drives TTL expiry.
+
+Caching is opt-in (RESULT_CACHE_ENABLED=1) and calls with `seed=None` are never cached. The
+explicit-key store (load_entry/store_entry), which keeps stored forecasts and online forecast
+states, is a separate switch that is on by default (RESULT_STORE_ENABLED=0 turns it off).
+"""
+import dataclasses
+import functools
+import hashlib
+import importlib
+import inspect
+import os
+import pickle
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+import config
+
+ENABLED = config.RESULT_CACHE_ENABLED
+STORE_ENABLED = config.RESULT_STORE_ENABLED
+CACHE_DIR = config.RESULT_CACHE_DIR
+MAX_BYTES = config.RESULT_CACHE_MAX_BYTES
+DEFAULT_TTL = config.RESULT_CACHE_TTL
+
+_ROOT = os.path.dirname(os.path.abspath(__file__))
+_COUNTER_LOCK = threading.Lock()
+_COUNTERS = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+_SOURCE_DIGESTS: Dict[str, str] = {}
+# Bytes this process believes the store holds; None until the first scan
+_stored_bytes: Optional[int] = None
+
+
+def _feed(digest: Any, obj: Any) -> None:
+    """Feeds a type-tagged, order-stable encoding of `obj` into the digest."""
+    if obj is None or isinstance(obj, (bool, int, float, complex, str)):
+        digest.update(f"{type(obj).__name__}:{obj!r};".encode("utf-8"))
+    elif isinstance(obj, bytes):
+        digest.update(b"bytes:" + obj + b";")
+    elif isinstance(obj, np.generic):
+        _feed(digest, np.asarray(obj))
+    elif isinstance(obj, np.ndarray):
+        digest.update(f"ndarray:{obj.dtype.str}:{obj.shape};".encode("utf-8"))
+        if obj.dtype.hasobject:
+            for item in obj.ravel():
+                _feed(digest, item)
+        else:
+            digest.update(np.ascontiguousarray(obj).tobytes())
+    elif isinstance(obj, (pd.DataFrame, pd.Series)):
+        digest.update(f"{type(obj).__name__}:{obj.shape};".encode("utf-8"))
+        if isinstance(obj, pd.DataFrame):
+            _feed(digest, [str(c) for c in obj.columns])
+            _feed(digest, [str(t) for t in obj.dtypes])
+        else:
+            _feed(digest, (str(obj.name), str(obj.dtype)))
+        digest.update(pd.util.hash_pandas_object(obj, index=True).to_numpy().tobytes())
+    elif isinstance(obj, pd.Timestamp):
+        _feed(digest, obj.isoformat())
+    elif isinstance(obj, (list, tuple)):
+        digest.update(f"{type(obj).__name__}:{len(obj)}[".encode("utf-8"))
+        for item in obj:
+            _feed(digest, item)
+        digest.update(b"]")
+    elif isinstance(obj, dict):
+        digest.update(f"dict:{len(obj)}{{".encode("utf-8"))
+        for key in sorted(obj, key=repr):
+            _feed(digest, key)
+            _feed(digest, obj[key])
+        digest.update(b"}")
+    elif isinstance(obj, (set, frozenset)):
+        _feed(digest, sorted(stable_hash(item) for item in obj))
+    elif isinstance(obj, np.dtype):
+        _feed(digest, f"dtype:{obj.str}")
+    elif isinstance(obj, type):
+        _feed(digest, f"type:{obj.__module__}.{obj.__qualname__}")
+    elif dataclasses.is_dataclass(obj):
+        _feed(digest, (type(obj), [(f.name, getattr(obj, f.name)) for f in dataclasses.fields(obj)]))
+    else:
+        raise TypeError(f"Cannot build a stable cache key for {type(obj).__name__}.")
+
+
+def stable_hash(*parts: Any) -> str:
+    """Returns a hex digest that is identical across processes and runs for equal inputs."""
+    digest = hashlib.blake2b(digest_size=20)
+    for part in parts:
+        _feed(digest, part)
+    return digest.hexdigest()
+
+
+def _local_imports(module: Any) -> set:
+    """Names of the repo modules that `module` imports, directly or via `from x import y`."""
+    found = set()
+    for value in vars(module).values():
+        name = value.__name__ if inspect.ismodule(value) else getattr(value, "__module__", None)
+        path = getattr(sys.modules.get(name), "__file__", None) if isinstance(name, str) else None
+        if path and os.path.dirname(os.path.abspath(path)) == _ROOT:
+            found.add(name)
+    return found
+
+
+def module_closure(*module_names: str) -> set:
+    """The given modules plus every repo module they import, transitively."""
+    seen, pending = set(), list(module_names)
+    while pending:
+        name = pending.pop()
+        if name not in seen:
+            seen.add(name)
+            pending.extend(_local_imports(importlib.import_module(name)) - seen)
+    return seen
+
+
+def source_digest(module_name: str, depends: Iterable[str] = ()) -> str:
+    """Hashes the source of a module, the extra `depends` modules and every repo module they import."""
+    key = "|".join([module_name, *sorted(depends)])
+    if key not in _SOURCE_DIGESTS:
+        digest = hashlib.blake2b(digest_size=20)
+        for name in sorted(module_closure(module_name, *depends)):
+            digest.update(name.encode("utf-8") + b":")
+            path = getattr(sys.modules[name], "__file__", None)
+            if path:
+                with open(path, "rb") as fh:
+                    digest.update(fh.read())
+        _SOURCE_DIGESTS[key] = digest.hexdigest()
+    return _SOURCE_DIGESTS[key]
+
+
+def _count(name: str) -> None:
+    with _COUNTER_LOCK:
+        _COUNTERS[name] += 1
+
+
+def _entry_path(key: str) -> str:
+    return os.path.join(CACHE_DIR, key[:2], f"{key}.pkl")
+
+
+def _load(path: str, ttl: Optional[float]) -> Tuple[bool, Any]:
+    """Returns the cached (True, value), or (False, None) when missing, expired or unreadable."""
+    try:
+        fh = open(path, "rb")
+    except OSError:
+        return False, None
+    try:
+        with fh:
+            created, value = pickle.load(fh)
+    except Exception:
+        # Truncated, or written by code whose classes have since moved or changed
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        return False, None
+    if ttl is not None and time.time() - created > ttl:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        return False, None
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+    return True, value
+
+
+def _store(path: str, value: Any) -> None:
+    """Writes an entry atomically so concurrent readers never observe a partial pickle."""
+    global _stored_bytes
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            pickle.dump((time.time(), value), fh, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    _count("writes")
+    if _stored_bytes is not None:
+        with _COUNTER_LOCK:
+            _stored_bytes += os.path.getsize(path)
+
+
+def _entries() -> list:
+    found = []
+    if not os.path.isdir(CACHE_DIR):
+        return found
+    for root, _, files in os.walk(CACHE_DIR):
+        for name in files:
+            if name.endswith(".pkl"):
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                found.append((st.st_mtime, st.st_size, path))
+    return found
+
+
+def evict(max_bytes: Optional[int] = None) -> int:
+    """Deletes least-recently-used entries until the store fits in `max_bytes`; returns the count removed."""
+    global _stored_bytes
+    limit = MAX_BYTES if max_bytes is None else max_bytes
+    entries = sorted(_entries())
+    total = sum(size for _, size, _ in entries)
+    removed = 0
+    for _, size, path in entries:
+        if total <= limit:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+        removed += 1
+        _count("evictions")
+    _stored_bytes = total
+    return removed
+
+
+def trim_cache() -> int:
+    """Evicts down to MAX_BYTES only when the tracked store size is over it; the directory is scanned once."""
+    global _stored_bytes
+    if _stored_bytes is None:
+        _stored_bytes = sum(size for _, size, _ in _entries())
+    return evict() if _stored_bytes > MAX_BYTES else 0
+
+
+def disk_cache(
+    ttl: Optional[float] = DEFAULT_TTL,
+    version: int = 1,
+    ignore: Iterable[str] = (),
+    depends: Iterable[str] = ()
+) -> Callable:
+    """
+    Caches a deterministic function's return value on disk.
+    `ignore` names arguments that do not change the result (e.g. worker counts). The key covers the
+    source of the function's module and of the repo modules it imports; `depends` names further
+    modules the result relies on, and `version` invalidates entries for changes outside the repo.
+    """
+    ignored = frozenset(ignore)
+    depends = tuple(depends)
+
+    def decorator(func: Callable) -> Callable:
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return func(*args, **kwargs)
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            if "seed" in bound.arguments and bound.arguments["seed"] is None:
+                return func(*args, **kwargs)
+            arguments = {k: v for k, v in bound.arguments.items() if k not in ignored}
+            identity = (func.__module__, func.__qualname__, version, source_digest(func.__module__, depends))
+            try:
+                key = stable_hash(identity, arguments)
+            except TypeError:
+                _count("misses")
+                return func(*args, **kwargs)
+
+            path = _entry_path(key)
+            found, value = _load(path, ttl)
+            if found:
+                _count("hits")
+                return value
+
+            _count("misses")
+            value = func(*args, **kwargs)
+            try:
+                _store(path, value)
+                trim_cache()
+            except (OSError, pickle.PicklingError, TypeError, AttributeError):
+                pass
+            return value
+
+        return wrapper
+
+    return decorator
+
+
+def load_entry(key: str, ttl: Optional[float] = DEFAULT_TTL) -> Tuple[bool, Any]:
+    """Looks up a value stored under an explicit key (e.g. a data fingerprint); returns (found, value)."""
+    if not STORE_ENABLED:
+        return False, None
+    found, value = _load(_entry_path(key), ttl)
+    _count("hits" if found else "misses")
+    return found, value
+
+
+def store_entry(key: str, value: Any, trim: bool = True) -> None:
+    """Stores a value under an explicit key, atomically; `trim` evicts down to MAX_BYTES afterwards."""
+    if not STORE_ENABLED:
+        return
+    _store(_entry_path(key), value)
+    if trim:
+        trim_cache()
+
+
+def cache_info() -> Dict[str, int]:
+    """Returns this process's hit/miss/write/eviction counters plus the shared store's size."""
+    entries = _entries()
+    with _COUNTER_LOCK:
+        info = dict(_COUNTERS)
+    info.update({"entries": len(entries), "bytes": sum(size for _, size, _ in entries)})
+    return info
+
+
+def clear_cache() -> None:
+    """Removes every stored entry and resets the counters."""
+    for _, _, path in _entries():
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+    global _stored_bytes
+    with _COUNTER_LOCK:
+        for name in _COUNTERS:
+            _COUNTERS[name] = 0
+        _stored_bytes = None
@@ -0,0 +1,268 @@
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:  # pragma: no cover - exercised only on installs without the [jit] extra
+    NUMBA_AVAILABLE = False
+
+_FALLBACK_CHUNK = 1_000_000
+
+
+def _as_float_array(values: np.ndarray) -> np.ndarray:
+    values = np.asarray(values)
+    return values if values.dtype in (np.float32, np.float64) else values.astype(np.float64)
+
+
+if NUMBA_AVAILABLE:
+
+    @njit(cache=True)
+    def _newsvendor_profit_jit(demands, capacity, unit_margin, holding_cost, stockout_cost, round_demand, out):
+        for i in range(demands.shape[0]):
+            d = demands[i]
+            if round_demand:
+                d = max(0.0, np.rint(d))
+            if d < capacity:
+                out[i] = unit_margin * d - holding_cost * (capacity - d)
+            else:
+                out[i] = unit_margin * capacity - stockout_cost * (d - capacity)
+        return out
+
+    @njit(cache=True)
+    def _newsvendor_moments_jit(rng, n, avg_demand, std_dev, capacity, unit_margin, holding_cost, stockout_cost):
+        total = 0.0
+        total_sq = 0.0
+        losses = 0
+        low = np.inf
+        high = -np.inf
+        for _ in range(n):
+            d = max(0.0, np.rint(avg_demand + std_dev * rng.standard_normal()))
+            if d < capacity:
+                p = unit_margin * d - holding_cost * (capacity - d)
+            else:
+                p = unit_margin * capacity - stockout_cost * (d - capacity)
+            total += p
+            total_sq += p * p
+            if p < 0.0:
+                losses += 1
+            low = min(low, p)
+            high = max(high, p)
+        return total, total_sq, losses, low, high
+
+    @njit(cache=True)
+    def _capacity_profit_jit(demands, capacities, unit_margin, holding_cost, out):
+        for j in range(demands.shape[0]):
+            d = demands[j]
+            for k in range(capacities.shape[0]):
+                c = capacities[k]
+                if d < c:
+                    out[k, j] = unit_margin * d - holding_cost * (c - d)
+                else:
+                    out[k, j] = unit_margin * c
+        return out
+
+    @njit(cache=True)
+    def _base_stock_jit(demands, lead_times, order_up_to, return_rate, initial_stock, window,
+                        on_hand_units, backorder_units, stockout_days, filled_units):
+        n_paths, n_days = demands.shape
+        for p in range(n_paths):
+            pipeline = np.zeros(window)
+            net = initial_stock[p]
+            outstanding = 0.0
+            returns_due = 0.0
+            held = 0.0
+            backlog = 0.0
+            short_days = 0
+            filled = 0.0
+            for t in range(n_days):
+                slot = t % window
+                net += pipeline[slot] + returns_due
+                outstanding -= pipeline[slot]
+                pipeline[slot] = 0.0
+
+                d = demands[p, t]
+                served = min(d, max(net, 0.0))
+                net -= d
+                filled += served
+                returns_due = served * return_rate
+
+                position = net + outstanding
+                order = order_up_to[p] - position
+                if order > 0.0:
+                    pipeline[(t + lead_times[p, t]) % window] += order
+                    outstanding += order
+
+                if net > 0.0:
+                    held += net
+                else:
+                    backlog -= net
+                    if net < 0.0:
+                        short_days += 1
+            on_hand_units[p] = held
+            backorder_units[p] = backlog
+            stockout_days[p] = short_days
+            filled_units[p] = filled
+
+
+def newsvendor_profits(
+    demands: np.ndarray,
+    capacity: float,
+    selling_price: float,
+    unit_cost: float,
+    holding_cost: float,
+    stockout_cost: float,
+    round_demand: bool = True,
+    out: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """Maps demand draws to single-period profits in one fused pass (Numba) or in-place NumPy ops."""
+    demands = _as_float_array(demands)
+    if out is None:
+        out = np.empty_like(demands)
+    unit_margin = selling_price - unit_cost
+
+    if NUMBA_AVAILABLE:
+        return _newsvendor_profit_jit(demands, float(capacity), unit_margin, float(holding_cost),
+                                      float(stockout_cost), round_demand, out)
+
+    # profit = (m + h) * min(d, Q) - h * Q - pi * max(d - Q, 0); evaluated with a single scratch buffer
+    for start in range(0, demands.shape[0], _FALLBACK_CHUNK):
+        d = demands[start:start + _FALLBACK_CHUNK]
+        o = out[start:start + _FALLBACK_CHUNK]
+        if round_demand:
+            d = np.maximum(np.rint(d, out=o), 0.0, out=o)
+        shortfall = np.subtract(d, capacity)
+        np.maximum(shortfall, 0.0, out=shortfall)
+        shortfall *= stockout_cost
+        np.minimum(d, capacity, out=o)
+        o *= unit_margin + holding_cost
+        o -= holding_cost * capacity
+        o -= shortfall
+    return out
+
+
+def newsvendor_profit_moments(
+    rng: np.random.Generator,
+    n: int,
+    avg_demand: float,
+    std_dev: float,
+    capacity: float,
+    selling_price: float,
+    unit_cost: float,
+    holding_cost: float,
+    stockout_cost: float
+) -> Tuple[float, float, int, float, float]:
+    """Samples demand and accumulates (sum, sum of squares, loss count, min, max) without storing paths."""
+    unit_margin = selling_price - unit_cost
+    if NUMBA_AVAILABLE:
+        return _newsvendor_moments_jit(rng, int(n), float(avg_demand), float(std_dev), float(capacity),
+                                       unit_margin, float(holding_cost), float(stockout_cost))
+
+    total, total_sq, losses, low, high = 0.0, 0.0, 0, np.inf, -np.inf
+    buffer = np.empty(min(int(n), _FALLBACK_CHUNK))
+    for start in range(0, int(n), _FALLBACK_CHUNK):
+        chunk = buffer[:min(_FALLBACK_CHUNK, int(n) - start)]
+        rng.standard_normal(out=chunk)
+        chunk *= std_dev
+        chunk += avg_demand
+        newsvendor_profits(chunk, capacity, selling_price, unit_cost, holding_cost, stockout_cost, out=chunk)
+        total += float(chunk.sum())
+        total_sq += float(np.dot(chunk, chunk))
+        losses += int(np.count_nonzero(chunk < 0.0))
+        low = min(low, float(chunk.min()))
+        high = max(high, float(chunk.max()))
+    return total, total_sq, losses, low, high
+
+
+def capacity_profits(
+    demands: np.ndarray,
+    capacities: np.ndarray,
+    unit_margin: float,
+    holding_cost: float,
+    out: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """Evaluates daily profit (margin on sales less idle-capacity holding) for each capacity level."""
+    demands = _as_float_array(demands)
+    capacities = np.atleast_1d(np.asarray(capacities, dtype=demands.dtype))
+    if out is None:
+        out = np.empty((capacities.shape[0], demands.shape[0]), dtype=demands.dtype)
+
+    if NUMBA_AVAILABLE:
+        return _capacity_profit_jit(demands, capacities, float(unit_margin), float(holding_cost), out)
+
+    # profit = (m + h) * min(d, c) - h * c, written straight into each output row
+    for k, c in enumerate(capacities):
+        row = out[k]
+        np.minimum(demands, c, out=row)
+        row *= unit_margin + holding_cost
+        row -= holding_cost * c
+    return out
+
+
+def simulate_base_stock(
+    demands: np.ndarray,
+    lead_times: np.ndarray,
+    order_up_to: np.ndarray,
+    return_rate: float = 0.0,
+    initial_stock: Optional[np.ndarray] = None
+) -> Dict[str, np.ndarray]:
+    """
+    Runs a daily-review order-up-to policy with backorders for every path.
+    `demands` and `lead_times` are (paths, days); an order placed on day t arrives on day t + lead time,
+    and a fraction `return_rate` of each day's shipped units is restocked the following day.
+    """
+    demands = np.ascontiguousarray(demands, dtype=np.float64)
+    lead_times = np.ascontiguousarray(np.maximum(lead_times, 1), dtype=np.int32)
+    n_paths, n_days = demands.shape
+    order_up_to = np.broadcast_to(np.asarray(order_up_to, dtype=np.float64), (n_paths,)).copy()
+    initial = order_up_to.copy() if initial_stock is None else np.broadcast_to(
+        np.asarray(initial_stock, dtype=np.float64), (n_paths,)).copy()
+    window = int(lead_times.max()) + 1
+
+    on_hand_units = np.zeros(n_paths)
+    backorder_units = np.zeros(n_paths)
+    stockout_days = np.zeros(n_paths, dtype=np.int64)
+    filled_units = np.zeros(n_paths)
+
+    if NUMBA_AVAILABLE:
+        _base_stock_jit(demands, lead_times, order_up_to, float(return_rate), initial, window,
+                        on_hand_units, backorder_units, stockout_days, filled_units)
+    else:
+        rows = np.arange(n_paths)
+        pipeline = np.zeros((n_paths, window))
+        net = initial
+        outstanding = np.zeros(n_paths)
+        returns_due = np.zeros(n_paths)
+        for t in range(n_days):
+            slot = t % window
+            arriving = pipeline[:, slot]
+            net += arriving + returns_due
+            outstanding -= arriving
+            pipeline[:, slot] = 0.0
+
+            d = demands[:, t]
+            served = np.minimum(d, np.maximum(net, 0.0))
+            net -= d
+            filled_units += served
+            returns_due = served * return_rate
+
+            order = np.maximum(order_up_to - (net + outstanding), 0.0)
+            pipeline[rows, (t + lead_times[:, t]) % window] += order
+            outstanding += order
+
+            on_hand_units += np.maximum(net, 0.0)
+            backorder_units += np.maximum(-net, 0.0)
+            stockout_days += net < 0.0
+
+    return {
+        "on_hand_units": on_hand_units,
+        "backorder_units": backorder_units,
+        "stockout_days": stockout_days,
+        "filled_units": filled_units
+    }
+
+
+def backend() -> str:
+    """Names the active kernel backend for diagnostics and benchmark output."""
+    return "numba" if NUMBA_AVAILABLE else "numpy"
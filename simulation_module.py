@@ -1,8 +1,9 @@
 import streamlit as st
-import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
-from scipy.stats import norm
+
+import chart_helpers
+import strategy_lab
 
 
 def render_research_lab(
@@ -24,42 +25,29 @@ def render_research_lab(
 
     if st.button("Run Vectorized Monte Carlo", type="primary"):
         with st.spinner(f"Simulating {sim_days:,} supply chain scenarios..."):
-            critical_ratio = margin / (margin + holding_cost) if (margin + holding_cost) > 0.0 else 0.95
-            z_score = norm.ppf(critical_ratio)
-            optimal_ss = max(0.0, z_score * std_dev)
-
-            np.random.seed(42)
-            raw_demands = np.random.normal(avg_demand, std_dev, sim_days)
-            demands = np.maximum(0.0, np.round(raw_demands))
-
-            cap_a = avg_demand + current_ss
-            sales_a = np.minimum(demands, cap_a)
-            loss_a = np.maximum(0.0, cap_a - demands) * holding_cost
-            profit_a = (sales_a * margin) - loss_a
-
-            cap_b = avg_demand + optimal_ss
-            sales_b = np.minimum(demands, cap_b)
-            loss_b = np.maximum(0.0, cap_b - demands) * holding_cost
-            profit_b = (sales_b * margin) - loss_b
+            optimal_ss = strategy_lab.optimal_safety_stock(std_dev, margin, holding_cost)
+            sweep = strategy_lab.run_strategy_sweep(
+                avg_demand, std_dev, strategy_lab.candidate_grid(current_ss, optimal_ss), margin, holding_cost,
+                num_days=sim_days, histogram_safety_stocks=(current_ss, optimal_ss)
+            )
+            table = sweep["candidates"].set_index("safety_stock")
+            current, optimal = table.loc[float(current_ss)], table.loc[float(optimal_ss)]
 
-            avg_a, std_a = float(np.mean(profit_a)), float(np.std(profit_a))
-            avg_b, std_b = float(np.mean(profit_b)), float(np.std(profit_b))
+            avg_a, std_a, var_95_a = current["avg_profit"], current["std_profit"], current["var_95"]
+            avg_b, std_b, var_95_b = optimal["avg_profit"], optimal["std_profit"], optimal["var_95"]
             delta = avg_b - avg_a
 
-            var_95_a = float(np.percentile(profit_a, 5))
-            var_95_b = float(np.percentile(profit_b, 5))
-
             st.success(
                 f"**Research Conclusion:** Optimizing Safety Stock to **{int(optimal_ss)} units** yields **${delta:,.2f}** additional profit per day.")
 
             fig = go.Figure()
-            fig.add_trace(go.Histogram(
-                x=profit_a, nbinsx=50, opacity=0.6,
-                name=f'Current (SS={current_ss})', marker_color='gray'
+            fig.add_trace(chart_helpers.histogram_bar(
+                sweep["hist_counts"][0], sweep["hist_edges"], name=f'Current (SS={current_ss})',
+                color='gray', opacity=0.6
             ))
-            fig.add_trace(go.Histogram(
-                x=profit_b, nbinsx=50, opacity=0.75,
-                name=f'Optimal (SS={int(optimal_ss)})', marker_color='#002D62'
+            fig.add_trace(chart_helpers.histogram_bar(
+                sweep["hist_counts"][1], sweep["hist_edges"], name=f'Optimal (SS={int(optimal_ss)})',
+                color='#002D62', opacity=0.75
             ))
 
             fig.update_layout(
@@ -90,3 +78,7 @@ def render_research_lab(
                 ]
             }
             st.table(pd.DataFrame(res_data))
+            st.plotly_chart(
+                strategy_lab.plot_efficient_frontier(sweep["candidates"], highlight=(current_ss, optimal_ss)),
+                use_container_width=True
+            )
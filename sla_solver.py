@@ -0,0 +1,92 @@
+"""
+Exact optimal service level for the safety-stock cost trade-off used across the dashboard.
+
+Cost(z) = h * z * s_eff + (pi + m) * sigma * L(z), with L the standard normal loss function. Since
+L'(z) = -(1 - Phi(z)), the first-order condition h * s_eff = (pi + m) * sigma * (1 - Phi(z)) inverts in
+closed form: z* = Phi^-1(1 - h * s_eff / ((pi + m) * sigma)). Cost is convex in z (second derivative
+(pi + m) * sigma * phi(z) > 0), so this stationary point is the global minimum; it is clipped to the
+service-level bounds when it falls outside them. Everything broadcasts over lanes and parameter sets.
+"""
+from typing import Any, Dict, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from scipy.special import ndtr, ndtri
+
+SLA_BOUNDS = (0.50, 0.99)
+
+ArrayLike = Union[float, np.ndarray]
+
+
+def standard_loss(z: ArrayLike) -> np.ndarray:
+    """Unit normal loss function L(z) = phi(z) - z * (1 - Phi(z))."""
+    z = np.asarray(z, dtype=np.float64)
+    return np.exp(-0.5 * z * z) / np.sqrt(2.0 * np.pi) - z * ndtr(-z)
+
+
+def optimal_service_level(
+    holding_cost: ArrayLike,
+    stockout_cost: ArrayLike,
+    margin: ArrayLike,
+    std_dev: ArrayLike,
+    effective_std: Optional[ArrayLike] = None,
+    bounds: Tuple[float, float] = SLA_BOUNDS
+) -> Dict[str, np.ndarray]:
+    """
+    Returns the cost-minimizing service level and z-score (broadcast over all inputs).
+    `effective_std` is the standard deviation that safety stock must cover (defaults to `std_dev`);
+    expected shortage is always charged on `std_dev`, as in profit_optimizer and metrics_engine.
+    """
+    h, pi, m, sigma, s_eff = np.broadcast_arrays(*(
+        np.asarray(x, dtype=np.float64)
+        for x in (holding_cost, stockout_cost, margin, std_dev, std_dev if effective_std is None else effective_std)
+    ))
+    underage = pi + m
+    with np.errstate(divide="ignore", invalid="ignore"):
+        tail = np.where((underage > 0.0) & (sigma > 0.0), h * s_eff / (underage * sigma), np.inf)
+    service = np.clip(1.0 - tail, bounds[0], bounds[1])
+    interior = (service > bounds[0]) & (service < bounds[1])
+    return {"service_level": service, "z": ndtri(service), "interior": interior}
+
+
+def cost_components(
+    z: ArrayLike,
+    holding_cost: float,
+    stockout_cost: float,
+    margin: float,
+    std_dev: float,
+    effective_std: Optional[float] = None
+) -> Dict[str, np.ndarray]:
+    """Holding, stockout and total cost of carrying z standard deviations of safety stock."""
+    z = np.asarray(z, dtype=np.float64)
+    s_eff = std_dev if effective_std is None else effective_std
+    holding = z * s_eff * holding_cost
+    stockout = std_dev * standard_loss(z) * (stockout_cost + margin)
+    return {"holding": holding, "stockout": stockout, "total": holding + stockout}
+
+
+def optimal_lane_slas(portfolio: pd.DataFrame, inputs: Dict[str, Any]) -> pd.DataFrame:
+    """
+    Solves the optimal SLA for every lane of a metrics_engine portfolio table in one vectorized pass,
+    using the lead-time-adjusted (RSS) volatility as the safety-stock base.
+    """
+    workload = portfolio["total_workload"].to_numpy(dtype=np.float64)
+    sigma = portfolio["std_dev_demand"].fillna(0.0).to_numpy(dtype=np.float64)
+    lt, lt_sigma = float(inputs["lead_time"]), float(inputs["lead_time_volatility"])
+    s_eff = np.sqrt(lt * sigma ** 2 + workload ** 2 * lt_sigma ** 2)
+    margin = float(inputs["selling_price"]) - float(inputs["unit_cost"])
+    h, pi = float(inputs["holding_cost"]), float(inputs["stockout_cost"])
+
+    best = optimal_service_level(h, pi, margin, sigma, s_eff)
+    current_z = float(ndtri(np.clip(float(inputs["sla"]), *SLA_BOUNDS)))
+    at_best = cost_components(best["z"], h, pi, margin, sigma, s_eff)["total"]
+    at_current = cost_components(current_z, h, pi, margin, sigma, s_eff)["total"]
+
+    return pd.DataFrame({
+        "lane": portfolio["lane"].to_numpy(),
+        "optimal_sla": best["service_level"],
+        "optimal_safety_stock": np.maximum(0.0, best["z"] * s_eff),
+        "optimal_cost": at_best,
+        "current_cost": at_current,
+        "cost_saving": at_current - at_best
+    })
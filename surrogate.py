@@ -0,0 +1,309 @@
+"""
+Precomputed response surfaces that answer dashboard what-if queries without simulating.
+
+Write demand as mu + sigma * Z and capacity as Q = mu + k * sigma. Newsvendor profit is then
+m * mu + sigma * (m + h + pi) * (u(Z) - eta * k), with u(Z) = (1 - w) * min(Z, k) - w * max(Z - k, 0),
+w = pi / (m + h + pi) and eta = h / (m + h + pi). Expected profit and loss probability are closed
+forms. VaR needs a root-find, but its standardised quantile V(k, w) depends on only two bounded
+dimensionless numbers, so one offline table serves every lane, price and cost setting the sidebar
+can produce. The table is fitted with a bicubic spline. Past either end of the k axis the other
+profit branch carries under 1e-9 of the mass, and V has a closed form there. Safety stock and
+resilience are closed-form in metrics_engine and are evaluated exactly.
+
+Run `python surrogate.py` to precompute the table to config.SURROGATE_TABLE_PATH and print the
+error report against the exact engines.
+"""
+import argparse
+import os
+import threading
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy.interpolate import RectBivariateSpline
+from scipy.special import ndtr, ndtri
+
+import analytic_risk
+import config
+import metrics_engine
+import result_cache
+import sla_solver
+
+VAR_QUANTILE = 0.05
+K_AXIS = np.linspace(-6.0, 8.0, 561)
+W_AXIS = np.linspace(0.0, 1.0, 201)
+
+_SURFACE_LOCK = threading.Lock()
+_SURFACES: Dict[Tuple[float, str], RectBivariateSpline] = {}
+
+
+def unit_quantile(k: np.ndarray, w: np.ndarray, quantile: float = VAR_QUANTILE, iterations: int = 100) -> np.ndarray:
+    """Exact q-quantile of u(Z) by vectorized bisection; broadcasts over k and w."""
+    k, w = np.broadcast_arrays(np.asarray(k, dtype=np.float64), np.asarray(w, dtype=np.float64))
+    peak = (1.0 - w) * k
+    lo = np.minimum(-10.0 * (1.0 - w), peak - 10.0 * w) - 1.0
+    hi = peak.copy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for _ in range(iterations):
+            mid = 0.5 * (lo + hi)
+            left = np.where(w < 1.0, ndtr(mid / (1.0 - w)), np.where(mid < 0.0, 0.0, 1.0))
+            right = np.where(w > 0.0, ndtr(-k - (peak - mid) / w), 0.0)
+            below = left + right < quantile
+            lo = np.where(below, mid, lo)
+            hi = np.where(below, hi, mid)
+    return 0.5 * (lo + hi)
+
+
+@result_cache.disk_cache()
+def build_tables(var_quantile: float = VAR_QUANTILE) -> Dict[str, np.ndarray]:
+    """Tabulates V(k, w) on the (K_AXIS x W_AXIS) grid."""
+    return {
+        "k": K_AXIS,
+        "w": W_AXIS,
+        "var": unit_quantile(K_AXIS[:, None], W_AXIS[None, :], var_quantile),
+        "var_quantile": np.float64(var_quantile)
+    }
+
+
+def save_tables(path: str = config.SURROGATE_TABLE_PATH, var_quantile: float = VAR_QUANTILE) -> str:
+    """Writes the precomputed table to an .npz file for the dashboard to load at start-up."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    np.savez(path, **build_tables(var_quantile))
+    return path
+
+
+def load_tables(path: str = config.SURROGATE_TABLE_PATH, var_quantile: float = VAR_QUANTILE) -> Dict[str, np.ndarray]:
+    """Loads a matching precomputed table, building it (once, disk-cached) when none is on disk."""
+    if os.path.exists(path):
+        with np.load(path) as stored:
+            tables = {name: stored[name] for name in stored.files}
+        if float(tables["var_quantile"]) == var_quantile:
+            return tables
+    return build_tables(var_quantile)
+
+
+def get_surface(var_quantile: float = VAR_QUANTILE, path: str = config.SURROGATE_TABLE_PATH) -> RectBivariateSpline:
+    """Process-wide bicubic spline over the VaR table."""
+    key = (float(var_quantile), path)
+    with _SURFACE_LOCK:
+        surface = _SURFACES.get(key)
+    if surface is None:
+        tables = load_tables(path, var_quantile)
+        surface = RectBivariateSpline(tables["k"], tables["w"], tables["var"], kx=3, ky=3)
+        with _SURFACE_LOCK:
+            _SURFACES[key] = surface
+    return surface
+
+
+def _standard_var(k: np.ndarray, w: np.ndarray, var_quantile: float) -> np.ndarray:
+    """V(k, w) from the spline inside the table and from the one-branch closed forms outside it."""
+    inside = (k >= K_AXIS[0]) & (k <= K_AXIS[-1])
+    fitted = get_surface(var_quantile).ev(np.clip(k, K_AXIS[0], K_AXIS[-1]), w)
+    upper_tail = (1.0 - w) * float(ndtri(var_quantile))
+    lower_tail = (1.0 - w) * k - w * (float(ndtri(1.0 - var_quantile)) - k)
+    return np.where(inside, fitted, np.where(k > K_AXIS[-1], upper_tail, lower_tail))
+
+
+def _profit_at(demand: np.ndarray, q: np.ndarray, m: np.ndarray, h: np.ndarray, pi: np.ndarray) -> np.ndarray:
+    return (m + h) * np.minimum(demand, q) - h * q - pi * np.maximum(demand - q, 0.0)
+
+
+def _whole_unit_var(
+    estimate: np.ndarray,
+    mu: np.ndarray,
+    sigma: np.ndarray,
+    q: np.ndarray,
+    m: np.ndarray,
+    h: np.ndarray,
+    pi: np.ndarray,
+    quantile: float,
+    iterations: int = 32
+) -> np.ndarray:
+    """
+    Moves the continuous VaR to the whole-unit engine's profit atom. With s = max(m + h, pi), the
+    whole-unit quantile lies in [estimate - s / 2, estimate + s] (half-unit continuity corrections one
+    way, one full atom spacing the other), widened by the table error. Bisection on the exact
+    whole-unit CDF inside that bracket converges onto the jump, which is then snapped to its atom.
+    """
+    spacing = np.maximum(m + h, pi)
+    slack = 1e-2 * sigma * (m + h + pi)
+    lo = estimate - 0.5 * spacing - slack
+    hi = estimate + spacing + slack
+    for _ in range(iterations):
+        mid = 0.5 * (lo + hi)
+        below = analytic_risk.profit_cdf(mid, mu, sigma, q, 0.0, m, h, pi) < quantile
+        lo = np.where(below, mid, lo)
+        hi = np.where(below, hi, mid)
+
+    steps = np.arange(-1.0, 2.0).reshape((-1,) + (1,) * hi.ndim)
+    atoms = np.concatenate([
+        _profit_at(np.floor((hi + h * q) / (m + h)) + steps, q, m, h, pi),
+        _profit_at(np.ceil(q + (m * q - hi) / pi) + steps, q, m, h, pi)
+    ])
+    atoms = np.where(np.isfinite(atoms), atoms, np.inf)
+    # Nudge each atom up by a rounding error so the floor/ceil inside profit_cdf counts it
+    nudged = atoms + 1e-9 * np.maximum(1.0, np.abs(np.where(np.isfinite(atoms), atoms, 0.0)))
+    reached = analytic_risk.profit_cdf(nudged, mu, sigma, q, 0.0, m, h, pi) >= quantile
+    return np.where(reached.any(axis=0), np.where(reached, atoms, np.inf).min(axis=0), hi)
+
+
+def profit_risk(
+    avg_demand: Any,
+    std_dev: Any,
+    capacity_limit: Any,
+    unit_cost: Any,
+    selling_price: Any,
+    holding_cost: Any,
+    stockout_cost: Any,
+    var_quantile: float = VAR_QUANTILE
+) -> Dict[str, np.ndarray]:
+    """
+    Expected profit, loss probability (%) and VaR for Normal demand, broadcast over all inputs.
+    Takes the same arguments as monte_carlo.run_simulation. Requires m + h + pi > 0.
+    """
+    mu, sigma, q, uc, sp, h, pi = np.broadcast_arrays(*(
+        np.asarray(x, dtype=np.float64)
+        for x in (avg_demand, std_dev, capacity_limit, unit_cost, selling_price, holding_cost, stockout_cost)
+    ))
+    m = sp - uc
+    scale = m + h + pi
+    if np.any(scale <= 0.0):
+        raise ValueError("margin + holding_cost + stockout_cost must be positive.")
+    safe_sigma = np.where(sigma > 0.0, sigma, 1.0)
+    k = np.where(sigma > 0.0, (q - mu) / safe_sigma, 0.0)
+    w = pi / scale
+
+    avg = m * mu - sigma * (scale * sla_solver.standard_loss(k) + h * k)
+    var = m * mu + sigma * scale * (_standard_var(k, w, var_quantile) - h / scale * k)
+
+    # Whole-unit demand, as in the Monte Carlo engine: continuity-corrected loss tails and VaR
+    with np.errstate(divide="ignore", invalid="ignore"):
+        break_low = np.where(m + h > 0.0, np.ceil(h * q / (m + h)) - 0.5, np.inf)
+        break_high = np.where(pi > 0.0, np.floor(q + m * q / pi) + 0.5, np.inf)
+        loss = np.minimum(ndtr((break_low - mu) / safe_sigma) + ndtr((mu - break_high) / safe_sigma), 1.0)
+        var = _whole_unit_var(var, mu, safe_sigma, q, m, h, pi, var_quantile)
+
+    # Deterministic demand: a single profit outcome
+    fixed = _profit_at(mu, q, m, h, pi)
+    deterministic = sigma <= 0.0
+    return {
+        "avg_profit": np.where(deterministic, fixed, avg),
+        "loss_prob": np.where(deterministic, (fixed < 0.0) * 100.0, loss * 100.0),
+        "var_95": np.where(deterministic, fixed, var)
+    }
+
+
+def _lane_risk(lanes: Dict[str, np.ndarray], inputs: Dict[str, Any], var_quantile: float) -> pd.DataFrame:
+    risk = profit_risk(
+        lanes["total_workload"], lanes["std_dev_demand"], lanes["required_capacity"], inputs["unit_cost"],
+        inputs["selling_price"], inputs["holding_cost"], inputs["stockout_cost"], var_quantile
+    )
+    return pd.DataFrame({
+        "safety_stock": lanes["safety_stock"],
+        "required_capacity": lanes["required_capacity"],
+        "resilience_score": lanes["resilience_score"],
+        "avg_profit": risk["avg_profit"],
+        "loss_prob": risk["loss_prob"],
+        "var_95": risk["var_95"]
+    })
+
+
+def query(raw_avg: Any, std_dev: Any, inputs: Dict[str, Any], var_quantile: float = VAR_QUANTILE) -> pd.DataFrame:
+    """
+    Answers a what-if for one or many lanes: exact safety stock, capacity and resilience from
+    metrics_engine, plus the surrogate's profit risk at that capacity. One row per lane.
+    """
+    lanes = metrics_engine.calculate_lane_metrics_vectorized(np.atleast_1d(raw_avg), np.atleast_1d(std_dev), inputs)
+    return _lane_risk(lanes, inputs, var_quantile)
+
+
+def what_if(
+    raw_avg: float,
+    std_dev: float,
+    inputs: Dict[str, Any],
+    parameter: str,
+    values: Sequence[float],
+    var_quantile: float = VAR_QUANTILE
+) -> pd.DataFrame:
+    """Sweeps one scenario input over `values` for a single lane; one row per value, priced in one batch."""
+    values = np.asarray(values, dtype=np.float64)
+    lanes = metrics_engine.calculate_lane_metrics_vectorized(
+        np.full(values.shape, float(raw_avg)), np.full(values.shape, float(std_dev)), {**inputs, parameter: values}
+    )
+    table = _lane_risk(lanes, {**inputs, parameter: values}, var_quantile)
+    table.insert(0, parameter, values)
+    return table
+
+
+def sample_scenarios(num_samples: int, seed: Optional[int] = 0) -> Tuple[np.ndarray, np.ndarray, list]:
+    """Random lanes and sidebar settings spanning the dashboard's ranges (shock mode and transport modes included)."""
+    rng = np.random.Generator(np.random.PCG64(seed))
+    raw_avg = rng.uniform(20.0, 400.0, num_samples)
+    # The exact engine needs mean >= 4 sigma; workload only adds returns on top of raw demand
+    std_dev = raw_avg * rng.uniform(0.02, 1.0 / analytic_risk.MIN_MEAN_TO_STD, num_samples)
+    time_mult = rng.choice([1.0, 1.5, 0.2], num_samples)
+    cost_mult = rng.choice([1.0, 0.7, 3.0], num_samples)
+    unit_cost = 50.0 * cost_mult
+    scenarios = [{
+        "return_rate": int(rng.integers(0, 31)),
+        "lead_time": float(rng.choice(np.arange(0.5, 6.5, 0.5)) * time_mult[i]),
+        "lead_time_volatility": float(np.round(rng.uniform(0.0, 2.0), 1)),
+        "sla": int(rng.integers(50, 100)) / 100.0,
+        "holding_cost": float(rng.uniform(1.0, 100.0)),
+        "stockout_cost": float(rng.uniform(10.0, 5000.0)),
+        "warehouse_cap": float(rng.uniform(50.0, 500.0)),
+        "partner_cost": 5.0,
+        "co2_mult": 1.0,
+        "unit_cost": float(unit_cost[i]),
+        "selling_price": float(unit_cost[i] + rng.uniform(5.0, 100.0))
+    } for i in range(num_samples)]
+    return raw_avg, std_dev, scenarios
+
+
+def error_report(num_samples: int = 500, seed: Optional[int] = 0, var_quantile: float = VAR_QUANTILE) -> pd.DataFrame:
+    """
+    Compares surrogate answers with the exact engines on random sidebar settings: analytic_risk
+    (whole-unit demand, matches the Monte Carlo engine) for profit risk, and metrics_engine for safety
+    stock and resilience. Errors are also reported relative to the profit scale sigma * (m + h).
+    """
+    raw_avg, std_dev, scenarios = sample_scenarios(num_samples, seed)
+    rows = []
+    for avg, sigma, inputs in zip(raw_avg, std_dev, scenarios):
+        fast = query(avg, sigma, inputs, var_quantile).iloc[0]
+        lane = metrics_engine.calculate_lane_metrics_vectorized(np.array([avg]), np.array([sigma]), inputs)
+        exact = analytic_risk.analytic_profit_risk(
+            float(lane["total_workload"][0]), float(sigma), float(lane["required_capacity"][0]),
+            inputs["unit_cost"], inputs["selling_price"], inputs["holding_cost"], inputs["stockout_cost"],
+            var_quantile=var_quantile
+        )
+        scale = sigma * (inputs["selling_price"] - inputs["unit_cost"] + inputs["holding_cost"])
+        for metric, exact_value in (
+            ("safety_stock", lane["safety_stock"][0]),
+            ("resilience_score", lane["resilience_score"][0]),
+            ("avg_profit", exact["avg_profit"]),
+            ("loss_prob", exact["loss_prob"]),
+            ("var_95", exact["var_95"])
+        ):
+            error = abs(float(fast[metric]) - float(exact_value))
+            rows.append((metric, error, error / scale * 100.0))
+
+    errors = pd.DataFrame(rows, columns=["metric", "abs_error", "scaled_error_pct"])
+    return errors.groupby("metric", sort=False).agg(
+        max_abs_error=("abs_error", "max"),
+        p95_abs_error=("abs_error", lambda e: e.quantile(0.95)),
+        max_scaled_error_pct=("scaled_error_pct", "max")
+    ).reset_index()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--out", default=config.SURROGATE_TABLE_PATH, help="Where to write the .npz table.")
+    parser.add_argument("--samples", type=int, default=500, help="Random scenarios in the error report.")
+    args = parser.parse_args()
+
+    print(f"Wrote {save_tables(args.out)}")
+    print(error_report(args.samples).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import result_cache
+
+
+@pytest.fixture(autouse=True)
+def isolated_result_cache(tmp_path, monkeypatch):
+    """Keeps tests off the user's shared result cache; caching stays off unless a test enables it, the store on."""
+    monkeypatch.setattr(result_cache, "CACHE_DIR", str(tmp_path / "result_cache"))
+    monkeypatch.setattr(result_cache, "ENABLED", False)
+    monkeypatch.setattr(result_cache, "STORE_ENABLED", True)
+    result_cache.clear_cache()
+
+
+@pytest.fixture
+def scenario():
+    """Baseline lane inputs shared by the metrics, network and carbon tests."""
+    return {
+        "return_rate": 5,
+        "lead_time": 1.0,
+        "lead_time_volatility": 0.2,
+        "sla": 0.95,
+        "holding_cost": 18.5,
+        "stockout_cost": 2000.0,
+        "warehouse_cap": 150,
+        "partner_cost": 5.0,
+        "co2_mult": 1.0,
+        "unit_cost": 50.0,
+        "selling_price": 85.0,
+        "transport_mode": "Road (Standard)"
+    }
+
+
+@pytest.fixture
+def correlated_history():
+    """Builds daily multi-lane history driven by one common demand factor."""
+    def build(lanes: int = 4, days: int = 60) -> pd.DataFrame:
+        rng = np.random.default_rng(11)
+        common = rng.standard_normal(days)
+        dates = pd.date_range(start="2025-01-01", periods=days, freq="D")
+        frames = []
+        for i in range(lanes):
+            demand = np.round(100 + 20 * i + 15 * common + 5 * rng.standard_normal(days))
+            frames.append(pd.DataFrame({"date": dates, "demand": demand, "product_name": f"LANE-{i}"}))
+        return pd.concat(frames, ignore_index=True)
+
+    return build
+
+
+@pytest.fixture
+def seasonal_history():
+    """Builds daily multi-lane history with trend, yearly seasonality and an October-November peak."""
+    def build(lanes: int = 4, years: int = 4, seed: int = 0) -> pd.DataFrame:
+        rng = np.random.default_rng(seed)
+        dates = pd.date_range("2021-01-01", periods=365 * years, freq="D")
+        t = np.arange(dates.shape[0])
+        frames = []
+        for i in range(lanes):
+            base = 100.0 + 40.0 * i
+            demand = base + 0.05 * t + 0.2 * base * np.sin(2 * np.pi * t / 365) \
+                + np.where(np.isin(dates.month, [10, 11]), 0.3 * base, 0.0) + rng.normal(0, 5, t.shape[0])
+            frames.append(pd.DataFrame({"date": dates, "product_name": f"L{i}", "demand": np.round(demand)}))
+        return pd.concat(frames, ignore_index=True)
+
+    return build
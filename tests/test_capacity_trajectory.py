@@ -0,0 +1,30 @@
+import numpy as np
+import pandas as pd
+
+import capacity_trajectory
+import forecast_engine
+import metrics_engine
+
+
+def test_capacity_trajectories_follow_forecast_variance(seasonal_history):
+    """Per-period safety stock must equal the metrics engine at each forecast mean/std, short lanes stay flat."""
+    inputs = {
+        "return_rate": 5.0, "lead_time": 1.0, "lead_time_volatility": 0.2, "sla": 0.95, "holding_cost": 18.5,
+        "stockout_cost": 150.0, "warehouse_cap": 200.0, "partner_cost": 5.0, "co2_mult": 1.0,
+        "unit_cost": 50.0, "selling_price": 85.0, "transport_mode": "Road"
+    }
+    history = pd.concat([
+        seasonal_history(lanes=2),
+        pd.DataFrame({"date": pd.date_range("2024-12-01", periods=20), "product_name": "New", "demand": 50.0})
+    ], ignore_index=True)
+    plan = capacity_trajectory.capacity_trajectories(history, inputs, horizon=4)
+
+    assert len(plan) == 3 * 4 and set(plan.loc[plan["lane"] == "New", "source"]) == {"history"}
+    served = forecast_engine.forecast_lanes(history, horizon=4)
+    lane, expected = plan[plan["lane"] == "L1"], served[served["lane"] == "L1"]
+    direct = metrics_engine.calculate_lane_metrics_vectorized(expected["demand"], expected["std"], inputs)
+    np.testing.assert_array_equal(lane["safety_stock"], direct["safety_stock"])
+    assert lane["required_capacity"].nunique() > 1
+
+    peaks = capacity_trajectory.peak_requirements(plan).set_index("lane")
+    assert peaks.loc["L1", "peak_required_capacity"] == lane["required_capacity"].max()
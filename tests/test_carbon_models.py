@@ -0,0 +1,98 @@
+import numpy as np
+import pytest
+
+import carbon_exposure
+import carbon_hedge
+import carbon_models
+import climate_finance
+import result_cache
+
+
+@pytest.mark.parametrize("name", list(carbon_models.MODELS))
+def test_models_are_worker_invariant_and_bounded(name):
+    """Every model streams to the same summaries for any worker count, with ordered, positive bands."""
+    model = carbon_models.build_model(name, drift=0.05, volatility=0.4)
+    single = carbon_models.simulate(model, days=90, simulations=12000, workers=1)
+    pooled = carbon_models.simulate(model, days=90, simulations=12000, workers=2)
+
+    np.testing.assert_array_equal(single["bands"], pooled["bands"])
+    np.testing.assert_array_equal(single["terminal_prices"], pooled["terminal_prices"])
+    assert np.all(np.diff(single["bands"], axis=0) >= 0) and np.all(single["bands"] > 0)
+    assert single["sample_paths"].shape == (90, 100) and np.all(single["sample_paths"][0] == 85.0)
+
+
+def test_model_dynamics_match_closed_forms():
+    """GBM and compensated Merton keep E[S_T] = S_0 e^{mu T}; mean reversion pulls towards the long-run level."""
+    for name in ("gbm", "merton"):
+        model = carbon_models.build_model(name, drift=0.05)
+        streamed = carbon_models.simulate(model, days=60, horizon_years=0.5, simulations=100000)
+        exact = carbon_models.simulate(model, days=60, horizon_years=0.5, simulations=100000, terminal_only=True)
+        target = 85.0 * np.exp(0.05 * 0.5)
+        assert abs(streamed["expected_price"] - target) < 0.01 * target
+        assert abs(exact["expected_price"] - target) < 0.01 * target
+        assert "bands" not in exact
+
+    model = carbon_models.build_model("mean_reverting", kappa=3.0, long_run_price=120.0, volatility=0.3)
+    result = carbon_models.simulate(model, days=365, simulations=50000)
+    log_mean = np.log(120.0) + np.exp(-3.0) * np.log(85.0 / 120.0)
+    assert abs(np.log(result["terminal_prices"]).mean() - log_mean) < 0.01
+    assert abs(np.log(result["bands"][1, -1]) - log_mean) < 0.02
+
+    with pytest.raises(ValueError):
+        carbon_models.build_model("heston")
+
+
+def test_climate_finance_routes_model_selection():
+    """The dashboard entry point forwards drift/volatility and model parameters to the selected model."""
+    jumps = climate_finance.simulate_ets_carbon_pricing(simulations=20000, days=120, model="merton",
+                                                        model_params={"jump_intensity": 6.0, "jump_std": 0.3})
+    plain = climate_finance.simulate_ets_carbon_pricing(simulations=20000, days=120, model="merton",
+                                                        model_params={"jump_intensity": 0.0})
+    assert jumps["terminal_std"] > plain["terminal_std"]
+
+
+def test_carbon_simulation_is_cached_on_the_model_core(monkeypatch):
+    """The cache sits on carbon_models.simulate, keyed on the model dataclass and its source."""
+    monkeypatch.setattr(result_cache, "ENABLED", True)
+    first = climate_finance.simulate_ets_carbon_pricing(simulations=2000, days=60, model="merton")
+    second = carbon_models.simulate(carbon_models.build_model("merton", drift=0.05, volatility=0.40),
+                                    days=60, simulations=2000, workers=2)
+    np.testing.assert_array_equal(first["terminal_prices"], second["terminal_prices"])
+    assert result_cache.cache_info()["hits"] == 1
+
+
+def test_carbon_exposure_is_worker_invariant_and_attributes_cvar(scenario, correlated_history):
+    """Lane CVaR contributions sum to the network CVaR; the mean matches f * mu * E[sum P]; modes scale lanes."""
+    history = correlated_history(lanes=3)
+    args = dict(days=120, num_paths=20000, chunk_size=3000, lane_modes={"LANE-0": "Air"})
+    single = carbon_exposure.simulate_carbon_exposure(history, scenario, workers=1, **args)
+    pooled = carbon_exposure.simulate_carbon_exposure(history, scenario, workers=2, **args)
+    assert single["cvar"] == pooled["cvar"]
+
+    table = single["contributions"].set_index("lane")
+    assert np.isclose(table["cvar_contribution"].sum(), single["cvar"])
+    assert single["var"] < single["cvar"] and single["diversification_benefit"] >= 0.0
+
+    days = np.arange(120) / 119
+    expected_price_sum = (85.0 * np.exp(0.05 * days)).sum()
+    expected = expected_price_sum * table["emission_factor_kg"] / 1000 * table["daily_volume"]
+    np.testing.assert_allclose(table["expected_liability"], expected, rtol=0.01)
+    road = carbon_exposure.lane_emission_profile(history, scenario).set_index("lane")
+    assert np.isclose(table.loc["LANE-0", "emission_factor_kg"], 5.0 * road.loc["LANE-0", "emission_factor_kg"])
+
+
+def test_carbon_hedge_respects_budget_and_schedule_beats_static_hedge():
+    """Recorded prices match the paths; the hedge fits the budget; the CVaR LP is no worse than the best ratio."""
+    paths = climate_finance.simulate_ets_carbon_pricing(simulations=4000, days=120, sample_paths=4000,
+                                                        record_steps=(30, 60))
+    np.testing.assert_allclose(paths["recorded_prices"], paths["sample_paths"][[30, 60]], rtol=1e-5)
+
+    result = carbon_hedge.hedge_analysis(1000.0, days=120, simulations=4000, budget=30000.0,
+                                         schedule_points=(0.25, 0.5))
+    forward, ratio, schedule = result["forward_price"], result["ratio"], result["schedule"]
+    assert ratio["hedge_ratio"] * 1000.0 * forward <= 30000.0 + 1e-6
+    assert ratio["cvar_95"] < ratio["unhedged_cvar_95"]
+    assert np.all(np.diff(ratio["frontier"]["cvar_95"]) <= 1e-6)
+    assert schedule["forward_weight"] * 1000.0 * forward <= 30000.0 + 1e-6
+    assert np.isclose(schedule["tonnes"].sum() / 1000.0 + schedule["terminal_weight"], 1.0)
+    assert schedule["cvar_95"] <= ratio["cvar_95"] + 1e-6
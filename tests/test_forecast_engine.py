@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+
+import forecast
+import forecast_engine
+
+
+def test_batch_forecast_matches_per_lane_and_beats_linear(seasonal_history):
+    """One packed pass must equal lane-by-lane forecasts, and the seasonal models must beat a straight line."""
+    history = seasonal_history()
+    cut = pd.Timestamp("2024-06-30")
+    train, test = history[history["date"] <= cut], history[history["date"] > cut]
+    actual = test.groupby(["product_name", test["date"].dt.to_period("M")])["demand"].mean()
+
+    batch = forecast_engine.forecast_lanes(train, horizon=6)
+    for lane, lane_df in train.groupby("product_name"):
+        single = forecast_engine.forecast_lanes(lane_df, horizon=6)
+        np.testing.assert_allclose(single["demand"], batch.loc[batch["lane"] == lane, "demand"], rtol=1e-10)
+
+    def mape(result: pd.DataFrame) -> float:
+        predicted = result.set_index(["lane", result["date"].dt.to_period("M")])["demand"]
+        return float((np.abs(predicted.to_numpy() - actual.loc[predicted.index].to_numpy()) /
+                      actual.loc[predicted.index].to_numpy()).mean())
+
+    assert mape(batch) < 0.5 * mape(forecast_engine.forecast_lanes(train, horizon=6, model="linear"))
+    assert (batch["demand_upper"] >= batch["demand"]).all() and (batch["demand"] >= batch["demand_lower"]).all()
+
+
+def test_generate_forecast_contract_and_short_history_fallback(seasonal_history):
+    """Seasonal and short-history paths return the same columns; short daily series use the linear trend."""
+    lane = seasonal_history(lanes=1)
+    long_result = forecast.generate_forecast(lane, months=4)
+    assert list(long_result.columns) == forecast.FORECAST_COLUMNS and len(long_result) == 4
+
+    short = lane.head(20)
+    short_result = forecast.generate_forecast(short, months=3)
+    assert list(short_result.columns) == forecast.FORECAST_COLUMNS
+    pd.testing.assert_frame_equal(short_result, forecast._linear_trend_forecast(short, 3))
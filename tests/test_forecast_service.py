@@ -0,0 +1,31 @@
+import pandas as pd
+
+import forecast
+import forecast_service
+import result_cache
+
+
+def test_forecast_service_reuses_fingerprinted_results(seasonal_history):
+    """A refresh stores every lane; unchanged lanes are served from the store and edits are recomputed."""
+    history = seasonal_history(lanes=3)
+    first = forecast_service.refresh_forecasts(history, months=3, workers=1)
+    assert first["recomputed"] == 3
+
+    edited = history.copy()
+    edited.loc[edited.index[-1], "demand"] += 50
+    second = forecast_service.refresh_forecasts(edited, months=3, workers=1)
+    assert second["recomputed"] == 1
+
+    lane = history[history["product_name"] == "L1"]
+    served = forecast_service.get_forecast(lane.drop(columns="product_name").sample(frac=1.0, random_state=0))
+    pd.testing.assert_frame_equal(served, first["forecasts"]["L1"])
+    pd.testing.assert_frame_equal(served, forecast.generate_forecast(lane), rtol=1e-9)
+
+
+def test_forecast_store_switch_keeps_the_dashboard_path_off_disk(seasonal_history, monkeypatch):
+    """With the store switched off, serving a lane's forecast writes nothing and still returns it."""
+    monkeypatch.setattr(result_cache, "STORE_ENABLED", False)
+    lane = seasonal_history(lanes=1)
+
+    pd.testing.assert_frame_equal(forecast_service.get_forecast(lane), forecast_service.get_forecast(lane))
+    assert result_cache.cache_info()["entries"] == 0
@@ -0,0 +1,42 @@
+import pandas as pd
+
+import inventory_math
+import metrics_engine
+
+
+def _portfolio() -> pd.DataFrame:
+    dates = pd.date_range(start="2025-01-01", periods=6, freq="D")
+    return pd.concat([
+        pd.DataFrame({"date": dates, "demand": [100, 110, 95, 120, 105, 98], "product_name": "SGP-LAX"}),
+        pd.DataFrame({"date": dates, "demand": [40, 42, 38, 45, 41, 39], "product_name": "DXB-CDG"})
+    ], ignore_index=True)
+
+
+def test_portfolio_metrics_match_scalar_math(scenario):
+    """Validates that the columnar engine reproduces the per-lane inventory_math pipeline."""
+    metrics_engine.clear_cache()
+    table = metrics_engine.compute_portfolio_metrics(_portfolio(), scenario)
+    lane = _portfolio().query("product_name == 'SGP-LAX'")
+
+    workload = lane["demand"].mean() * 1.05
+    expected_ss = inventory_math.calculate_advanced_safety_stock(workload, lane["demand"].std(), 1.0, 0.2, 0.95)
+    service = inventory_math.calculate_service_implications(workload, lane["demand"].std(), 0.95, 2000.0)
+
+    row = table.set_index("lane").loc["SGP-LAX"]
+    assert list(table["lane"]) == ["DXB-CDG", "SGP-LAX"], "Engine failed to emit one row per lane."
+    assert row["safety_stock"] == expected_ss, "Vectorized RSS safety stock diverged from scalar model."
+    assert row["reliability_score"] == service["reliability_score"], "Normal loss service metric diverged."
+
+
+def test_portfolio_metrics_recompute_only_changed_lanes(scenario):
+    """Ensures that appending history to one lane invalidates only that lane's cached row."""
+    metrics_engine.clear_cache()
+    data = _portfolio()
+    metrics_engine.compute_portfolio_metrics(data, scenario)
+
+    extra = pd.DataFrame({"date": [pd.Timestamp("2025-01-07")], "demand": [300], "product_name": ["SGP-LAX"]})
+    metrics_engine.compute_portfolio_metrics(pd.concat([data, extra], ignore_index=True), scenario)
+
+    info = metrics_engine.cache_info()
+    assert info["misses"] == 3, "Unchanged lanes were recomputed."
+    assert info["hits"] == 1, "Cached lane row was not reused."
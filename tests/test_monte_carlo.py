@@ -0,0 +1,246 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import analytic_risk
+import chart_helpers
+import inventory_dynamics
+import inventory_math
+import monte_carlo
+import parallel_mc
+import sim_kernels
+import strategy_lab
+import streaming_stats
+import variance_reduction
+
+BACKENDS = [False] + ([True] if sim_kernels.NUMBA_AVAILABLE else [])
+
+
+@pytest.mark.parametrize("use_numba", BACKENDS)
+def test_newsvendor_kernel_matches_reference(monkeypatch, use_numba):
+    """Validates the fused profit kernel against the explicit sold/unsold/lost-sales decomposition."""
+    monkeypatch.setattr(sim_kernels, "NUMBA_AVAILABLE", use_numba)
+    raw = np.random.default_rng(7).normal(100.0, 35.0, 50_001)
+
+    demands = np.maximum(0, np.round(raw))
+    sold = np.minimum(demands, 120.0)
+    expected = sold * (85.0 - 50.0) - np.maximum(0, 120.0 - demands) * 18.5 - np.maximum(0, demands - 120.0) * 2000.0
+
+    profits = sim_kernels.newsvendor_profits(raw, 120.0, 85.0, 50.0, 18.5, 2000.0)
+    np.testing.assert_allclose(profits, expected, rtol=0, atol=1e-9)
+
+
+@pytest.mark.parametrize("use_numba", BACKENDS)
+def test_base_stock_kernel_conserves_flow(monkeypatch, use_numba):
+    """Ensures shipped units never exceed demand and zero-variance demand never stocks out."""
+    monkeypatch.setattr(sim_kernels, "NUMBA_AVAILABLE", use_numba)
+    demands = np.full((4, 90), 10.0)
+    lead_times = np.full((4, 90), 3)
+
+    res = sim_kernels.simulate_base_stock(demands, lead_times, order_up_to=40.0)
+
+    assert np.all(res["filled_units"] <= demands.sum(axis=1)), "Fill exceeded realised demand."
+    assert np.all(res["stockout_days"] == 0), "Deterministic demand covered by base stock stocked out."
+
+
+def test_weighted_quantiles_match_pandas_quantiles():
+    """Validates the (values, counts) quantiles against pandas' linear interpolation over the expanded sample."""
+    rng = np.random.default_rng(11)
+    values = np.round(rng.normal(500.0, 900.0, 2_001))
+    counts = rng.integers(1, 6, values.shape[0])
+    series = pd.Series(np.repeat(values, counts))
+    quantiles = (0.05, 0.01, 0.99, 0.5)
+
+    expected = [series.quantile(q) for q in quantiles]
+    assert parallel_mc.weighted_quantiles(values, counts, quantiles) == pytest.approx(expected, abs=1e-9)
+    assert parallel_mc.weighted_quantiles(values, np.ones_like(counts), quantiles) == pytest.approx(
+        [pd.Series(values).quantile(q) for q in quantiles], abs=1e-9)
+
+
+def test_headless_engine_is_seed_reproducible():
+    """Ensures explicit PCG64 seeds reproduce results and float32 mode stays within tolerance."""
+    args = (15000, 3500, 18000, 50.0, 85.0, 20.0, 150.0)
+    first = monte_carlo.simulate_profit_risk(*args, seed=7)
+    second = monte_carlo.simulate_profit_risk(*args, seed=7)
+    single = monte_carlo.simulate_profit_risk(*args, seed=7, dtype=np.float32)
+
+    assert first == second, "Identical seeds produced different risk statistics."
+    assert "profits" not in first, "Headless engine leaked the sample buffer without keep_samples."
+    assert single["avg_profit"] == pytest.approx(first["avg_profit"], rel=0.02)
+
+
+def test_headless_engine_matches_across_worker_counts():
+    """workers=1 runs the same spawned chunks in-process, so stats, samples and dtype match any pool size."""
+    args = (15000, 3500, 18000, 50.0, 85.0, 20.0, 150.0)
+    serial = monte_carlo.simulate_profit_risk(*args, num_simulations=20000, seed=1, keep_samples=True,
+                                              dtype=np.float32)
+    pooled = monte_carlo.simulate_profit_risk(*args, num_simulations=20000, seed=1, keep_samples=True,
+                                              dtype=np.float32, workers=2)
+
+    np.testing.assert_array_equal(serial.pop("profits"), pooled.pop("profits"))
+    assert serial == pooled
+    assert serial != monte_carlo.simulate_profit_risk(*args, num_simulations=20000, seed=1, workers=2)
+
+
+def test_parallel_merge_is_exact_and_worker_independent():
+    """Validates that merged chunk histograms reproduce the pooled sample statistics exactly."""
+    args = (120.0, 40.0, 150.0, 50.0, 85.0, 18.5, 200.0)
+    serial = parallel_mc.run_parallel_profit_risk(*args, num_simulations=60_000, seed=3, workers=1,
+                                                  chunk_size=25_000)
+    pooled = parallel_mc.run_parallel_profit_risk(*args, num_simulations=60_000, seed=3, workers=2,
+                                                  chunk_size=25_000)
+
+    draws = np.concatenate([
+        np.random.Generator(np.random.PCG64(seq)).standard_normal(n)
+        for seq, n in parallel_mc.spawn_chunks(3, 60_000, 25_000)
+    ]) * 40.0 + 120.0
+    profits = sim_kernels.newsvendor_profits(draws, 150.0, 85.0, 50.0, 18.5, 200.0)
+    var_95, q_low, q_high = np.quantile(profits, (0.05, 0.01, 0.99))
+    reference = {"var_95": var_95, "q_low": q_low, "q_high": q_high, "loss_prob": (profits < 0).mean() * 100}
+
+    assert serial == pooled, "Results depend on the worker count."
+    for key, value in reference.items():
+        assert serial[key] == pytest.approx(value, abs=1e-9), f"{key} merge is not exact."
+    assert serial["avg_profit"] == pytest.approx(profits.mean(), rel=1e-12)
+
+
+def test_control_variate_reduces_standard_error():
+    """Validates that the normal-loss control variate shrinks the expected-profit standard error."""
+    args = (15000, 3500, 18000, 50.0, 85.0, 20.0, 150.0)
+    plain = variance_reduction.estimate_profit_mean(*args, num_simulations=8192, method="plain")
+    control = variance_reduction.estimate_profit_mean(*args, num_simulations=8192, method="control")
+    exact = inventory_math.calculate_expected_newsvendor_profit(*args[:2], 18000, 50.0, 85.0, 20.0, 150.0)
+
+    assert control["std_error"] * 10 < plain["std_error"], "Control variate failed to reduce variance."
+    assert control["estimate"] == pytest.approx(exact, rel=1e-3)
+
+
+def test_importance_sampled_var_matches_analytic_tail():
+    """Checks IS deep-tail VaR against the closed-form quantile across seeds, with a tighter spread than plain MC."""
+    args = (1000.0, 150.0, 1050.0, 50.0, 85.0, 18.5, 200.0)
+    alpha, replicates, n = 0.001, 20, 20000
+    runs = [variance_reduction.importance_sampled_var(*args, alpha=alpha, num_simulations=n, seed=seed)
+            for seed in range(replicates)]
+    var = np.array([run["var"] for run in runs])
+    tail_prob = analytic_risk.profit_cdf(var, *args)
+    exact = analytic_risk.profit_quantiles([alpha], *args)[0]
+
+    assert abs(tail_prob.mean() - alpha) <= 4 * tail_prob.std(ddof=1) / np.sqrt(replicates)
+    assert abs(var.mean() - exact) <= 4 * var.std(ddof=1) / np.sqrt(replicates)
+    # Plain Monte Carlo's tail-probability standard error at the same sample size
+    assert tail_prob.std(ddof=1) < 0.25 * np.sqrt(alpha * (1 - alpha) / n)
+    assert all(run["cvar"] <= run["var"] for run in runs)
+
+
+def test_adaptive_stop_rule_meets_tolerance():
+    """Ensures the adaptive sampler stops once the CI half-width reaches the requested target."""
+    args = (15000, 3500, 18000, 50.0, 85.0, 20.0, 150.0)
+    res = variance_reduction.adaptive_profit_risk(*args, target="var", tolerance=500.0, method="sobol")
+
+    assert res["converged"], "Adaptive VaR estimate did not reach the requested precision."
+    assert res["ci_half_width"] <= 500.0
+    assert res["num_simulations"] < 100_000, "Variance reduction did not cut the path budget."
+
+
+def test_inventory_dynamics_safety_stock_improves_service():
+    """Validates that extra safety stock raises realised fill rate and cuts stockout days."""
+    common = dict(avg_demand=200.0, std_dev=40.0, lead_time_days=10.0, lead_time_volatility_days=3.0,
+                  return_rate=0.05, holding_cost=0.5, days=120, num_paths=2000)
+    lean = inventory_dynamics.simulate_inventory_dynamics(safety_stock=0.0, **common)
+    buffered = inventory_dynamics.simulate_inventory_dynamics(safety_stock=600.0, **common)
+
+    assert buffered["fill_rate"] > lean["fill_rate"], "Safety stock failed to improve the fill rate."
+    assert buffered["stockout_days"] < lean["stockout_days"], "Safety stock failed to reduce stockout days."
+    assert buffered["holding_cost"] > lean["holding_cost"], "Holding cost ignored the larger buffer."
+    assert 0.0 <= lean["fill_rate"] <= 1.0
+
+
+def test_streaming_accumulators_match_in_memory_statistics():
+    """Checks chunked accumulators against the full-array results within their documented error bounds."""
+    args = (1000.0, 150.0, 1050.0, 50.0, 85.0, 18.5, 200.0)
+    profits = monte_carlo.sample_profits(*args, num_simulations=400_000)
+    streamed = monte_carlo.stream_profit_risk(*args, num_simulations=400_000, chunk_size=50_000)
+
+    assert streamed["num_simulations"] == 400_000
+    assert streamed["avg_profit"] == pytest.approx(profits.mean(), rel=1e-12)
+    assert streamed["std_profit"] == pytest.approx(profits.std(ddof=1), rel=1e-9)
+    assert streamed["loss_prob"] == pytest.approx(np.mean(profits < 0) * 100)
+    assert abs(np.mean(profits <= streamed["var_95"]) - 0.05) <= streamed["var_rank_error"] + 1e-3
+    assert streamed["hist_counts"].sum() == 400_000
+
+    hist = streaming_stats.FixedBinHistogram(-5000.0, 40000.0, bins=900)
+    for chunk in np.array_split(profits, 7):
+        hist.update(chunk)
+    assert abs(hist.quantile(0.5) - np.quantile(profits, 0.5)) <= hist.width
+
+
+def test_strategy_sweep_matches_brute_force_matrix():
+    """Validates the sorted prefix-sum candidate engine against the explicit (candidates x days) profit matrix."""
+    demands = strategy_lab.sample_demands(1000.0, 150.0, 7001)
+    capacities = 1000.0 + strategy_lab.candidate_grid(66.0, 180.0)
+    table = strategy_lab.evaluate_capacities(demands, capacities, 35.0, 18.5)
+
+    profits = sim_kernels.capacity_profits(demands, capacities, 35.0, 18.5)
+    tail = np.sort(profits, axis=1)[:, :int(np.ceil(0.05 * demands.shape[0]))]
+    np.testing.assert_allclose(table["avg_profit"], profits.mean(axis=1), rtol=1e-10)
+    np.testing.assert_allclose(table["std_profit"], profits.std(axis=1), rtol=1e-8)
+    np.testing.assert_allclose(table["var_95"], np.percentile(profits, 5, axis=1), rtol=1e-10)
+    np.testing.assert_allclose(table["cvar_95"], tail.mean(axis=1), rtol=1e-10)
+    np.testing.assert_array_equal(table["loss_prob"], np.mean(profits < 0, axis=1) * 100)
+
+    frontier = table[table["on_frontier"]]
+    dominated = (table["avg_profit"].to_numpy()[:, None] > frontier["avg_profit"].to_numpy()) & \
+                (table["var_95"].to_numpy()[:, None] >= frontier["var_95"].to_numpy())
+    assert not dominated.any()
+
+
+def test_histogram_payload_is_fixed_size_and_rebins_exactly():
+    """Keeps the risk chart at a fixed number of bars and checks fine-to-coarse re-binning conserves counts."""
+    args = (1000, 150, 1050, 50, 85, 18.5, 200)
+    small, _ = monte_carlo.run_simulation(*args, num_simulations=5_000, method="monte_carlo")
+    large, _ = monte_carlo.run_simulation(*args, num_simulations=monte_carlo.STREAM_CHUNK_SIZE + 1,
+                                          method="monte_carlo")
+    assert len(small.data[0].x) == chart_helpers.DISPLAY_BINS
+    assert len(large.data[0].x) <= chart_helpers.DISPLAY_BINS
+
+    values = np.random.default_rng(5).normal(0.0, 1.0, 20_000)
+    fine_counts, fine_edges = chart_helpers.bin_values(values, bins=1000, value_range=(-6.0, 6.0))
+    counts, edges = chart_helpers.rebin(fine_counts, fine_edges, bins=40)
+    assert counts.sum() == 20_000 and counts.shape[0] <= 40
+    np.testing.assert_array_equal(counts, np.histogram(values, bins=edges)[0])
+
+
+@pytest.mark.parametrize("args", [
+    (1000.0, 150.0, 1050.0, 50.0, 85.0, 18.5, 200.0),
+    (1000.0, 150.0, 1200.4, 50.0, 85.0, 18.5, 2000.0),
+    (500.0, 60.0, 480.0, 30.0, 45.0, 2.0, 15.0)
+])
+def test_analytic_risk_matches_monte_carlo(args):
+    """Cross-checks the closed-form evaluator against a large Monte Carlo run of the same rounded-demand model."""
+    assert analytic_risk.analytic_applicable(args[0], args[1], *args[3:])
+    exact = analytic_risk.analytic_profit_risk(*args)
+    sampled = monte_carlo.simulate_profit_risk(*args, num_simulations=1_000_000, keep_samples=True)
+    standard_error = sampled["profits"].std() / 1000.0
+
+    assert exact["avg_profit"] == pytest.approx(sampled["avg_profit"], abs=4 * standard_error)
+    assert exact["loss_prob"] == pytest.approx(sampled["loss_prob"], abs=0.1)
+    for key in ("var_95", "q_low", "q_high"):
+        assert exact[key] == pytest.approx(sampled[key], rel=1e-3, abs=args[-1])
+
+    fig, metrics = monte_carlo.run_simulation(*args)
+    assert metrics["var_95"] == int(exact["var_95"])
+    assert sum(fig.data[0].y) == pytest.approx(10000 * 0.98, rel=1e-2)
+
+
+def test_fan_chart_packs_sample_paths_into_one_trace():
+    """Sample paths become one gap-separated trace, and every band is a single closed polygon."""
+    paths = np.random.default_rng(2).lognormal(size=(30, 100))
+    x = np.arange(30)
+    fig = chart_helpers.fan_chart(x, paths.mean(axis=1), paths=paths,
+                                  bands=[(np.percentile(paths, 5, axis=1), np.percentile(paths, 95, axis=1),
+                                          "90% band", "rgba(0, 0, 255, 0.1)")])
+    assert len(fig.data) == 3
+    packed = fig.data[0]
+    assert len(packed.y) == 31 * 100 and np.isnan(packed.y[30::31]).all()
+    np.testing.assert_allclose(packed.y[31:61], paths[:, 1], rtol=1e-6)
+    assert fig.data[1].fill == "toself" and len(fig.data[1].x) == 60
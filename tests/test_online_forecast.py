@@ -0,0 +1,60 @@
+import numpy as np
+
+import forecast_engine
+import forecast_service
+import online_forecast
+import result_cache
+
+
+def test_online_state_tracks_batch_engine_record_by_record(seasonal_history):
+    """Streaming records into a seeded state must reproduce the batch fit with the same model constants."""
+    history = seasonal_history(lanes=1).drop(columns="product_name")
+    cut = int(len(history) * 0.9)
+    packed = forecast_engine.pack_lanes(history.assign(product_name="L0"))
+    for model in ("holt_winters", "linear"):
+        state = online_forecast.OnlineLaneForecaster.seed(history.iloc[:cut], "L0", model)
+        assert all(state.observe(d, v) for d, v in zip(history["date"].iloc[cut:], history["demand"].iloc[cut:]))
+        assert state.periods_since_seed > 0 and state.matches(history)
+
+        if model == "linear":
+            batch = forecast_engine.linear_batch(packed["values"], packed["lengths"], 3)
+        else:
+            alpha, beta, gamma = state.params
+            batch = forecast_engine.holt_winters_batch(packed["values"], packed["lengths"], 3, 12,
+                                                       (alpha,), (beta,), (gamma,))
+        np.testing.assert_allclose(state.forecast(3)["demand"], batch["mean"][0], rtol=1e-9)
+
+    assert not state.observe(history["date"].iloc[0], 1.0) and state.stale
+    assert online_forecast.forecast_lane("L0", history, 3)["demand"].notna().all()
+
+
+def test_observe_records_reapplies_rows_when_another_writer_saved_first(seasonal_history, monkeypatch):
+    """A state advanced by a concurrent writer between load and save must not be overwritten."""
+    history = seasonal_history(lanes=1)
+    cut = len(history) - 2
+    online_forecast.save_state(online_forecast.OnlineLaneForecaster.seed(history.iloc[:cut], "L0"))
+    absorb = online_forecast._absorb
+    racing = [history.iloc[cut:cut + 1]]
+
+    def absorb_while_another_writer_saves(state, rows):
+        if racing:
+            other = online_forecast.load_state("L0")
+            absorb(other, racing.pop())
+            online_forecast.save_state(other)
+        return absorb(state, rows)
+
+    monkeypatch.setattr(online_forecast, "_absorb", absorb_while_another_writer_saves)
+    assert online_forecast.observe_records(history.iloc[cut + 1:]) == 1
+    state = online_forecast.load_state("L0")
+    assert state.matches(history) and not state.stale
+
+
+def test_online_forecasts_survive_an_unwritable_store(seasonal_history, tmp_path, monkeypatch):
+    """Store write failures must not escape the forecast or streaming paths."""
+    blocker = tmp_path / "not_a_directory"
+    blocker.write_text("")
+    monkeypatch.setattr(result_cache, "CACHE_DIR", str(blocker / "store"))
+    history = seasonal_history(lanes=1)
+
+    assert forecast_service.get_forecast(history)["demand"].notna().all()
+    assert online_forecast.observe_records(history.tail(1)) == 0
@@ -0,0 +1,77 @@
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+import monte_carlo
+import result_cache
+
+
+def test_stable_hash_tracks_contents_not_identity():
+    """Equal arrays, frames and dicts hash identically; any content change produces a new key."""
+    frame = pd.DataFrame({"demand": [100, 110, 95], "product_name": ["A", "A", "B"]})
+    base = result_cache.stable_hash(np.arange(5.0), frame, {"b": 1, "a": [1.0, 2.0]}, np.float32)
+
+    assert base == result_cache.stable_hash(np.arange(5.0), frame.copy(), {"a": [1.0, 2.0], "b": 1}, np.float32)
+    assert base != result_cache.stable_hash(np.arange(5.0), frame.assign(demand=[100, 111, 95]),
+                                            {"b": 1, "a": [1.0, 2.0]}, np.float32)
+    assert base != result_cache.stable_hash(np.arange(5), frame, {"b": 1, "a": [1.0, 2.0]}, np.float32)
+
+
+def test_disk_cache_hits_expires_and_evicts(monkeypatch):
+    """Exercises hit/miss counting on a real engine, TTL expiry and size-based LRU eviction."""
+    monkeypatch.setattr(result_cache, "ENABLED", True)
+    args = (1000, 150, 1050, 50, 85, 18.5, 200)
+
+    _, first = monte_carlo.run_simulation(*args)
+    _, second = monte_carlo.run_simulation(*args, num_simulations=10000)
+    info = result_cache.cache_info()
+    assert first == second
+    assert (info["hits"], info["misses"], info["entries"]) == (1, 1, 1)
+
+    calls = []
+
+    @result_cache.disk_cache(ttl=0.05)
+    def square(x):
+        calls.append(x)
+        return np.full(1000, x * x)
+
+    square(3)
+    time.sleep(0.1)
+    square(3)
+    assert calls == [3, 3]
+
+    result_cache.evict(max_bytes=0)
+    assert result_cache.cache_info()["entries"] == 0
+
+
+def test_disk_cache_keys_on_callee_source_and_skips_unseeded_calls(monkeypatch):
+    """Keys cover transitively imported repo modules; seed=None results are never stored; trim is lazy."""
+    closure = result_cache.module_closure("monte_carlo")
+    assert {"analytic_risk", "inventory_math", "parallel_mc", "sim_kernels"} <= closure
+    assert "numpy" not in closure
+    assert result_cache.source_digest("monte_carlo") != result_cache.source_digest("monte_carlo", ("carbon_models",))
+
+    monkeypatch.setattr(result_cache, "ENABLED", True)
+    args = (1000, 150, 1050, 50, 85, 18.5, 200)
+    monte_carlo.run_simulation(*args, seed=None)
+    assert result_cache.cache_info()["entries"] == 0
+
+    monte_carlo.run_simulation(*args)
+    assert result_cache.trim_cache() == 0
+    monkeypatch.setattr(result_cache, "MAX_BYTES", 0)
+    assert result_cache.trim_cache() == 1
+
+
+class _Renamed:
+    """Stands in for a stored class that later moves or is renamed."""
+
+
+def test_entries_that_no_longer_unpickle_are_misses(monkeypatch):
+    """Entries whose classes have gone away read as misses and are removed, instead of raising."""
+    result_cache.store_entry("moved-class", _Renamed())
+    monkeypatch.delattr(sys.modules[_Renamed.__module__], "_Renamed")
+
+    assert result_cache.load_entry("moved-class") == (False, None)
+    assert result_cache.cache_info()["entries"] == 0
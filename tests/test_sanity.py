@@ -2,10 +2,14 @@ import pytest
 import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
+from scipy.stats import norm
 
 import climate_finance
 import profit_optimizer
 import forecast
+import profit_cube
+import sla_solver
+import surrogate
 
 def test_gbm_carbon_simulation_integrity():
     """Validates the Stochastic EU ETS Carbon Pricing model."""
@@ -21,9 +25,25 @@ def test_gbm_carbon_simulation_integrity():
         simulations=simulations
     )
 
-    assert res["paths"].shape == (days, simulations), "GBM matrix dimensions collapsed."
+    assert res["bands"].shape == (3, days) and res["mean"].shape == (days,), "GBM summary dimensions collapsed."
+    assert res["sample_paths"].shape == (days, 100), "GBM sample path dimensions collapsed."
     assert res["cvar_95"] > res["expected_price"], "CVaR boundary failed to exceed expected mean."
-    assert np.all(res["paths"] > 0), "GBM produced negative asset prices."
+    assert np.all(res["sample_paths"] > 0), "GBM produced negative asset prices."
+
+def test_gbm_streamed_bands_match_full_matrix():
+    """Streamed per-step mean/bands must match statistics of the full path matrix; terminal-only matches its law."""
+    res = climate_finance.simulate_ets_carbon_pricing(days=120, simulations=6000, sample_paths=6000)
+    paths = res["sample_paths"]
+
+    np.testing.assert_allclose(res["mean"], paths.mean(axis=1), rtol=1e-12)
+    np.testing.assert_allclose(res["bands"], np.percentile(paths, [5, 50, 95], axis=1), rtol=5e-3)
+    assert res["cvar_95"] == np.percentile(paths[-1], 95)
+
+    terminal = climate_finance.simulate_ets_carbon_pricing(days=120, simulations=200000, terminal_only=True)
+    assert "sample_paths" not in terminal and terminal["terminal_prices"].shape == (200000,)
+    streamed = climate_finance.simulate_ets_carbon_pricing(days=120, simulations=200000, seed=7)
+    assert abs(terminal["expected_price"] - streamed["expected_price"]) < 0.005 * streamed["expected_price"]
+    assert abs(terminal["cvar_95"] - streamed["cvar_95"]) < 0.01 * streamed["cvar_95"]
 
 def test_forecast_rmse_confidence_intervals():
     """Validates linear trend forecasting and RMSE-based confidence intervals."""
@@ -52,3 +72,64 @@ def test_profit_optimizer_vectorization():
         assert fig is not None, "Plotly figure failed to render from matrix data."
     except ValueError as e:
         pytest.fail(f"Vectorized matrix broadcasting failed: {e}")
+
+def test_gbm_carbon_simulation_worker_reproducibility():
+    """Ensures spawned seed streams give identical carbon paths for any worker count."""
+    single = climate_finance.simulate_ets_carbon_pricing(simulations=12000, days=30, workers=1)
+    pooled = climate_finance.simulate_ets_carbon_pricing(simulations=12000, days=30, workers=2)
+
+    assert np.array_equal(single["sample_paths"], pooled["sample_paths"]), "Parallel GBM paths diverged from serial run."
+    assert np.array_equal(single["bands"], pooled["bands"]) and np.array_equal(single["mean"], pooled["mean"])
+
+def test_sla_solver_beats_any_grid_point():
+    """Checks the closed-form optimal SLA against a dense brute-force cost scan, per lane and vectorized."""
+    std = np.array([350.0, 1200.0, 80.0])
+    s_eff = std * np.array([1.0, 1.6, 3.0])
+    best = sla_solver.optimal_service_level(20.0, 150.0, 35.0, std, s_eff)
+
+    grid = np.linspace(0.50, 0.99, 200001)[:, None]
+    scan = sla_solver.cost_components(norm.ppf(grid), 20.0, 150.0, 35.0, std, s_eff)["total"]
+    at_best = sla_solver.cost_components(best["z"], 20.0, 150.0, 35.0, std, s_eff)["total"]
+
+    assert np.all(at_best <= scan.min(axis=0) + 1e-9)
+    np.testing.assert_allclose(best["service_level"], grid[scan.argmin(axis=0), 0], atol=5e-6)
+
+def test_profit_cube_slices_are_exact_off_grid():
+    """Slices at arbitrary holding/stockout costs must match the direct formula, and cubes are reused."""
+    cube = profit_cube.get_profit_cube(15000, 3500, 35.0)
+    assert cube["safety_stock"].shape == (cube["service_levels"].size, cube["lead_time_vars"].size)
+    assert cube["expected_shortage"].shape == cube["service_levels"].shape
+    assert profit_cube.get_profit_cube(15000, 3500, 35.0) is cube
+
+    z = norm.ppf(cube["service_levels"])[:, None]
+    s_eff = np.sqrt(3500 ** 2 + 15000 ** 2 * cube["lead_time_vars"][None, :] ** 2)
+    for h, pi in [(20.0, 150.0), (37.5, 2222.0), (140.0, 6000.0)]:
+        direct = 15000 * 35.0 - sla_solver.cost_components(z, h, pi, 35.0, 3500, s_eff)["total"]
+        np.testing.assert_allclose(profit_cube.slice_profit(cube, h, pi), direct, rtol=1e-12)
+
+    # The cost trade-off curve is the cube's sigma_LT = 0 column with the exact optimum spliced in
+    fig = profit_optimizer.plot_cost_tradeoff(15000, 3500, 37.5, 2222.0, 50.0, 85.0)
+    total = next(trace for trace in fig.data if trace.name == "Total Cost Impact")
+    levels = np.asarray(total.x)
+    expected = sla_solver.cost_components(norm.ppf(levels), 37.5, 2222.0, 35.0, 3500)["total"]
+    np.testing.assert_allclose(np.asarray(total.y), expected, rtol=1e-12)
+    assert levels.size == cube["service_levels"].size + 1 and np.all(np.diff(levels) >= 0)
+
+def test_surrogate_matches_exact_engines():
+    """Surrogate what-if answers must agree with metrics_engine and the analytic risk engine."""
+    report = surrogate.error_report(num_samples=150, seed=7).set_index("metric")
+    assert report.loc[["safety_stock", "resilience_score", "loss_prob", "var_95"], "max_abs_error"].max() == 0.0
+    assert report.loc["avg_profit", "max_abs_error"] < 1e-6
+
+    sweep = surrogate.what_if(120.0, 20.0, surrogate.sample_scenarios(1, seed=3)[2][0], "stockout_cost",
+                              np.linspace(0.0, 5000.0, 11))
+    assert len(sweep) == 11 and sweep["safety_stock"].nunique() == 1
+    assert sweep["avg_profit"].is_monotonic_decreasing
+
+    # Capacity-moving sweeps are evaluated in one vectorized pass and match per-value queries
+    inputs = surrogate.sample_scenarios(1, seed=3)[2][0]
+    levels = np.linspace(0.5, 0.99, 8)
+    sweep = surrogate.what_if(120.0, 20.0, inputs, "sla", levels).drop(columns="sla")
+    single = pd.concat([surrogate.query(120.0, 20.0, {**inputs, "sla": level}) for level in levels],
+                       ignore_index=True)
+    pd.testing.assert_frame_equal(sweep, single)
@@ -1,8 +1,10 @@
 import streamlit as st
-import matplotlib.pyplot as plt
+import plotly.graph_objects as go
 import time
 from services.dispatcher import EcosystemDispatcher
 
+import chart_helpers
+
 
 def render_chat_ui(df, metrics, ai_brain, extra_context="", key="default_chat"):
     st.divider()
@@ -38,7 +40,7 @@ def render_chat_ui(df, metrics, ai_brain, extra_context="", key="default_chat"):
         st.rerun()
 
 
-def render_research_lab_ui(opt_ss, curr_ss, avg_b, delta, loss_prob_b, var_95_b, p_a, p_b):
+def render_research_lab_ui(opt_ss, curr_ss, avg_b, delta, loss_prob_b, var_95_b, hist_a, hist_b):
     st.divider()
 
     k1, k2, k3 = st.columns(3)
@@ -51,16 +53,21 @@ def render_research_lab_ui(opt_ss, curr_ss, avg_b, delta, loss_prob_b, var_95_b,
     r2.metric("⚠️ Value at Risk (VaR 95%)", f"${var_95_b:,.0f}", "Worst Case Scenario")
     r3.metric("Risk Profile", "STABLE" if loss_prob_b < 5 else "ELEVATED", "Simulation Rating")
 
-    fig, ax = plt.subplots(figsize=(10, 5))
-    ax.hist(p_a, bins=50, alpha=0.4, label='Current Strategy', color='gray', density=True)
-    ax.hist(p_b, bins=50, alpha=0.6, label='Optimal Strategy', color='#004562', density=True)
-    ax.axvline(0, color='red', linestyle='--', linewidth=1)
-    ax.legend()
-    ax.set_title("Profit & Loss Distribution")
-    ax.spines['top'].set_visible(False)
-    ax.spines['right'].set_visible(False)
-
-    st.pyplot(fig)
+    # Histograms arrive pre-binned as (counts, edges) on shared edges, so no re-binning happens per rerun
+    fig = go.Figure([
+        chart_helpers.histogram_bar(*hist_a, name='Current Strategy', color='gray', opacity=0.4),
+        chart_helpers.histogram_bar(*hist_b, name='Optimal Strategy', color='#004562', opacity=0.6)
+    ])
+    fig.add_vline(x=0, line_dash="dash", line_color="red", line_width=1)
+    fig.update_layout(
+        title="Profit & Loss Distribution",
+        barmode='overlay',
+        bargap=0,
+        height=400,
+        margin=dict(l=0, r=0, t=40, b=0)
+    )
+
+    st.plotly_chart(fig, use_container_width=True)
 
 
 def render_tactical_execution_ui(key_prefix="default"):
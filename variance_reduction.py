@@ -0,0 +1,219 @@
+import math
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+from scipy.stats import norm, qmc
+
+import inventory_math
+import sim_kernels
+
+SAMPLING_METHODS = ("plain", "antithetic", "sobol", "lhs")
+_UNIFORM_EPS = 1e-12
+
+
+def standard_normals(rng: np.random.Generator, n: int, method: str = "plain") -> np.ndarray:
+    """
+    Draws n standard normal variates with the requested sampling scheme.
+    'antithetic' returns mirrored pairs (z, -z); 'sobol' and 'lhs' map scrambled low-discrepancy
+    uniforms through the inverse normal CDF (Sobol sizes should be powers of two for balance).
+    """
+    if method == "plain":
+        return rng.standard_normal(n)
+    if method == "antithetic":
+        half = rng.standard_normal((n + 1) // 2)
+        return np.concatenate([half, -half])[:n]
+    if method == "sobol":
+        u = qmc.Sobol(d=1, scramble=True, seed=rng).random_base2(max(0, math.ceil(math.log2(n))))[:n, 0]
+    elif method == "lhs":
+        u = qmc.LatinHypercube(d=1, seed=rng).random(n)[:, 0]
+    else:
+        raise ValueError(f"Unknown sampling method '{method}'. Expected one of {SAMPLING_METHODS}.")
+    return norm.ppf(np.clip(u, _UNIFORM_EPS, 1.0 - _UNIFORM_EPS))
+
+
+def _batch_profits(z: np.ndarray, params: tuple, continuous: bool = False) -> np.ndarray:
+    avg_demand, std_dev, capacity, unit_cost, selling_price, holding_cost, stockout_cost = params
+    demands = avg_demand + std_dev * z
+    return sim_kernels.newsvendor_profits(
+        demands, capacity, selling_price, unit_cost, holding_cost, stockout_cost,
+        round_demand=not continuous, out=demands
+    )
+
+
+def control_variate_estimate(y: np.ndarray, x: np.ndarray, x_mean: float) -> Dict[str, float]:
+    """Adjusts the sample mean of y with a control x of known expectation using the optimal beta."""
+    x_centered = x - x.mean()
+    denom = float(np.dot(x_centered, x_centered))
+    beta = float(np.dot(x_centered, y - y.mean()) / denom) if denom > 0.0 else 0.0
+    adjusted = y - beta * (x - x_mean)
+    return {
+        "estimate": float(adjusted.mean()),
+        "std_error": float(adjusted.std(ddof=1) / math.sqrt(y.shape[0])),
+        "beta": beta
+    }
+
+
+def estimate_profit_mean(
+    avg_demand: float,
+    std_dev: float,
+    capacity_limit: float,
+    unit_cost: float,
+    selling_price: float,
+    holding_cost: float,
+    stockout_cost: float,
+    num_simulations: int = 10000,
+    method: str = "control",
+    seed: Optional[int] = 42,
+    rng: Optional[np.random.Generator] = None
+) -> Dict[str, float]:
+    """
+    Estimates expected profit with a variance-reduction technique and reports its standard error
+    and the sample's loss probability (%).
+    'control' uses the continuous-demand profit (exact mean from the normal loss function) as a control
+    variate for the rounded, non-negative demand model actually simulated.
+    """
+    params = (avg_demand, std_dev, capacity_limit, unit_cost, selling_price, holding_cost, stockout_cost)
+    if rng is None:
+        rng = np.random.Generator(np.random.PCG64(seed))
+
+    if method == "control":
+        z = rng.standard_normal(num_simulations)
+        control_mean = inventory_math.calculate_expected_newsvendor_profit(*params)
+        profits = _batch_profits(z, params)
+        result = control_variate_estimate(profits, _batch_profits(z, params, True), control_mean)
+        result.pop("beta")
+    elif method == "antithetic":
+        z = standard_normals(rng, num_simulations + num_simulations % 2, "antithetic")
+        half = z.shape[0] // 2
+        profits = _batch_profits(z, params)
+        pair_means = 0.5 * (profits[:half] + profits[half:])
+        result = {"estimate": float(pair_means.mean()), "std_error": float(pair_means.std(ddof=1) / math.sqrt(half))}
+    else:
+        profits = _batch_profits(standard_normals(rng, num_simulations, method), params)
+        # For QMC the iid standard error is conservative; adaptive_profit_risk uses randomized replicates
+        result = {"estimate": float(profits.mean()), "std_error": float(profits.std(ddof=1) / math.sqrt(profits.shape[0]))}
+
+    result.update({
+        "loss_prob": float(np.count_nonzero(profits < 0.0) / profits.shape[0] * 100),
+        "method": method,
+        "num_simulations": num_simulations
+    })
+    return result
+
+
+def importance_sampled_var(
+    avg_demand: float,
+    std_dev: float,
+    capacity_limit: float,
+    unit_cost: float,
+    selling_price: float,
+    holding_cost: float,
+    stockout_cost: float,
+    alpha: float = 0.001,
+    num_simulations: int = 20000,
+    shift: Optional[float] = None,
+    seed: Optional[int] = 42
+) -> Dict[str, float]:
+    """
+    Estimates deep-tail VaR/CVaR with a defensive mixture proposal N(0,1), N(-s,1), N(+s,1).
+    Losses can come from either demand tail (idle capacity or SLA penalties), so both tails are tilted
+    and likelihood-ratio weights phi(z) / mixture(z) keep the estimator unbiased.
+    """
+    params = (avg_demand, std_dev, capacity_limit, unit_cost, selling_price, holding_cost, stockout_cost)
+    rng = np.random.Generator(np.random.PCG64(seed))
+    shift = float(norm.isf(alpha)) if shift is None else float(shift)
+
+    component = rng.integers(0, 3, num_simulations)
+    z = rng.standard_normal(num_simulations) + np.array([0.0, -shift, shift])[component]
+    log_mixture = np.logaddexp.reduce(
+        np.stack([norm.logpdf(z), norm.logpdf(z + shift), norm.logpdf(z - shift)]), axis=0
+    ) - math.log(3.0)
+    weights = np.exp(norm.logpdf(z) - log_mixture)
+
+    profits = _batch_profits(z, params)
+    order = np.argsort(profits)
+    sorted_profits, sorted_weights = profits[order], weights[order]
+    cdf = np.cumsum(sorted_weights) / num_simulations
+    idx = min(int(np.searchsorted(cdf, alpha, side="left")), num_simulations - 1)
+
+    tail_weight = cdf[idx]
+    cvar = float(np.dot(sorted_profits[:idx + 1], sorted_weights[:idx + 1]) / (tail_weight * num_simulations))
+    return {
+        "alpha": alpha,
+        "var": float(sorted_profits[idx]),
+        "cvar": cvar,
+        "effective_sample_size": float(weights.sum() ** 2 / np.dot(weights, weights)),
+        "num_simulations": num_simulations
+    }
+
+
+def adaptive_profit_risk(
+    avg_demand: float,
+    std_dev: float,
+    capacity_limit: float,
+    unit_cost: float,
+    selling_price: float,
+    holding_cost: float,
+    stockout_cost: float,
+    target: str = "mean",
+    tolerance: float = 100.0,
+    confidence: float = 0.95,
+    method: str = "control",
+    batch_size: int = 4096,
+    min_batches: int = 8,
+    max_paths: int = 2_000_000,
+    seed: Optional[int] = 42
+) -> Dict[str, Union[float, int, bool, str]]:
+    """
+    Samples in batches until the confidence-interval half-width on expected profit ('mean') or
+    VaR 95% ('var') falls below `tolerance` dollars, or `max_paths` is reached. The control variate
+    only applies to the mean; for 'var' the 'control' method samples plainly.
+    The interval comes from the spread of independent batch estimates (batch means; sectioning for VaR,
+    whose point estimate uses the pooled sample), which stays valid for antithetic, control-variate and
+    randomized QMC batches alike.
+    """
+    if target not in ("mean", "var"):
+        raise ValueError("target must be 'mean' or 'var'.")
+    params = (avg_demand, std_dev, capacity_limit, unit_cost, selling_price, holding_cost, stockout_cost)
+    rng = np.random.Generator(np.random.PCG64(seed))
+    sampler = "plain" if method == "control" else method
+    z_crit = float(norm.ppf(0.5 + confidence / 2.0))
+
+    batch_estimates: List[float] = []
+    pooled: List[np.ndarray] = []
+    losses, paths, half_width = 0, 0, math.inf
+    while paths + batch_size <= max_paths:
+        if target == "mean":
+            batch = estimate_profit_mean(*params, num_simulations=batch_size, method=method, rng=rng)
+            estimate = batch["estimate"]
+            losses += round(batch["loss_prob"] * batch_size / 100)
+        else:
+            profits = _batch_profits(standard_normals(rng, batch_size, sampler), params)
+            estimate = float(np.quantile(profits, 0.05))
+            pooled.append(profits)
+            losses += int(np.count_nonzero(profits < 0.0))
+        batch_estimates.append(estimate)
+        paths += batch_size
+
+        if len(batch_estimates) >= min_batches:
+            half_width = z_crit * float(np.std(batch_estimates, ddof=1)) / math.sqrt(len(batch_estimates))
+            if half_width <= tolerance:
+                break
+
+    if not batch_estimates:
+        point = float("nan")
+    elif target == "mean":
+        point = float(np.mean(batch_estimates))
+    else:
+        point = float(np.quantile(np.concatenate(pooled), 0.05))
+
+    return {
+        "avg_profit" if target == "mean" else "var_95": point,
+        "ci_half_width": half_width,
+        "confidence": confidence,
+        "loss_prob": losses / paths * 100 if paths else float("nan"),
+        "num_simulations": paths,
+        "batches": len(batch_estimates),
+        "method": method,
+        "converged": half_width <= tolerance
+    }